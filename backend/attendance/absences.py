@@ -0,0 +1,138 @@
+"""
+Implicit absences - absences derived from a roster instead of stored
+
+Services in implicit-absence mode (Service.ATTENDANCE_MODE_IMPLICIT) keep
+only presences in the Attendance table. Closing such a session records who
+was expected instead of writing an absent row per missing member: a
+SessionRoster pointing at a RosterSnapshot of the expected members.
+Snapshots are shared by member set, so a roster that rarely changes is
+stored once rather than once per session.
+
+A member is absent from an implicitly closed session when they are in its
+snapshot and have no Attendance row for it. Code that counts absences
+(metrics, the per-service report, mark_absent) uses the helpers below, so
+both storage modes give the same numbers and API responses.
+"""
+
+import hashlib
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from members.models import Member
+from services.models import Service
+from services.utils import finalize_roster_rows, get_expected_members
+
+from .models import Attendance, RosterSnapshot, SessionRoster
+
+
+def get_or_create_snapshot(member_ids):
+    """
+    The snapshot for a set of member pks, creating it (and its member links)
+    the first time the set is seen.
+    """
+    member_ids = sorted(set(member_ids))
+    digest = hashlib.sha256(','.join(map(str, member_ids)).encode('ascii')).hexdigest()
+    snapshot = RosterSnapshot.objects.filter(digest=digest).first()
+    if snapshot is not None:
+        return snapshot
+
+    with transaction.atomic():
+        snapshot, created = RosterSnapshot.objects.get_or_create(
+            digest=digest, defaults={'member_count': len(member_ids)}
+        )
+        if created:
+            link = RosterSnapshot.members.through
+            link.objects.bulk_create(
+                [link(rostersnapshot_id=snapshot.pk, member_id=member_id) for member_id in member_ids],
+                batch_size=500,
+            )
+    return snapshot
+
+
+def implicit_absent_members(service):
+    """Members absent from a session closed in implicit mode (none for other sessions)"""
+    return Member.objects.filter(roster_snapshots__sessions__service=service).exclude(
+        Exists(Attendance.objects.filter(member=OuterRef('pk'), service=service))
+    )
+
+
+def implicit_absent_services(member):
+    """Implicitly closed sessions the member was expected at and has no record for"""
+    return Service.objects.filter(session_roster__snapshot__members=member).exclude(
+        Exists(Attendance.objects.filter(service=OuterRef('pk'), member=member))
+    )
+
+
+def implicit_absences(service):
+    """
+    Unsaved absent Attendance instances standing in for the rows an implicitly
+    closed session doesn't store, for responses shaped like stored records.
+    """
+    roster = SessionRoster.objects.filter(service=service).first()
+    if roster is None:
+        return []
+    return [
+        Attendance(
+            member=member,
+            service=service,
+            status='absent',
+            marked_by=roster.marked_by,
+            is_auto_marked=roster.marked_by == 'auto',
+            created_at=roster.closed_at,
+        )
+        for member in implicit_absent_members(service)
+    ]
+
+
+def taken_session_ids(service_ids):
+    """
+    Sessions among service_ids whose attendance has been taken: absences were
+    finalized (manually or automatically), or the session was closed in
+    implicit mode. One query.
+    """
+    finalized = (
+        Attendance.objects.filter(service_id__in=service_ids, marked_by__in=['manual', 'auto'])
+        .values_list('service_id', flat=True).order_by()
+    )
+    closed = SessionRoster.objects.filter(service_id__in=service_ids).values_list('service_id', flat=True).order_by()
+    return set(finalized.union(closed))
+
+
+def close_implicit_session(service, marked_by='manual'):
+    """
+    Close a session in implicit mode: store who was expected (no absent rows)
+    and refresh the absent members' metrics in the background. Closing again
+    takes in members registered since.
+
+    Args:
+        service: Service object in implicit mode
+        marked_by: 'manual' (closed by staff) or 'auto' (closed when the service ended)
+
+    Returns:
+        Number of members newly marked absent
+    """
+    if not service.date:
+        return 0
+
+    from .tasks import schedule_members_absenteeism_update
+
+    # Seeded before the session was switched to implicit mode
+    finalized = finalize_roster_rows(service, marked_by=marked_by)
+
+    already_absent = set(implicit_absent_members(service).values_list('id', flat=True))
+    expected_ids = get_expected_members(service).order_by().values_list('id', flat=True)
+    SessionRoster.objects.update_or_create(
+        service=service,
+        defaults={
+            'snapshot': get_or_create_snapshot(expected_ids),
+            'marked_by': marked_by,
+            'closed_at': timezone.now(),
+        },
+    )
+
+    newly_absent = set(implicit_absent_members(service).values_list('id', flat=True)) - already_absent
+    if newly_absent:
+        transaction.on_commit(lambda: schedule_members_absenteeism_update(newly_absent))
+    return finalized + len(newly_absent)
@@ -0,0 +1,323 @@
+"""
+Batch check-in - records scans collected away from the server
+
+Used by POST /attendance/checkin_batch/, which the on-site edge agent
+(attendance/edge_agent.py) pushes its journal to. Each scan is checked with
+the same rules as /attendance/checkin/ and reported back individually, so
+the agent can tell what was recorded from what conflicted:
+
+- 'created':  a new present record
+- 'present':  the member already had a record for the session (a repeat
+              scan, or a scan already pushed by an earlier attempt)
+- 'rejected': unknown member or session, a visitor, a recurring template,
+              or attendance for the session has already been taken
+
+A whole batch costs a fixed number of queries: members, services and
+finalized sessions are loaded once and new records are inserted with one
+bulk INSERT.
+
+insert_attendance() is the insert path for both single and batch check-ins:
+INSERT ... ON CONFLICT (member_id, service_id) DO NOTHING RETURNING, so one
+statement both records new rows and says which ones already existed, and
+concurrent scanners hitting the unique constraint never raise IntegrityError.
+PostgreSQL and SQLite (3.35+) support it; other backends fall back to
+get_or_create per record.
+
+record_presence() puts the pre-seeded attendance mode in front of it: in
+sessions whose roster was seeded with absent rows when they opened, a
+check-in is a single UPDATE of the member's row to present.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from members.models import Member
+from services.models import Service
+
+from .absences import taken_session_ids
+from .models import Attendance
+from .tasks import schedule_members_absenteeism_update
+
+MAX_CHECKIN_BATCH = 500
+
+CREATED = 'created'
+PRESENT = 'present'
+REJECTED = 'rejected'
+
+
+def insert_attendance(records):
+    """
+    Insert attendance records, skipping (member, service) pairs that already
+    have one.
+
+    Args:
+        records: Unsaved Attendance instances
+
+    Returns:
+        set: (member_id, service_id) of the records that were inserted; their
+             instances get their primary keys
+    """
+    if not records:
+        return set()
+    if connection.vendor not in ('postgresql', 'sqlite') or not connection.features.can_return_rows_from_bulk_insert:
+        created = set()
+        for record in records:
+            values = {field.attname: getattr(record, field.attname)
+                      for field in Attendance._meta.concrete_fields
+                      if not field.primary_key and field.attname not in ('member_id', 'service_id')}
+            obj, was_created = Attendance.objects.get_or_create(
+                member_id=record.member_id, service_id=record.service_id, defaults=values
+            )
+            if was_created:
+                record.pk = obj.pk
+                created.add((record.member_id, record.service_id))
+        return created
+
+    opts = Attendance._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(quote(opts.get_field(name).column) for name in ('member', 'service'))
+    by_key = {(record.member_id, record.service_id): record for record in records}
+
+    created = set()
+    batch_size = connection.ops.bulk_batch_size(fields, records) or len(records)
+    with connection.cursor() as cursor:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            params = []
+            for record in batch:
+                params.extend(
+                    field.get_db_prep_save(field.pre_save(record, True), connection) for field in fields
+                )
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({columns}) VALUES {placeholders} "
+                f"ON CONFLICT ({conflict}) DO NOTHING RETURNING {quote(opts.pk.column)}, {conflict}",
+                params,
+            )
+            for pk, member_id, service_id in cursor.fetchall():
+                by_key[(member_id, service_id)].pk = pk
+                created.add((member_id, service_id))
+    return created
+
+
+def _flip_roster_rows(service_id, records):
+    """
+    Check members in to a pre-seeded session: their roster rows become
+    present with one UPDATE ... RETURNING.
+
+    Returns:
+        set: (member_id, service_id) of the rows flipped; their instances get
+             their primary keys and created_at
+    """
+    opts = Attendance._meta
+    quote = connection.ops.quote_name
+
+    def column(name):
+        return quote(opts.get_field(name).column)
+
+    by_member = {record.member_id: record for record in records}
+    now = timezone.now()
+    check_in_field = opts.get_field('check_in_time')
+    created_col = opts.get_field('created_at').get_col(opts.db_table)
+    converters = connection.ops.get_db_converters(created_col)
+
+    cases = []
+    params = []
+    for member_id, record in by_member.items():
+        if record.check_in_time is None:
+            record.check_in_time = now
+        cases.append('WHEN %s THEN %s')
+        params.extend([member_id, check_in_field.get_db_prep_save(record.check_in_time, connection)])
+    params.extend([opts.get_field('updated_at').get_db_prep_save(now, connection), service_id,
+                   Attendance.MARKED_BY_ROSTER, *by_member])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(opts.db_table)} SET {column('status')} = 'present', "
+            f"{column('marked_by')} = 'check_in', "
+            f"{column('check_in_time')} = CASE {column('member')} {' '.join(cases)} END, "
+            f"{column('updated_at')} = %s "
+            f"WHERE {column('service')} = %s AND {column('marked_by')} = %s "
+            f"AND {column('member')} IN ({', '.join(['%s'] * len(by_member))}) "
+            f"RETURNING {quote(opts.pk.column)}, {column('member')}, {column('created_at')}",
+            params,
+        )
+        rows = cursor.fetchall()
+
+    flipped = set()
+    for pk, member_id, created_at in rows:
+        for converter in converters:
+            created_at = converter(created_at, created_col, connection)
+        record = by_member[member_id]
+        record.pk = pk
+        record.status = 'present'
+        record.created_at = created_at
+        flipped.add((member_id, service_id))
+    return flipped
+
+
+def record_presence(records):
+    """
+    Save check-ins. In pre-seeded sessions (Service.attendance_mode) the
+    member's absent roster row is flipped to present with a single-row
+    UPDATE; everything else goes through insert_attendance().
+
+    Args:
+        records: Unsaved present Attendance instances, with service set
+
+    Returns:
+        set: (member_id, service_id) of the members newly checked in
+    """
+    # Sessions in pre-seeded mode, or seeded before their mode was changed
+    seeded = [
+        record for record in records
+        if record.service.attendance_mode == Service.ATTENDANCE_MODE_PRESEEDED
+        or record.service.roster_seeded_at is not None
+    ]
+    checked_in = set()
+    if seeded and connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_rows_from_bulk_insert:
+        by_service = {}
+        for record in seeded:
+            by_service.setdefault(record.service_id, []).append(record)
+        for service_id, service_records in by_service.items():
+            checked_in |= _flip_roster_rows(service_id, service_records)
+    elif seeded:
+        roster = Attendance.objects.filter(marked_by=Attendance.MARKED_BY_ROSTER)
+        for record in seeded:
+            existing = roster.filter(member_id=record.member_id, service_id=record.service_id).first()
+            if existing is not None:
+                existing.status = 'present'
+                existing.marked_by = 'check_in'
+                existing.check_in_time = record.check_in_time or timezone.now()
+                existing.save(update_fields=['status', 'marked_by', 'check_in_time', 'updated_at'])
+                record.pk, record.created_at = existing.pk, existing.created_at
+                checked_in.add((record.member_id, record.service_id))
+
+    remaining = [record for record in records if (record.member_id, record.service_id) not in checked_in]
+    return checked_in | insert_attendance(remaining)
+
+
+def _scanned_at(value):
+    scanned_at = parse_datetime(value) if isinstance(value, str) else None
+    if scanned_at is None:
+        return timezone.now()
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return scanned_at
+
+
+def _rejection(scan, member, service, finalized):
+    if member is None:
+        return f"Member with ID {scan.get('member_id')} not found"
+    if service is None:
+        return f"Service with ID {scan.get('service_id')} not found"
+    if service.is_recurring and service.parent_service_id is None and service.date is None:
+        return f'"{service.name}" is a recurring service template'
+    if member.is_visitor:
+        return f'{member.full_name} is listed as a visitor and is not tracked in attendance.'
+    if service.pk in finalized:
+        return 'Attendance for this service has been taken'
+    return None
+
+
+def record_checkins(scans):
+    """
+    Record a batch of QR scans.
+
+    Args:
+        scans: Dicts with member_id (the member's code), service_id, and
+               optionally scan_id (echoed back) and scanned_at (ISO 8601,
+               stored as the check-in time)
+
+    Returns:
+        dict: results (one per scan, in order: scan_id, status, message,
+              member_name), plus created / present / rejected counts
+    """
+    member_codes = {str(scan.get('member_id', '')) for scan in scans}
+    service_ids = set()
+    for scan in scans:
+        try:
+            service_ids.add(int(scan.get('service_id')))
+        except (TypeError, ValueError):
+            pass
+
+    members = {
+        member.member_id: member
+        for member in Member.objects.filter(member_id__in=member_codes).only(
+            'id', 'member_id', 'full_name', 'is_visitor'
+        )
+    }
+    services = Service.objects.in_bulk(service_ids)
+    finalized = taken_session_ids(service_ids)
+
+    results = []
+    accepted = {}  # (member pk, service pk) -> Attendance to insert
+    for scan in scans:
+        member = members.get(str(scan.get('member_id', '')))
+        try:
+            service = services.get(int(scan.get('service_id')))
+        except (TypeError, ValueError):
+            service = None
+        result = {
+            'scan_id': scan.get('scan_id'),
+            'member_name': member.full_name if member else None,
+        }
+        results.append(result)
+
+        rejection = _rejection(scan, member, service, finalized)
+        if rejection:
+            result.update(status=REJECTED, message=rejection)
+            continue
+
+        key = (member.pk, service.pk)
+        result['key'] = key
+        if key not in accepted:
+            accepted[key] = Attendance(
+                member_id=member.pk,
+                service=service,
+                status='present',
+                marked_by='check_in',
+                check_in_time=_scanned_at(scan.get('scanned_at')),
+            )
+
+    with transaction.atomic():
+        created = record_presence(list(accepted.values()))
+        created_member_pks = {member_pk for member_pk, _ in created}
+        if created_member_pks:
+            # Scans may reach the server well after the service (pushed by the
+            # edge agent once it is back online): date them by their session,
+            # and never move a member's last attendance back
+            attended_on = {}
+            for key in created:
+                attendance = accepted[key]
+                session_date = attendance.service.date or timezone.localdate(attendance.check_in_time)
+                attended_on[key[0]] = max(session_date, attended_on.get(key[0], session_date))
+            by_date = {}
+            for member_pk, session_date in attended_on.items():
+                by_date.setdefault(session_date, []).append(member_pk)
+            for session_date, member_pks in by_date.items():
+                Member.objects.filter(pk__in=member_pks).update(
+                    consecutive_absences=0,
+                    last_attendance_date=Greatest(Coalesce('last_attendance_date', Value(session_date)), Value(session_date)),
+                    updated_at=timezone.now(),
+                )
+            transaction.on_commit(lambda: schedule_members_absenteeism_update(created_member_pks))
+
+    counts = {CREATED: 0, PRESENT: 0, REJECTED: 0}
+    reported = set()
+    for result in results:
+        key = result.pop('key', None)
+        if key is not None:
+            if key in created and key not in reported:
+                result.update(status=CREATED, message=f"{result['member_name']} checked in successfully")
+                reported.add(key)
+            else:
+                result.update(status=PRESENT, message=f"{result['member_name']} is already checked in for this service")
+        counts[result['status']] += 1
+
+    return {'results': results, **counts}
@@ -0,0 +1,466 @@
+"""
+Edge agent - on-site check-in server for when the hosted backend is slow
+
+Runs on a laptop at church, on the same network as the scanners:
+
+    python manage.py run_edge_agent --server https://example.org
+    python attendance/edge_agent.py --server https://example.org   (no Django needed)
+
+Scanners point their API base URL at the agent (http://<laptop>:8765/api)
+and check in exactly as they would against the server. The agent answers
+POST /api/attendance/checkin/ itself and forwards every other request
+(service list, member search, scanner bundle, login) to the server, so the
+scanner page works unchanged. It also:
+
+- keeps a roster of members and sessions in memory, loaded from a local
+  SQLite file and refreshed from /api/sync/ (delta sync), so a check-in is
+  a dictionary lookup and never waits on the network;
+- journals every accepted scan in the same SQLite file before answering,
+  so nothing is lost if the laptop or the connection drops;
+- pushes pending scans to /api/attendance/checkin_batch/ in batches,
+  retrying with exponential backoff while the server is unreachable, and
+  keeps what the server rejected (e.g. attendance already taken) as
+  conflicts, listed by GET /status;
+- keeps the last service list the server returned, and answers
+  GET /api/services/ with it while the server is unreachable, so a scanner
+  reloaded offline can still pick the session.
+
+Only the standard library is used, so the file can be copied to a machine
+without the project installed.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_DB = 'edge_agent.sqlite3'
+PUSH_BATCH_SIZE = 200
+PUSH_INTERVAL = 5  # Seconds between pushes while scans are pending
+SYNC_INTERVAL = 300  # Seconds between roster refreshes
+MAX_BACKOFF = 300
+REQUEST_TIMEOUT = 30
+PROXY_TIMEOUT = 10
+# Request and response headers passed through when forwarding to the server
+PROXY_REQUEST_HEADERS = ('Accept', 'Authorization', 'Content-Type', 'If-None-Match')
+PROXY_RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Cache-Control')
+# GET paths whose last response is kept for when the server is unreachable
+OFFLINE_PATHS = ('/api/services/',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roster (
+    member_id TEXT PRIMARY KEY,
+    pk INTEGER NOT NULL,
+    full_name TEXT NOT NULL,
+    is_visitor INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    date TEXT,
+    is_template INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    member_id TEXT NOT NULL,
+    service_id INTEGER NOT NULL,
+    scanned_at TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (member_id, service_id)
+);
+CREATE INDEX IF NOT EXISTS scans_state_idx ON scans (state);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+STATE_PENDING = 'pending'
+STATE_SYNCED = 'synced'
+STATE_CONFLICT = 'conflict'
+
+
+class EdgeAgent:
+    """Roster, scan journal and server synchronisation"""
+
+    def __init__(self, server, db_path=DEFAULT_DB, token=None, batch_size=PUSH_BATCH_SIZE):
+        self.server = server.rstrip('/')
+        self.token = token
+        self.batch_size = batch_size
+        self.db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.push_wakeup = threading.Event()
+        self.members = {}  # member_id -> (full_name, is_visitor)
+        self.sessions = {}  # id -> (name, is_template)
+        self.checked_in = set()  # (member_id, service_id) already journaled
+        self.last_sync = None
+        self.last_push_error = None
+        self._load()
+
+    # ---------- Local state ----------
+
+    def _load(self):
+        with self.lock:
+            self.members = {
+                member_id: (full_name, bool(is_visitor))
+                for member_id, full_name, is_visitor in self.db.execute(
+                    'SELECT member_id, full_name, is_visitor FROM roster'
+                )
+            }
+            self.sessions = {
+                session_id: (name, bool(is_template))
+                for session_id, name, is_template in self.db.execute('SELECT id, name, is_template FROM sessions')
+            }
+            self.checked_in = set(self.db.execute('SELECT member_id, service_id FROM scans'))
+
+    def _meta(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    # ---------- Check-in (answers scanners) ----------
+
+    def check_in(self, member_id, service_id):
+        """
+        Journal a scan and answer like /api/attendance/checkin/.
+
+        Returns:
+            (int, dict): HTTP status and response body
+        """
+        member = self.members.get(member_id)
+        if member is None:
+            return 404, {'success': False, 'message': f'Member with ID {member_id} not found'}
+        full_name, is_visitor = member
+        session = self.sessions.get(service_id)
+        if session is None:
+            return 404, {'success': False, 'message': f'Service with ID {service_id} not found'}
+        if session[1]:
+            return 400, {
+                'success': False,
+                'message': f'"{session[0]}" is a recurring service template. '
+                           'Please select a specific session/date to check in.',
+            }
+        if is_visitor:
+            return 400, {
+                'success': False,
+                'message': f'{full_name} is listed as a visitor and is not tracked in attendance.',
+            }
+
+        key = (member_id, service_id)
+        with self.lock:
+            if key in self.checked_in:
+                return 200, {
+                    'success': False,
+                    'message': f'{full_name} is already checked in for this service',
+                    'member_name': full_name,
+                    'attendance': None,
+                }
+            self.db.execute(
+                'INSERT OR IGNORE INTO scans (scan_id, member_id, service_id, scanned_at) VALUES (?, ?, ?, ?)',
+                (str(uuid.uuid4()), member_id, service_id, datetime.now(timezone.utc).isoformat()),
+            )
+            self.checked_in.add(key)
+        self.push_wakeup.set()
+        return 201, {
+            'success': True,
+            'message': f'{full_name} checked in successfully',
+            'member_name': full_name,
+            'attendance': None,
+        }
+
+    def forward(self, method, path, headers, body=None):
+        """
+        Pass a scanner request on to the server.
+
+        A GET of one of OFFLINE_PATHS is answered from its last response
+        while the server is unreachable.
+
+        Returns:
+            (int, dict, bytes): HTTP status, response headers and body
+        """
+        offline_key = None
+        if method == 'GET' and urllib.parse.urlsplit(path).path in OFFLINE_PATHS:
+            offline_key = f'response:{path}'
+        request = urllib.request.Request(
+            f'{self.server}{path}',
+            data=body,
+            method=method,
+            headers={name: headers[name] for name in PROXY_REQUEST_HEADERS if headers.get(name)},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=PROXY_TIMEOUT) as response:
+                status_code, response_headers, data = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status_code, response_headers, data = e.code, e.headers, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            cached = self._meta(offline_key) if offline_key else None
+            if cached is None:
+                return 502, {'Content-Type': 'application/json'}, json.dumps(
+                    {'error': f'Server unreachable: {e}'}).encode('utf-8')
+            return 200, {'Content-Type': 'application/json'}, cached.encode('utf-8')
+
+        response_headers = {name: response_headers[name] for name in PROXY_RESPONSE_HEADERS if response_headers.get(name)}
+        if offline_key and status_code == 200:
+            with self.lock:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (offline_key, data.decode('utf-8'))
+                )
+        return status_code, response_headers, data
+
+    def status(self):
+        with self.lock:
+            counts = dict(self.db.execute('SELECT state, COUNT(*) FROM scans GROUP BY state').fetchall())
+            conflicts = [
+                {'member_id': member_id, 'service_id': service_id, 'message': message}
+                for member_id, service_id, message in self.db.execute(
+                    'SELECT member_id, service_id, message FROM scans WHERE state = ? ORDER BY scanned_at',
+                    (STATE_CONFLICT,),
+                )
+            ]
+        return {
+            'server': self.server,
+            'members': len(self.members),
+            'sessions': len(self.sessions),
+            'pending': counts.get(STATE_PENDING, 0),
+            'synced': counts.get(STATE_SYNCED, 0),
+            'conflicts': conflicts,
+            'last_sync': self.last_sync,
+            'last_push_error': self.last_push_error,
+        }
+
+    # ---------- Talking to the server ----------
+
+    def _request(self, path, payload=None):
+        headers = {'Accept': 'application/json'}
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        request = urllib.request.Request(f'{self.server}{path}', data=data, headers=headers)
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def sync_roster(self):
+        """Apply members and sessions changed since the last sync"""
+        since = self._meta('sync_cursor')
+        query = f'?{urllib.parse.urlencode({"since": since})}' if since else ''
+        changes = self._request(f'/api/sync/{query}')
+
+        with self.lock:
+            self.db.execute('BEGIN')
+            try:
+                if changes['full']:
+                    self.db.execute('DELETE FROM roster')
+                    self.db.execute('DELETE FROM sessions')
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO roster (member_id, pk, full_name, is_visitor) VALUES (?, ?, ?, ?)',
+                    [(m['member_id'], m['id'], m['full_name'], int(m['is_visitor'])) for m in changes['members']],
+                )
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO sessions (id, name, date, is_template) VALUES (?, ?, ?, ?)',
+                    [
+                        (s['id'], s['name'], s['date'],
+                         int(bool(s['is_recurring']) and not s['parent_service'] and not s['date']))
+                        for s in changes['services']
+                    ],
+                )
+                self.db.executemany('DELETE FROM roster WHERE pk = ?', [(pk,) for pk in changes['deleted']['members']])
+                self.db.executemany('DELETE FROM sessions WHERE id = ?', [(pk,) for pk in changes['deleted']['services']])
+                self.db.execute(
+                    'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('sync_cursor', changes['cursor'])
+                )
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        self._load()
+        self.last_sync = datetime.now(timezone.utc).isoformat()
+        logger.info('Roster synced: %s members, %s sessions', len(self.members), len(self.sessions))
+
+    def push_pending(self):
+        """
+        Send pending scans to the server in batches.
+
+        Returns:
+            int: Scans the server accepted or rejected (i.e. no longer pending)
+        """
+        done = 0
+        while not self.stop_event.is_set():
+            with self.lock:
+                rows = self.db.execute(
+                    'SELECT scan_id, member_id, service_id, scanned_at FROM scans WHERE state = ? '
+                    'ORDER BY scanned_at LIMIT ?',
+                    (STATE_PENDING, self.batch_size),
+                ).fetchall()
+                if rows:
+                    self.db.execute(
+                        f'UPDATE scans SET attempts = attempts + 1 WHERE scan_id IN ({",".join("?" * len(rows))})',
+                        [row[0] for row in rows],
+                    )
+            if not rows:
+                break
+            scans = [
+                {'scan_id': scan_id, 'member_id': member_id, 'service_id': service_id, 'scanned_at': scanned_at}
+                for scan_id, member_id, service_id, scanned_at in rows
+            ]
+            response = self._request('/api/attendance/checkin_batch/', {'scans': scans})
+
+            updates = []
+            for result in response['results']:
+                state = STATE_CONFLICT if result['status'] == 'rejected' else STATE_SYNCED
+                if state == STATE_CONFLICT:
+                    logger.warning('Scan %s rejected by the server: %s', result['scan_id'], result['message'])
+                updates.append((state, result['message'], result['scan_id']))
+            with self.lock:
+                self.db.executemany('UPDATE scans SET state = ?, message = ? WHERE scan_id = ?', updates)
+            done += len(updates)
+        return done
+
+    # ---------- Background loop ----------
+
+    def run_sync_loop(self, sync_interval=SYNC_INTERVAL, push_interval=PUSH_INTERVAL):
+        """Push scans and refresh the roster until stopped, backing off while the server is unreachable"""
+        backoff = push_interval
+        next_sync = 0
+        while not self.stop_event.is_set():
+            try:
+                if time.monotonic() >= next_sync:
+                    self.sync_roster()
+                    next_sync = time.monotonic() + sync_interval
+                pushed = self.push_pending()
+                if pushed:
+                    logger.info('Pushed %s scans', pushed)
+                self.last_push_error = None
+                backoff = push_interval
+            except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+                self.last_push_error = str(e)
+                logger.warning('Server unreachable (%s); retrying in %ss', e, backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            self.push_wakeup.wait(backoff)
+            self.push_wakeup.clear()
+
+    def stop(self):
+        self.stop_event.set()
+        self.push_wakeup.set()
+
+
+def make_handler(agent):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status_code, body):
+            data = json.dumps(body, default=str).encode('utf-8')
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _forward(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length) if length else None
+            status_code, headers, data = agent.forward(self.command, self.path, self.headers, body)
+            self.send_response(status_code)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Expose-Headers', 'ETag')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match')
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/status':
+                self._send(200, agent.status())
+            else:
+                self._forward()
+
+        do_PUT = do_PATCH = do_DELETE = _forward
+
+        def do_POST(self):
+            if urllib.parse.urlsplit(self.path).path.rstrip('/') != '/api/attendance/checkin':
+                self._forward()
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                member_id = str(body['member_id'])
+                service_id = int(body['service_id'])
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {'error': 'member_id and service_id are required'})
+                return
+            self._send(*agent.check_in(member_id, service_id))
+
+        def log_message(self, format, *args):
+            logger.debug('%s - %s', self.address_string(), format % args)
+
+    return Handler
+
+
+def serve(agent, host='0.0.0.0', port=DEFAULT_PORT, sync_interval=SYNC_INTERVAL):
+    """Serve scanners on the LAN while syncing with the server in the background"""
+    worker = threading.Thread(target=agent.run_sync_loop, kwargs={'sync_interval': sync_interval}, daemon=True)
+    worker.start()
+    httpd = ThreadingHTTPServer((host, port), make_handler(agent))
+    logger.info('Edge agent listening on %s:%s (server %s)', host, port, agent.server)
+    try:
+        httpd.serve_forever()
+    finally:
+        agent.stop()
+        httpd.server_close()
+        worker.join(timeout=REQUEST_TIMEOUT)
+
+
+def add_arguments(parser):
+    parser.add_argument('--server', required=True, help='Base URL of the central server, e.g. https://example.org')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Local journal file (default: {DEFAULT_DB})')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on (default: all interfaces)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--token', default=None, help='Bearer token for the central server, if required')
+    parser.add_argument('--sync-interval', type=int, default=SYNC_INTERVAL,
+                        help=f'Seconds between roster refreshes (default: {SYNC_INTERVAL})')
+    parser.add_argument('--once', action='store_true',
+                        help='Sync the roster and push pending scans once, then exit')
+
+
+def run(options):
+    agent = EdgeAgent(options['server'], db_path=options['db'], token=options['token'])
+    if options['once']:
+        agent.sync_roster()
+        pushed = agent.push_pending()
+        return agent, pushed
+    serve(agent, host=options['host'], port=options['port'], sync_interval=options['sync_interval'])
+    return agent, None
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description='On-site check-in agent')
+    add_arguments(parser)
+    agent, pushed = run(vars(parser.parse_args()))
+    if pushed is not None:
+        print(json.dumps(agent.status(), indent=2, default=str))
@@ -1,5 +1,8 @@
+from datetime import date
+
 from django.core.management.base import BaseCommand
 from members.models import Member
+from attendance.absences import implicit_absent_services
 from attendance.models import Attendance
 
 
@@ -42,15 +45,26 @@ class Command(BaseCommand):
 
     def recalculate_member(self, member):
         """Calculate consecutive absences from attendance records and update member"""
-        # Get all attendance records for this member, ordered by service date (descending)
+        # Stored records (roster rows of pre-seeded sessions still open aren't
+        # absences yet) plus absences of sessions closed in implicit mode,
+        # which have no row; most recent service first
         attendances = Attendance.objects.filter(
             member_id=member.id
-        ).select_related('service').order_by('-service__date', '-created_at')
+        ).exclude(marked_by=Attendance.MARKED_BY_ROSTER).select_related('service')
+        history = [
+            (attendance.service.date, attendance.created_at, attendance.status)
+            for attendance in attendances
+        ]
+        history.extend(
+            (service.date, service.session_roster.closed_at, 'absent')
+            for service in implicit_absent_services(member).select_related('session_roster')
+        )
+        history.sort(key=lambda entry: (entry[0] or date.min, entry[1]), reverse=True)
         
         # Calculate consecutive absences from most recent services
         consecutive = 0
-        for attendance in attendances:
-            if attendance.status == 'absent':
+        for _, _, attendance_status in history:
+            if attendance_status == 'absent':
                 consecutive += 1
             else:
                 break
@@ -0,0 +1,26 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from attendance import edge_agent
+
+
+class Command(BaseCommand):
+    help = ('Run the on-site check-in agent: serves check-ins to scanners on the local network '
+            'from a synced roster, journals scans in a local SQLite file and pushes them to the '
+            'central server in batches. Equivalent to running attendance/edge_agent.py directly.')
+
+    def add_arguments(self, parser):
+        edge_agent.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+        agent, pushed = edge_agent.run(options)
+        if pushed is not None:
+            status = agent.status()
+            self.stdout.write(self.style.SUCCESS(
+                f"Roster: {status['members']} members, {status['sessions']} sessions. "
+                f"Pushed {pushed} scans; {status['pending']} pending."))
+            for conflict in status['conflicts']:
+                self.stdout.write(self.style.WARNING(
+                    f"  {conflict['member_id']} (service {conflict['service_id']}): {conflict['message']}"))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_marked_by'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='marked_by',
+            field=models.CharField(choices=[('check_in', 'QR Code Check-In'), ('manual', 'Manual Entry'), ('auto', 'Automatic (end of service)'), ('roster', 'Pre-seeded roster (absent until checked in)')], default='manual', help_text='Source of attendance marking: QR check-in, manual entry, or automatic at service end', max_length=20),
+        ),
+    ]
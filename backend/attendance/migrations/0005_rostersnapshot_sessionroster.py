@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_alter_attendance_marked_by'),
+        ('members', '0001_initial'),
+        ('services', '0007_alter_service_attendance_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('members', models.ManyToManyField(related_name='roster_snapshots', to='members.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked_by', models.CharField(choices=[('manual', 'Manual Entry'), ('auto', 'Automatic (end of service)')], default='manual', max_length=20)),
+                ('closed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='session_roster', to='services.service')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='attendance.rostersnapshot')),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from members.models import Member
 from services.models import Service
 
@@ -11,10 +12,12 @@ class Attendance(models.Model):
         ('absent', 'Absent'),
     ]
     
+    MARKED_BY_ROSTER = 'roster'
     MARKED_BY_CHOICES = [
         ('check_in', 'QR Code Check-In'),
         ('manual', 'Manual Entry'),
         ('auto', 'Automatic (end of service)'),
+        (MARKED_BY_ROSTER, 'Pre-seeded roster (absent until checked in)'),
     ]
     
     id = models.AutoField(primary_key=True)
@@ -35,3 +38,38 @@ class Attendance(models.Model):
     
     def __str__(self):
         return f"{self.member.full_name} - {self.service.name} ({self.status})"
+
+
+class RosterSnapshot(models.Model):
+    """
+    A set of expected members, stored once and shared by every session closed
+    in implicit-absence mode with exactly that set (see attendance/absences.py).
+    """
+    
+    digest = models.CharField(max_length=64, unique=True)  # sha256 of the sorted member pks
+    member_count = models.PositiveIntegerField(default=0)
+    members = models.ManyToManyField(Member, related_name='roster_snapshots')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Roster of {self.member_count} members ({self.digest[:12]})"
+
+
+class SessionRoster(models.Model):
+    """
+    Closing record of a session in implicit-absence mode: who was expected.
+    Absent = members in the snapshot with no Attendance row for the session.
+    """
+    
+    MARKED_BY_CHOICES = [
+        ('manual', 'Manual Entry'),
+        ('auto', 'Automatic (end of service)'),
+    ]
+    
+    service = models.OneToOneField(Service, on_delete=models.CASCADE, related_name='session_roster')
+    snapshot = models.ForeignKey(RosterSnapshot, on_delete=models.PROTECT, related_name='sessions')
+    marked_by = models.CharField(max_length=20, choices=MARKED_BY_CHOICES, default='manual')
+    closed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.service.name} roster ({self.snapshot.member_count} expected)"
@@ -0,0 +1,213 @@
+"""
+Scanner bundle - what a scanner needs to validate QR codes while offline
+
+GET /attendance/scanner_bundle/ returns a small versioned document:
+- members: a Bloom filter of every non-visitor member_id. A code that is
+  not in the filter is certainly unknown (or a visitor) and is rejected on
+  the scanner without a request; a code that is in it is almost certainly
+  valid (false-positive rate FALSE_POSITIVE_RATE) and is sent to the server.
+- sessions: the sessions open for check-in (dated today or tomorrow, and
+  attendance not yet taken).
+
+The response carries the bundle version as its ETag, so scanners poll with
+If-None-Match and get a 304 until something changes. The version identifies
+the member set and sessions; filters built by different processes for the
+same version may differ bit for bit but accept the same member IDs.
+
+The filter is kept per process and updated incrementally: each request
+reads a cheap fingerprint of the member table (non-visitor count, newest
+updated_at, newest member deletion). When it moved, members changed since
+the filter was built are added to it; only deletions and visitor changes
+(which a Bloom filter can't remove) or outgrowing its capacity rebuild it.
+
+Hashing (mirrored in the frontend's services/scannerBundle.js): two 32-bit
+FNV-1a hashes of the UTF-8 member_id with different offset bases, combined
+as index_i = (h1 + i * h2) mod bits for i in 0..hashes-1.
+"""
+
+import base64
+import hashlib
+import json
+import math
+import threading
+from datetime import timedelta
+
+from django.db.models import Count, Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from members.models import Member, SyncTombstone
+from services.models import Service
+
+from .models import Attendance
+
+FALSE_POSITIVE_RATE = 0.001
+# Room for members added after a rebuild before the false-positive rate degrades
+CAPACITY_HEADROOM = 1.25
+MIN_CAPACITY = 256
+# Rows saved by transactions still in flight may carry an older updated_at
+CHANGE_OVERLAP = timedelta(seconds=30)
+
+FNV_PRIME = 0x01000193
+FNV_OFFSET = 0x811C9DC5
+FNV_OFFSET_2 = 0x5BD1E995
+
+
+def _fnv1a(data, offset):
+    value = offset
+    for byte in data:
+        value = ((value ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, bits, hashes, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        """Optimal size and hash count for capacity items at the given error rate"""
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    def _indexes(self, value):
+        data = value.encode('utf-8')
+        h1 = _fnv1a(data, FNV_OFFSET)
+        h2 = _fnv1a(data, FNV_OFFSET_2) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, value):
+        for index in self._indexes(value):
+            self.data[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, value):
+        return all(self.data[index >> 3] & (1 << (index & 7)) for index in self._indexes(value))
+
+    def copy(self):
+        return BloomFilter(self.bits, self.hashes, self.data)
+
+    def as_dict(self):
+        return {
+            'bits': self.bits,
+            'hashes': self.hashes,
+            'data': base64.b64encode(bytes(self.data)).decode('ascii'),
+        }
+
+
+class _MemberFilterState:
+    """The process-wide member filter and the table state it reflects"""
+
+    def __init__(self, bloom, capacity, fingerprint, watermark):
+        self.bloom = bloom
+        self.capacity = capacity
+        self.fingerprint = fingerprint
+        self.watermark = watermark  # Newest member updated_at included
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def _member_fingerprint():
+    stats = Member.objects.aggregate(
+        count=Count('id', filter=Q(is_visitor=False)),
+        updated=Max('updated_at'),
+    )
+    last_deleted = (
+        SyncTombstone.objects.filter(kind=SyncTombstone.KIND_MEMBER)
+        .aggregate(last=Max('deleted_at'))['last']
+    )
+    return (stats['count'], stats['updated'], last_deleted)
+
+
+def _build_member_filter(fingerprint):
+    member_ids = list(Member.objects.filter(is_visitor=False).values_list('member_id', flat=True))
+    capacity = max(MIN_CAPACITY, math.ceil(len(member_ids) * CAPACITY_HEADROOM))
+    bloom = BloomFilter.for_capacity(capacity)
+    for member_id in member_ids:
+        bloom.add(member_id)
+    return _MemberFilterState(bloom, capacity, fingerprint, fingerprint[1])
+
+
+def _update_member_filter(state, fingerprint):
+    """Add members changed since the state was built, or None if it has to be rebuilt"""
+    count, updated, last_deleted = fingerprint
+    if last_deleted != state.fingerprint[2] or count > state.capacity or state.watermark is None:
+        return None
+    changed = Member.objects.filter(updated_at__gte=state.watermark - CHANGE_OVERLAP)
+    if changed.filter(is_visitor=True).exists():
+        # Possibly a member who became a visitor; their ID can't be removed
+        return None
+    bloom = state.bloom.copy()
+    for member_id in changed.values_list('member_id', flat=True):
+        bloom.add(member_id)
+    return _MemberFilterState(bloom, state.capacity, fingerprint, updated)
+
+
+def get_member_filter():
+    """
+    Bloom filter of non-visitor member IDs, current with the database.
+
+    Returns:
+        (BloomFilter, tuple): The filter and the member fingerprint it reflects
+    """
+    global _state
+    fingerprint = _member_fingerprint()
+    with _state_lock:
+        state = _state
+        if state is None or state.fingerprint != fingerprint:
+            state = (state and _update_member_filter(state, fingerprint)) or _build_member_filter(fingerprint)
+            _state = state
+    return state.bloom, state.fingerprint
+
+
+def reset_member_filter():
+    global _state
+    with _state_lock:
+        _state = None
+
+
+def open_sessions(today=None):
+    """Sessions scanners may check members in to: dated today or tomorrow, attendance not taken"""
+    today = today or timezone.localdate()
+    finalized = Attendance.objects.filter(service=OuterRef('pk'), marked_by__in=['manual', 'auto'])
+    sessions = (
+        Service.objects.filter(date__gte=today, date__lte=today + timedelta(days=1))
+        .exclude(Exists(finalized))
+        .filter(session_roster__isnull=True)
+        .order_by('date', 'start_time', 'id')
+    )
+    return [
+        {
+            'id': session.id,
+            'name': session.name,
+            'date': session.date.isoformat(),
+            'start_time': session.start_time.isoformat(),
+            'end_time': session.end_time.isoformat() if session.end_time else None,
+        }
+        for session in sessions
+    ]
+
+
+def build_scanner_bundle():
+    """
+    The scanner bundle and its version.
+
+    Returns:
+        dict: version, member_count, members (Bloom filter) and sessions
+    """
+    bloom, fingerprint = get_member_filter()
+    sessions = open_sessions()
+    key = json.dumps([fingerprint[0], str(fingerprint[1]), str(fingerprint[2]), sessions], sort_keys=True)
+    return {
+        'version': hashlib.sha256(key.encode('utf-8')).hexdigest()[:16],
+        'member_count': fingerprint[0],
+        'false_positive_rate': FALSE_POSITIVE_RATE,
+        'members': bloom.as_dict(),
+        'sessions': sessions,
+    }
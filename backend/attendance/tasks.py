@@ -26,6 +26,24 @@ def schedule_member_absenteeism_update(member_id):
     thread.start()
 
 
+def schedule_members_absenteeism_update(member_ids):
+    """
+    Like schedule_member_absenteeism_update, for a batch of check-ins: one
+    background thread works through the members in turn.
+    """
+    thread = Thread(
+        target=_update_members_absenteeism_alerts,
+        args=(list(member_ids),),
+        daemon=True,
+    )
+    thread.start()
+
+
+def _update_members_absenteeism_alerts(member_ids):
+    for member_id in member_ids:
+        _update_member_absenteeism_alerts(member_id)
+
+
 def _update_member_absenteeism_alerts(member_id):
     try:
         close_old_connections()
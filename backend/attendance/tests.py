@@ -1,3 +1,156 @@
+import base64
+import datetime
+import io
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from members.models import Member
+from members.utils import calculate_absenteeism_metric
+from services.models import Service
+
+from .checkin_service import insert_attendance
+from .models import Attendance, RosterSnapshot, SessionRoster
+from .scanner_bundle import BloomFilter, reset_member_filter
+
+SESSION_DATE = datetime.date(2026, 10, 18)
+
+
+def bundle_filter(bundle):
+    members = bundle['members']
+    return BloomFilter(members['bits'], members['hashes'], base64.b64decode(members['data']))
+
+
+class ScannerBundleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = [Member.objects.create(full_name=f"Scanner {index}") for index in range(20)]
+        cls.visitor = Member.objects.create(full_name="Scanner Visitor", is_visitor=True)
+        cls.session = Service.objects.create(name="Today", date=timezone.localdate(), start_time=datetime.time(9, 0))
+
+    def setUp(self):
+        reset_member_filter()
+
+    def test_bundle_filters_member_ids_and_revalidates_with_etag(self):
+        client = APIClient()
+        response = client.get('/api/attendance/scanner_bundle/')
+        self.assertEqual(response.status_code, 200)
+        bloom = bundle_filter(response.data)
+        self.assertTrue(all(member.member_id in bloom for member in self.members))
+        self.assertNotIn(self.visitor.member_id, bloom)
+        self.assertEqual([s['id'] for s in response.data['sessions']], [self.session.id])
+
+        self.assertEqual(client.get('/api/attendance/scanner_bundle/',
+                                    HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # A new member is added to the existing filter and changes the version
+        added = Member.objects.create(full_name="Scanner Added")
+        response = client.get('/api/attendance/scanner_bundle/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(added.member_id, bundle_filter(response.data))
+        self.assertEqual(response.data['member_count'], 21)
+
+
+class CheckinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Member.objects.create(full_name="Checkin Member")
+        cls.earlier = Member.objects.create(full_name="Earlier Member")
+        cls.service = Service.objects.create(name="Checkin Service", date=SESSION_DATE, start_time=datetime.time(9, 0))
+        Attendance.objects.create(member=cls.earlier, service=cls.service, status='present', marked_by='check_in')
+
+    def test_batch_reports_created_present_and_rejected_scans(self):
+        visitor = Member.objects.create(full_name="Batch Visitor", is_visitor=True)
+        scans = [
+            {'scan_id': 'a', 'member_id': self.member.member_id, 'service_id': self.service.id,
+             'scanned_at': '2026-10-18T09:05:00Z'},
+            {'scan_id': 'b', 'member_id': self.member.member_id, 'service_id': self.service.id},
+            {'scan_id': 'c', 'member_id': self.earlier.member_id, 'service_id': self.service.id},
+            {'scan_id': 'd', 'member_id': visitor.member_id, 'service_id': self.service.id},
+            {'scan_id': 'e', 'member_id': 'WIS-0000-0000', 'service_id': self.service.id},
+        ]
+        # members, services, finalized sessions, then one INSERT ... RETURNING
+        # and one UPDATE inside a savepoint
+        with self.assertNumQueries(7):
+            response = APIClient().post('/api/attendance/checkin_batch/', {'scans': scans}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['created', 'present', 'present', 'rejected', 'rejected'])
+        self.assertEqual((response.data['created'], response.data['present'], response.data['rejected']), (1, 2, 2))
+
+        record = Attendance.objects.get(member=self.member, service=self.service)
+        self.assertEqual(record.check_in_time, datetime.datetime(2026, 10, 18, 9, 5, tzinfo=datetime.timezone.utc))
+        # Dated by the session, not by when the batch reached the server
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.last_attendance_date, SESSION_DATE)
+
+        # A late scan for an older session doesn't move the date back
+        older = Service.objects.create(name="Older Service", date=datetime.date(2026, 10, 11),
+                                       start_time=datetime.time(9, 0))
+        APIClient().post('/api/attendance/checkin_batch/', {'scans': [
+            {'scan_id': 'f', 'member_id': self.member.member_id, 'service_id': older.id}]}, format='json')
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.last_attendance_date, SESSION_DATE)
+
+    def test_insert_reports_created_and_existing_in_one_statement(self):
+        records = [Attendance(member=member, service=self.service, status='present', marked_by='check_in')
+                   for member in (self.earlier, self.member)]
+        with self.assertNumQueries(1):
+            created = insert_attendance(records)
+        self.assertEqual(created, {(self.member.pk, self.service.pk)})
+        self.assertEqual(records[1].pk, Attendance.objects.get(member=self.member, service=self.service).pk)
+        self.assertIsNone(records[0].pk)
+        self.assertEqual(Attendance.objects.filter(service=self.service).count(), 2)
+
+    def test_repeat_checkin_reports_already_checked_in(self):
+        client = APIClient()
+        payload = {'member_id': self.member.member_id, 'service_id': self.service.id}
+        first = client.post('/api/attendance/checkin/', payload, format='json')
+        second = client.post('/api/attendance/checkin/', payload, format='json')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertFalse(second.data['success'])
+        self.assertEqual(first.data['attendance']['id'], second.data['attendance']['id'])
+
+
+class ImplicitAbsenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.here = Member.objects.create(full_name="Implicit Here")
+        cls.away = Member.objects.create(full_name="Implicit Away")
+        cls.sessions = [
+            Service.objects.create(name="Implicit Service", date=datetime.date(2026, 10, day),
+                                   start_time=datetime.time(9, 0), end_time=datetime.time(11, 0),
+                                   attendance_mode=Service.ATTENDANCE_MODE_IMPLICIT)
+            for day in (11, 18)
+        ]
+
+    def test_close_stores_roster_and_derives_absences(self):
+        client = APIClient()
+        for session in self.sessions:
+            client.post('/api/attendance/checkin/', {'member_id': self.here.member_id, 'service_id': session.id},
+                        format='json')
+            response = client.post('/api/attendance/mark_absent/', {'service_id': session.id}, format='json')
+            self.assertEqual(response.data['message'], 'Marked 1 members as absent')
+
+        self.assertFalse(Attendance.objects.filter(status='absent').exists())
+        self.assertEqual(RosterSnapshot.objects.count(), 1)
+        self.assertEqual(SessionRoster.objects.count(), 2)
+
+        report = client.get('/api/attendance/by_service/', {'service_id': self.sessions[1].id}).data
+        self.assertEqual((report['total_present'], report['total_absent']), (1, 1))
+        self.assertEqual({row['status'] for row in report['attendances']}, {'present', 'absent'})
+
+        metric = calculate_absenteeism_metric(self.away)
+        self.assertEqual((metric['total_services'], metric['absent_count']), (2, 2))
+        self.assertEqual(calculate_absenteeism_metric(self.here)['present_count'], 2)
+
+        late = client.post('/api/attendance/checkin/',
+                           {'member_id': self.away.member_id, 'service_id': self.sessions[1].id}, format='json')
+        self.assertEqual(late.status_code, 400)
 
-# Create your tests here.
+        call_command('recalculate_consecutive_absences', stdout=io.StringIO())
+        self.away.refresh_from_db()
+        self.assertEqual(self.away.consecutive_absences, 2)
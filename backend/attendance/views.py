@@ -3,13 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 import logging
-from .models import Attendance
+from church_config.pagination import CreatedAtCursorPagination
+from .absences import close_implicit_session, implicit_absences, implicit_absent_members, taken_session_ids
+from .checkin_service import MAX_CHECKIN_BATCH, record_checkins, record_presence
+from .models import Attendance, SessionRoster
 from .serializers import AttendanceSerializer, AttendanceCheckInSerializer
 from .tasks import schedule_member_absenteeism_update
 from services.models import Service
+from services.utils import close_preseeded_session, finalize_roster_rows, get_expected_members
 from members.models import Member
 
 logger = logging.getLogger(__name__)
@@ -37,18 +42,23 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     - GET /attendance/ - List all attendance records
     - GET /attendance/?member=<id> - Filter by member ID
     - GET /attendance/?service=<id> - Filter by service ID
+    - GET /attendance/?page_size=<n> - Cursor-paginated, newest first; follow `next`
     - POST /attendance/ - Create attendance record
     - GET /attendance/{id}/ - Get attendance details
     - POST /attendance/checkin/ - Check-in member via QR code
+    - POST /attendance/checkin_batch/ - Record scans pushed by an edge agent
     - GET /attendance/by-service/{service_id}/ - Get attendance for a service
+    - GET /attendance/scanner_bundle/ - Offline QR validation bundle (ETag)
     """
     
     queryset = Attendance.objects.all().select_related('member', 'service', 'service__parent_service').order_by('-created_at')
     serializer_class = AttendanceSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['member', 'service', 'status']
-    ordering_fields = ['created_at', 'member', 'service']
-    ordering = ['-created_at']
+    pagination_class = CreatedAtCursorPagination
+    # The ordering is the cursor key, so only stable columns are allowed
+    ordering_fields = ['created_at', 'id']
+    ordering = ['-created_at', '-id']
     
     @action(detail=False, methods=['post'])
     def checkin(self, request):
@@ -89,37 +99,32 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             
             # Check if attendance for this service has already been marked (manually or automatically)
             # This prevents check-ins after attendance marking has been finalized
-            manual_attendance_exists = Attendance.objects.filter(
-                service=service,
-                marked_by__in=['manual', 'auto']
-            ).exists()
-            
-            if manual_attendance_exists:
+            if taken_session_ids([service.pk]):
                 return Response({
                     'success': False,
                     'message': 'Attendance for this service has been taken',
                     'attendance': None
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Check if already checked in
-            attendance, created = Attendance.objects.get_or_create(
-                member=member,
-                service=service,
-                defaults={
-                    'status': 'present',
-                    'marked_by': 'check_in',
-                }
-            )
+            # Record the check-in; one INSERT ... ON CONFLICT DO NOTHING (or, in
+            # a pre-seeded session, one UPDATE of the member's roster row) also
+            # tells us whether the member was already checked in, without
+            # racing other scanners on the unique constraint
+            attendance = Attendance(member=member, service=service, status='present', marked_by='check_in')
+            created = bool(record_presence([attendance]))
+            if not created:
+                attendance = Attendance.objects.select_related('member').get(member=member, service=service)
             
             if created:
                 # Reset consecutive absences on successful check-in
                 member.consecutive_absences = 0
                 member.last_attendance_date = timezone.now().date()
-                member.save(update_fields=['consecutive_absences', 'last_attendance_date'])
+                member.save(update_fields=['consecutive_absences', 'last_attendance_date', 'updated_at'])
                 
                 # Update heavier absenteeism metrics and alerts off the request path
-                # so QR check-in responses stay fast at the door.
-                schedule_member_absenteeism_update(member.id)
+                # so QR check-in responses stay fast at the door (once committed).
+                member_pk = member.id
+                transaction.on_commit(lambda: schedule_member_absenteeism_update(member_pk))
                 
                 return Response({
                     'success': True,
@@ -146,6 +151,54 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 'message': f'Service with ID {service_id} not found'
             }, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['post'])
+    def checkin_batch(self, request):
+        """
+        Record scans collected by an on-site edge agent
+        
+        Request body:
+        {
+            "scans": [
+                {"scan_id": "...", "member_id": "WIS-2026-0001", "service_id": 1,
+                 "scanned_at": "2026-10-18T09:05:00Z"}
+            ]
+        }
+        
+        Each scan is reported back as created, present (already recorded)
+        or rejected with the reason (see checkin_service.py).
+        """
+        scans = request.data.get('scans')
+        if not isinstance(scans, list) or not all(isinstance(scan, dict) for scan in scans):
+            return Response({'error': 'scans must be a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > MAX_CHECKIN_BATCH:
+            return Response(
+                {'error': f'At most {MAX_CHECKIN_BATCH} scans per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(record_checkins(scans), status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def scanner_bundle(self, request):
+        """
+        Offline validation bundle for scanners: a Bloom filter of non-visitor
+        member IDs and the sessions open for check-in (see scanner_bundle.py).
+        
+        Poll with If-None-Match; the response is 304 until the bundle changes.
+        """
+        from .scanner_bundle import build_scanner_bundle
+        
+        bundle = build_scanner_bundle()
+        etag = f'"{bundle["version"]}"'
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(bundle, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+    
     @action(detail=False, methods=['get'])
     def by_service(self, request):
         """
@@ -170,11 +223,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             attendances = Attendance.objects.filter(service=service).select_related('member', 'service', 'service__parent_service')
-            serializer = AttendanceSerializer(attendances, many=True)
+            # Absences of a session closed in implicit mode aren't stored; list them alike
+            derived_absences = implicit_absences(service)
+            serializer = AttendanceSerializer(
+                [*attendances, *derived_absences], many=True, context={'request': request}
+            )
             
             # Calculate statistics
             total_present = attendances.filter(status='present').count()
-            total_absent = attendances.filter(status='absent').count()
+            total_absent = attendances.filter(status='absent').count() + len(derived_absences)
             total_late = attendances.filter(status='late').count()
             
             # Calculate sex-based statistics for present members
@@ -195,9 +252,10 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             classes = Member.objects.filter(
                 attendances__service=service
             ).values('class_name').distinct()
+            derived_classes = [absence.member.class_name for absence in derived_absences]
+            class_names = {class_obj['class_name'] for class_obj in classes} | set(derived_classes)
             
-            for class_obj in classes:
-                class_name = class_obj['class_name']
+            for class_name in class_names:
                 if class_name:
                     class_present = attendances.filter(
                         member__class_name=class_name,
@@ -206,7 +264,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                     class_absent = attendances.filter(
                         member__class_name=class_name,
                         status='absent'
-                    ).count()
+                    ).count() + derived_classes.count(class_name)
                     class_stats[class_name] = {
                         'present': class_present,
                         'absent': class_absent,
@@ -269,8 +327,39 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 marked_by='check_in'
             ).count()
             
-            # Get all members who are NOT visitors (optimize with only id field)
-            all_member_ids = set(Member.objects.filter(is_visitor=False).values_list('id', flat=True))
+            if service.attendance_mode == Service.ATTENDANCE_MODE_IMPLICIT:
+                # Only who was expected is stored; absences are derived from it
+                absent_count = close_implicit_session(service, marked_by='manual')
+                marked_members = list(
+                    implicit_absent_members(service).order_by('full_name').values_list('full_name', flat=True)[:20]
+                )
+                return Response({
+                    'success': True,
+                    'message': f'Marked {absent_count} members as absent',
+                    'marked_members': marked_members if absent_count <= 20 else marked_members + [f'... and {absent_count - 20} more'],
+                    'checkin_count': checkin_count
+                }, status=status.HTTP_200_OK)
+            
+            if service.attendance_mode == Service.ATTENDANCE_MODE_PRESEEDED:
+                # Absent rows were seeded when the session opened; finalize the
+                # ones nobody checked in on instead of diffing the member list
+                absent_count = close_preseeded_session(service, marked_by='manual')
+                marked_members = list(
+                    Attendance.objects.filter(service=service, status='absent', marked_by='manual')
+                    .values_list('member__full_name', flat=True)[:20]
+                )
+                return Response({
+                    'success': True,
+                    'message': f'Marked {absent_count} members as absent',
+                    'marked_members': marked_members if absent_count <= 20 else marked_members + [f'... and {absent_count - 20} more'],
+                    'checkin_count': checkin_count
+                }, status=status.HTTP_200_OK)
+            
+            # Roster rows seeded before the session was switched to standard mode
+            finalized_count = finalize_roster_rows(service, marked_by='manual')
+            
+            # Get the non-visitor members expected at this service (optimize with only id field)
+            all_member_ids = set(get_expected_members(service).values_list('id', flat=True))
             
             # Get members already marked for this service
             already_marked = set(
@@ -281,7 +370,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             members_to_mark_ids = all_member_ids - already_marked
             
             # Create attendance records for members not yet marked
-            absent_count = len(members_to_mark_ids)
+            absent_count = len(members_to_mark_ids) + finalized_count
             new_attendances = []
             
             # Fetch member names only for those to be marked (batch this)
@@ -368,10 +457,16 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             
             # Get all attendance records for this service
             attendances = Attendance.objects.filter(service=service)
-            deleted_count = attendances.count()
+            deleted_count = attendances.count() + implicit_absent_members(service).count()
             
-            # Delete all attendance records
+            # Delete all attendance records (and an implicit-mode close)
             attendances.delete()
+            SessionRoster.objects.filter(service=service).delete()
+            
+            # A pre-seeded session is seeded again when it (re)opens
+            if service.roster_seeded_at is not None:
+                service.roster_seeded_at = None
+                service.save(update_fields=['roster_seeded_at', 'updated_at'])
             
             return Response({
                 'success': True,
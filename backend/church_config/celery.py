@@ -26,6 +26,31 @@ app.conf.beat_schedule = {
         'schedule': crontab(minute='*/5'),  # Every 5 minutes
         'options': {'queue': 'default'}
     },
+    'seed-session-rosters': {
+        'task': 'services.tasks.seed_started_session_rosters',
+        'schedule': crontab(minute='*'),  # Every minute
+        'options': {'queue': 'default'}
+    },
+    'generate-pending-qr-codes': {
+        'task': 'members.tasks.generate_pending_qr_codes_async',
+        'schedule': crontab(minute='*/10'),  # Every 10 minutes
+        'options': {'queue': 'default'}
+    },
+    'dispatch-email-outbox': {
+        'task': 'members.tasks.dispatch_email_outbox_async',
+        'schedule': crontab(minute='*'),  # Every minute
+        'options': {'queue': 'default'}
+    },
+    'resume-message-jobs': {
+        'task': 'members.tasks.resume_message_jobs_async',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+        'options': {'queue': 'default'}
+    },
+    'prune-sync-tombstones': {
+        'task': 'members.tasks.prune_sync_tombstones_async',
+        'schedule': crontab(minute=0, hour=3),  # Daily at 03:00
+        'options': {'queue': 'default'}
+    },
 }
 
 @app.task(bind=True)
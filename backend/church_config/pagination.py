@@ -0,0 +1,42 @@
+"""
+Pagination classes shared by the API
+
+Lists that only grow (attendance records, alerts, contact logs) use keyset
+(cursor) pagination: each page continues from the last row of the previous
+one instead of counting and skipping OFFSET rows, so deep pages cost the same
+as the first and rows inserted while a client pages through don't shift or
+duplicate results. The response is {next, previous, results}; clients follow
+`next` and never build page numbers.
+
+Every paginated list accepts ?page_size=, capped at max_page_size.
+"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class StandardPagination(PageNumberPagination):
+    """Default page-number pagination with a client-selectable page size"""
+
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest first, keyed on (created_at, id).
+
+    Views that also use OrderingFilter should set
+    ordering = ['-created_at', '-id'] and only allow these fields in
+    ordering_fields, since the filter's ordering is used as the cursor key.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class ContactDateCursorPagination(CreatedAtCursorPagination):
+    """Contact logs have no created_at; contact_date is set when they are created"""
+
+    ordering = ('-contact_date', '-id')
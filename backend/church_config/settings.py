@@ -202,7 +202,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'church_config.pagination.StandardPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
@@ -253,8 +253,12 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',  # Scanner bundle revalidation
 ]
 
+# Let cross-origin clients read the scanner bundle's ETag (sent back as If-None-Match)
+CORS_EXPOSE_HEADERS = ['etag']
+
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -265,6 +269,8 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@church.com')
+# Used by django.core.mail.backends.filebased.EmailBackend (local testing)
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
 # Sender used for error emails and other system notifications
 SERVER_EMAIL = os.getenv('SERVER_EMAIL', DEFAULT_FROM_EMAIL)
 
@@ -285,6 +291,39 @@ if EMAIL_USE_TLS and EMAIL_USE_SSL:
 
 # Church Configuration
 CHURCH_NAME = os.getenv('CHURCH_NAME', 'Our Church')
+
+# QR code generation (runs in a background batch, not inside Member.save())
+QR_GENERATION_WORKERS = int(os.getenv('QR_GENERATION_WORKERS', 4))
+# 'compact' (1-bit PNG, one pixel per module, smallest QR version) or 'standard'
+QR_RENDER_MODE = os.getenv('QR_RENDER_MODE', 'compact')
+# Email outbox delivery (see members.email_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600))
+# Bulk QR email campaigns: max emails per minute (0 = no limit)
+EMAIL_CAMPAIGN_RATE_PER_MINUTE = int(os.getenv('EMAIL_CAMPAIGN_RATE_PER_MINUTE', 0))
+# WhatsApp delivery (see members.whatsapp_dispatcher)
+WHATSAPP_PROVIDER = os.getenv('WHATSAPP_PROVIDER', 'twilio')  # 'twilio' or 'stub' (offline)
+WHATSAPP_MEDIA_STORAGE = os.getenv('WHATSAPP_MEDIA_STORAGE', 'supabase')  # 'supabase' or 'local'
+WHATSAPP_DISPATCH_WORKERS = int(os.getenv('WHATSAPP_DISPATCH_WORKERS', 8))
+WHATSAPP_RATE_PER_SECOND = float(os.getenv('WHATSAPP_RATE_PER_SECOND', 10))  # 0 = no limit
+WHATSAPP_MAX_ATTEMPTS = int(os.getenv('WHATSAPP_MAX_ATTEMPTS', 3))
+WHATSAPP_RETRY_BASE_SECONDS = float(os.getenv('WHATSAPP_RETRY_BASE_SECONDS', 1))
+WHATSAPP_STUB_LATENCY_MS = int(os.getenv('WHATSAPP_STUB_LATENCY_MS', 0))
+WHATSAPP_STUB_FAILURE_RATE = float(os.getenv('WHATSAPP_STUB_FAILURE_RATE', 0))
+# Public origin of this backend, used for absolute media URLs from local storage
+PUBLIC_BASE_URL = os.getenv('PUBLIC_BASE_URL', '')
+# Worker processes for batch card rendering (default: CPU count; 1 renders inline)
+CARD_RENDER_WORKERS = int(os.getenv('CARD_RENDER_WORKERS', 0)) or None
+# Seconds the aggregated care dashboard is cached (see members.care_dashboard_service)
+CARE_DASHBOARD_CACHE_SECONDS = int(os.getenv('CARE_DASHBOARD_CACHE_SECONDS', 30))
+# Days deletions are kept for /api/sync/; older cursors get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+# Run bulk messaging jobs on Celery (default: when CELERY_BROKER_URL is set) instead of a web process thread
+MESSAGE_JOBS_USE_CELERY = os.getenv('MESSAGE_JOBS_USE_CELERY', str(bool(os.getenv('CELERY_BROKER_URL')))).lower() in ('1', 'true', 'yes')
+# Seconds without progress after which a message job is resumed (members.tasks.resume_message_jobs_async)
+MESSAGE_JOB_STALE_SECONDS = int(os.getenv('MESSAGE_JOB_STALE_SECONDS', 15 * 60))
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -19,7 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import register_user, login_user
+from .views import register_user, login_user, sync_changes
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,4 +30,5 @@ urlpatterns = [
     path('api/members/', include('members.urls')),
     path('api/services/', include('services.urls')),
     path('api/attendance/', include('attendance.urls')),
+    path('api/sync/', sync_changes, name='sync'),
 ]
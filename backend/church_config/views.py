@@ -211,4 +211,27 @@ def login_user(request):
             'access': access_token,
             'refresh': refresh_token,
         }
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def sync_changes(request):
+    """
+    Delta sync of members and services for clients that keep a local copy.
+
+    Query parameters:
+    - since: cursor returned by the previous sync (omit for a full sync)
+
+    Returns the changed members and services, the ids deleted since the
+    cursor and a new cursor; 'full' is true when the client should replace
+    its copy (see members.sync_service).
+    """
+    from members.sync_service import build_sync
+
+    try:
+        payload = build_sync(since=request.query_params.get('since') or None, request=request)
+    except (ValueError, OverflowError, OSError):
+        return Response(
+            {'error': 'Invalid sync cursor'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(payload, status=status.HTTP_200_OK)
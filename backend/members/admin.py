@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Member, MemberAlert, ContactLog
+from .models import Member, MemberAlert, ContactLog, EmailOutbox, MessageJob, CardUpload
 
 
 @admin.register(Member)
@@ -7,13 +7,13 @@ class MemberAdmin(admin.ModelAdmin):
     list_display = ('member_id', 'full_name', 'email', 'attendance_status', 'consecutive_absences', 'engagement_score', 'created_at')
     list_filter = ('department', 'attendance_status', 'created_at')
     search_fields = ('member_id', 'full_name', 'email', 'phone')
-    readonly_fields = ('member_id', 'qr_code_image', 'qr_code_data', 'created_at', 'updated_at', 'consecutive_absences', 'last_attendance_date', 'engagement_score')
+    readonly_fields = ('member_id', 'qr_code_image', 'qr_code_hash', 'qr_status', 'created_at', 'updated_at', 'consecutive_absences', 'last_attendance_date', 'engagement_score')
     fieldsets = (
         ('Member Information', {
             'fields': ('member_id', 'full_name', 'phone', 'email', 'department', 'group', 'is_visitor')
         }),
         ('QR Code', {
-            'fields': ('qr_code_image','qr_code_data',)
+            'fields': ('qr_status', 'qr_code_image', 'qr_code_hash',)
         }),
         ('Attendance & Engagement', {
             'fields': ('consecutive_absences', 'last_attendance_date', 'attendance_status', 'engagement_score', 'last_contact_date', 'pastoral_notes')
@@ -62,3 +62,27 @@ class ContactLogAdmin(admin.ModelAdmin):
             'fields': ('follow_up_needed', 'follow_up_date')
         }),
     )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('to_email', 'member__full_name', 'member__member_id')
+    readonly_fields = ('created_at', 'updated_at', 'sent_at', 'last_error')
+
+
+@admin.register(MessageJob)
+class MessageJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'channel', 'status', 'total', 'processed', 'sent', 'failed', 'created_at', 'finished_at')
+    list_filter = ('channel', 'status', 'created_at')
+    readonly_fields = ('member_ids', 'done_ids', 'errors', 'last_error', 'created_at', 'started_at', 'progress_at',
+                       'finished_at')
+
+
+@admin.register(CardUpload)
+class CardUploadAdmin(admin.ModelAdmin):
+    list_display = ('member', 'storage', 'content_hash', 'uploaded_at')
+    list_filter = ('storage',)
+    search_fields = ('member__full_name', 'member__member_id')
+    readonly_fields = ('uploaded_at',)
@@ -1,4 +1,12 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def ensure_member_search_index(sender, using='default', **kwargs):
+    """Re-create the member search index after migrate (SQLite table rebuilds drop its triggers)"""
+    from .search_service import ensure_search_index
+    ensure_search_index(connections[using])
 
 
 class MembersConfig(AppConfig):
@@ -8,3 +16,4 @@ class MembersConfig(AppConfig):
     def ready(self):
         """Import signals when app is ready"""
         import members.models  # This triggers the signal registration
+        post_migrate.connect(ensure_member_search_index, sender=self)
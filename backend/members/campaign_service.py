@@ -0,0 +1,298 @@
+"""
+Bulk messaging campaigns - QR code emails (or WhatsApp cards) to many members at once
+
+A campaign is recorded as a MessageJob and runs in the background:
+pending QR codes are generated in one batch, membership cards are rendered
+ahead of the sender on the card worker pool (card_batch_service), and the
+emails go out over one persistent SMTP connection with an optional rate
+limit. WhatsApp campaigns are sent by whatsapp_dispatcher. The job's
+counters are updated as it runs so clients can poll them.
+
+Jobs run on a Celery worker when one is configured (settings
+MESSAGE_JOBS_USE_CELERY), otherwise on a thread of the web process.
+Either can die mid-campaign; resume_stale_message_jobs() puts jobs that
+stopped making progress back in the queue, and a resumed job skips the
+recipients it had already recorded (done_ids), so at most the last few
+sends before the interruption are repeated. A running job writes its
+progress at least every JOB_HEARTBEAT_SECONDS, and each run claims the job
+under its own runner token: a runner whose job was requeued and claimed
+again stops at its next progress write instead of sending alongside the
+new one.
+"""
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Member, MessageJob
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_FILTERS = ('all', 'with_email', 'with_phone', 'recent')
+
+# Only the first errors are kept on the job, so the row stays small
+MAX_JOB_ERRORS = 100
+# Progress is written to the job every this many members
+PROGRESS_UPDATE_EVERY = 10
+# A running job writes progress at least this often, even between results
+JOB_HEARTBEAT_SECONDS = 60
+# A queued or running job with no progress for this long is resumed
+MESSAGE_JOB_STALE_SECONDS = 15 * 60
+# Pending QR codes are generated in chunks of this many members before sending
+QR_GENERATION_CHUNK = 100
+
+
+class CampaignError(Exception):
+    """Raised when a campaign can't be created (bad filter, no recipients)"""
+
+
+class JobLost(Exception):
+    """Raised when a running job was requeued and claimed by another runner"""
+
+
+def select_campaign_members(member_ids=None, filter_type=None, channel=MessageJob.CHANNEL_EMAIL):
+    """
+    Recipients of a campaign: explicit member_ids, or one of CAMPAIGN_FILTERS.
+
+    Visitors are never included. 'recent' means members created in the last
+    30 days that can be reached on the channel.
+
+    Raises:
+        CampaignError: If the filter is unknown
+    """
+    members = Member.objects.filter(is_visitor=False)
+    if member_ids:
+        return members.filter(id__in=member_ids)
+
+    filter_type = filter_type or ('with_phone' if channel == MessageJob.CHANNEL_WHATSAPP else 'with_email')
+    if filter_type not in CAMPAIGN_FILTERS:
+        raise CampaignError(f'Unknown filter: {filter_type}')
+
+    if filter_type == 'with_email' or (filter_type == 'recent' and channel == MessageJob.CHANNEL_EMAIL):
+        members = members.filter(email__isnull=False).exclude(email='')
+    elif filter_type == 'with_phone' or filter_type == 'recent':
+        members = members.filter(phone__isnull=False).exclude(phone='')
+
+    if filter_type == 'recent':
+        members = members.filter(created_at__gte=timezone.now() - timedelta(days=30))
+    return members
+
+
+def create_message_job(channel, members, options=None):
+    """
+    Record a new campaign for the given members.
+
+    options (e.g. rate_per_minute) are stored on the job and passed to its
+    runner, including when the job is resumed.
+
+    Raises:
+        CampaignError: If there are no recipients
+    """
+    member_ids = list(members.order_by('id').values_list('id', flat=True))
+    if not member_ids:
+        raise CampaignError('No members match the given filters')
+    return MessageJob.objects.create(
+        channel=channel, member_ids=member_ids, total=len(member_ids), options=options or {}
+    )
+
+
+class JobProgress:
+    """Counts results for a MessageJob and writes them back periodically"""
+
+    def __init__(self, job):
+        self.job = job
+        self.saved_at = time.monotonic()
+
+    def success(self, member):
+        self.job.processed += 1
+        self.job.sent += 1
+        self.job.done_ids.append(member.pk)
+        self._maybe_save()
+
+    def failure(self, member, error):
+        self.job.processed += 1
+        self.job.failed += 1
+        self.job.done_ids.append(member.pk)
+        if len(self.job.errors) < MAX_JOB_ERRORS:
+            self.job.errors.append({'member_id': member.member_id, 'error': str(error)})
+        self._maybe_save()
+
+    def _maybe_save(self):
+        if self.job.processed % PROGRESS_UPDATE_EVERY == 0:
+            self.save()
+        else:
+            self.heartbeat()
+
+    def heartbeat(self):
+        """Write progress if none was written for JOB_HEARTBEAT_SECONDS"""
+        if time.monotonic() - self.saved_at >= JOB_HEARTBEAT_SECONDS:
+            self.save()
+
+    def save(self):
+        """
+        Raises:
+            JobLost: If another runner has claimed the job since
+        """
+        updated = MessageJob.objects.filter(
+            pk=self.job.pk, status=MessageJob.STATUS_RUNNING, runner=self.job.runner
+        ).update(
+            processed=self.job.processed,
+            sent=self.job.sent,
+            failed=self.job.failed,
+            errors=self.job.errors,
+            done_ids=self.job.done_ids,
+            progress_at=timezone.now(),
+        )
+        self.saved_at = time.monotonic()
+        if not updated:
+            raise JobLost(f'Message job {self.job.pk} was claimed by another runner')
+
+
+def run_email_campaign(job, rate_per_minute=None):
+    """
+    Send the QR code email to every member of a campaign.
+
+    Args:
+        job: MessageJob with channel 'email'
+        rate_per_minute: Max emails per minute (default: settings.EMAIL_CAMPAIGN_RATE_PER_MINUTE,
+                         0 for no limit)
+    """
+    from .card_batch_service import iter_cards
+    from .email_outbox import send_over_connection
+    from .email_service import build_qr_code_email
+    from .qr_code_generator import generate_qr_codes
+
+    if rate_per_minute is None:
+        rate_per_minute = getattr(settings, 'EMAIL_CAMPAIGN_RATE_PER_MINUTE', 0)
+    progress = JobProgress(job)
+
+    members = job.remaining_members().order_by('member_id')
+
+    # Render pending QR codes in batches instead of one at a time while sending
+    member_ids = list(members.values_list('pk', flat=True))
+    for start in range(0, len(member_ids), QR_GENERATION_CHUNK):
+        generate_qr_codes(member_ids=member_ids[start:start + QR_GENERATION_CHUNK])
+        progress.heartbeat()
+    by_member_id = {member.member_id: member for member in members}
+    recipients = {}
+
+    def messages():
+        # iter_cards renders cards ahead on the worker pool and caches them,
+        # so building each email only reads the cached card
+        for member_id, _ in iter_cards(members):
+            member = by_member_id[member_id]
+            try:
+                message = build_qr_code_email(member)
+                if message is None:
+                    raise ValueError('Member is a visitor or has no email address')
+            except Exception as e:
+                progress.failure(member, e)
+                continue
+            recipients[id(message)] = member
+            yield message
+
+    for message, error in send_over_connection(messages(), rate_per_minute=rate_per_minute):
+        member = recipients.pop(id(message))
+        if error is None:
+            progress.success(member)
+        else:
+            logger.warning(f"Error sending QR code email to {member.email}: {str(error)}")
+            progress.failure(member, error)
+
+    progress.save()
+
+
+def run_whatsapp_campaign(job, **options):
+    from .whatsapp_dispatcher import run_whatsapp_campaign as run
+    return run(job, **options)
+
+
+CAMPAIGN_RUNNERS = {
+    MessageJob.CHANNEL_EMAIL: run_email_campaign,
+    MessageJob.CHANNEL_WHATSAPP: run_whatsapp_campaign,
+}
+
+
+def run_message_job(job_id, **options):
+    """
+    Run a queued MessageJob to completion, recording its final status.
+
+    Args:
+        options: Override the options stored on the job
+
+    Returns:
+        MessageJob: The finished job
+    """
+    # Claim the job atomically so it's never run twice (thread and Celery worker);
+    # the token tells this run's writes apart from those of a later claim
+    now = timezone.now()
+    runner = uuid.uuid4().hex
+    claimed = MessageJob.objects.filter(pk=job_id, status=MessageJob.STATUS_QUEUED).update(
+        status=MessageJob.STATUS_RUNNING, started_at=now, progress_at=now, runner=runner
+    )
+    job = MessageJob.objects.get(pk=job_id)
+    if not claimed:
+        logger.info(f"Message job {job_id} already {job.status}, skipping")
+        return job
+
+    try:
+        CAMPAIGN_RUNNERS[job.channel](job, **{**job.options, **options})
+        job.status = MessageJob.STATUS_COMPLETED
+    except JobLost as e:
+        logger.warning(f"Message job {job_id}: {str(e)}, stopping")
+        return MessageJob.objects.get(pk=job_id)
+    except Exception as e:
+        logger.error(f"Message job {job_id} failed: {str(e)}", exc_info=True)
+        job.status = MessageJob.STATUS_FAILED
+        job.last_error = str(e)
+
+    job.finished_at = timezone.now()
+    finished = MessageJob.objects.filter(pk=job_id, runner=runner).update(
+        status=job.status,
+        last_error=job.last_error,
+        finished_at=job.finished_at,
+        processed=job.processed,
+        sent=job.sent,
+        failed=job.failed,
+        errors=job.errors,
+        done_ids=job.done_ids,
+    )
+    if not finished:
+        logger.warning(f"Message job {job_id} was claimed by another runner, result not recorded")
+        return MessageJob.objects.get(pk=job_id)
+    logger.info(f"Message job {job_id} finished: {job.sent} sent, {job.failed} failed")
+    return job
+
+
+def resume_stale_message_jobs(stale_seconds=None):
+    """
+    Queue again the jobs whose runner went away: running jobs that haven't
+    written progress for stale_seconds, and queued jobs never picked up.
+
+    Args:
+        stale_seconds: Default settings.MESSAGE_JOB_STALE_SECONDS
+
+    Returns:
+        list: IDs of the queued jobs to run
+    """
+    if stale_seconds is None:
+        stale_seconds = getattr(settings, 'MESSAGE_JOB_STALE_SECONDS', MESSAGE_JOB_STALE_SECONDS)
+    stale_before = timezone.now() - timedelta(seconds=stale_seconds)
+
+    requeued = MessageJob.objects.filter(
+        status=MessageJob.STATUS_RUNNING, progress_at__lt=stale_before
+    ).update(status=MessageJob.STATUS_QUEUED)
+    if requeued:
+        logger.warning(f"Requeued {requeued} message jobs that stopped making progress")
+
+    return list(
+        MessageJob.objects.filter(status=MessageJob.STATUS_QUEUED)
+        .filter(Q(progress_at__lt=stale_before) | Q(progress_at__isnull=True, created_at__lt=stale_before))
+        .order_by('created_at')
+        .values_list('pk', flat=True)
+    )
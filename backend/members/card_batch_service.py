@@ -0,0 +1,245 @@
+"""
+Batch rendering of membership cards for printing
+
+Renders the cards for a filtered set of members on a process pool (card
+rendering is CPU bound, so threads don't help) and packages them as:
+- 'pdf':    A4 sheets with four cards each, in one PDF
+- 'sheets': the same A4 sheets as PNG files in a ZIP
+- 'zip':    one PNG per member in a ZIP
+
+Cards already in the card cache are reused. PDFs are written to a file in
+one pass, a page at a time, and ZIPs are produced as a stream, so memory
+use doesn't grow with the number of members.
+
+Worker processes are started with the 'spawn' method: the pool is created
+from web server workers and background threads, and a forked child would
+inherit their database connections and locks.
+"""
+
+import logging
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, PdfParser
+
+from .models import Member
+from .qr_card_generator import (
+    CARD_CACHE_TIMEOUT, CARD_HEIGHT, CARD_WIDTH, card_cache_key, card_fields, render_card_png
+)
+
+logger = logging.getLogger(__name__)
+
+CARD_BATCH_FORMATS = ('pdf', 'sheets', 'zip')
+
+# A4 at 200 DPI fits a 2 x 2 grid of 600x900 cards at their native size
+SHEET_DPI = 200
+SHEET_WIDTH = 1654
+SHEET_HEIGHT = 2339
+SHEET_COLUMNS = 2
+SHEET_ROWS = 2
+CARDS_PER_SHEET = SHEET_COLUMNS * SHEET_ROWS
+
+# Below this many uncached cards, starting worker processes costs more than it saves
+MIN_CARDS_FOR_POOL = 16
+RENDER_CHUNK_SIZE = 64
+
+
+def select_card_members(department=None, class_name=None, include_visitors=False):
+    """
+    Members whose cards should be rendered, in member_id order.
+
+    Args:
+        department: Only members of this department (default: all)
+        class_name: Only members of this class (default: all)
+        include_visitors: Also render cards for visitors
+    """
+    members = Member.objects.all()
+    if department:
+        members = members.filter(department=department)
+    if class_name:
+        members = members.filter(class_name=class_name)
+    if not include_visitors:
+        members = members.filter(is_visitor=False)
+    return members.order_by('member_id').only('full_name', 'member_id', 'department', 'class_name')
+
+
+def iter_cards(members, workers=None):
+    """
+    Yield (member_id, png_bytes) for each member, in order.
+
+    Cards are processed in chunks: cached cards are returned as they are,
+    the rest are rendered on a process pool and added to the cache.
+    """
+    workers = workers or getattr(settings, 'CARD_RENDER_WORKERS', None) or os.cpu_count() or 1
+    pool = None
+    try:
+        chunk = []
+        for member in members.iterator(chunk_size=RENDER_CHUNK_SIZE):
+            chunk.append(card_fields(member))
+            if len(chunk) >= RENDER_CHUNK_SIZE:
+                pool = pool or _start_pool(workers, len(chunk))
+                yield from _render_chunk(chunk, pool)
+                chunk = []
+        if chunk:
+            if pool is None and len(chunk) >= MIN_CARDS_FOR_POOL:
+                pool = _start_pool(workers, len(chunk))
+            yield from _render_chunk(chunk, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _start_pool(workers, count):
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=min(workers, count),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+def _render_chunk(chunk, pool):
+    keys = [card_cache_key(fields) for fields in chunk]
+    cached = cache.get_many(keys)
+
+    missing = [fields for fields, key in zip(chunk, keys) if key not in cached]
+    if missing:
+        if pool is not None:
+            rendered = list(pool.map(render_card_png, missing))
+        else:
+            rendered = [render_card_png(fields) for fields in missing]
+        new_cards = {card_cache_key(fields): card for fields, card in zip(missing, rendered)}
+        cache.set_many(new_cards, CARD_CACHE_TIMEOUT)
+        cached.update(new_cards)
+
+    for fields, key in zip(chunk, keys):
+        yield fields['member_id'], cached[key]
+
+
+def _iter_sheets(cards):
+    """Yield A4 sheet images with CARDS_PER_SHEET cards each"""
+    margin_x = (SHEET_WIDTH - SHEET_COLUMNS * CARD_WIDTH) // (SHEET_COLUMNS + 1)
+    margin_y = (SHEET_HEIGHT - SHEET_ROWS * CARD_HEIGHT) // (SHEET_ROWS + 1)
+
+    sheet = None
+    position = 0
+    for _, card_png in cards:
+        if sheet is None:
+            sheet = Image.new('RGB', (SHEET_WIDTH, SHEET_HEIGHT), color='white')
+            position = 0
+        column, row = position % SHEET_COLUMNS, position // SHEET_COLUMNS
+        x = margin_x + column * (CARD_WIDTH + margin_x)
+        y = margin_y + row * (CARD_HEIGHT + margin_y)
+        with Image.open(BytesIO(card_png)) as card:
+            sheet.paste(card, (x, y))
+        position += 1
+        if position == CARDS_PER_SHEET:
+            yield sheet
+            sheet = None
+    if sheet is not None:
+        yield sheet
+
+
+def write_cards_pdf(members, path, workers=None):
+    """
+    Write A4 card sheets to a PDF file in one pass.
+
+    Each sheet is JPEG-encoded and written as soon as it is complete; the
+    page tree goes at the end, once the number of pages is known. (PIL's
+    save_all needs every page decoded in memory at once, and append=True
+    re-reads the whole file for each page.)
+
+    Returns:
+        int: Number of pages written (0 if there were no members)
+    """
+    page_width = SHEET_WIDTH * 72.0 / SHEET_DPI
+    page_height = SHEET_HEIGHT * 72.0 / SHEET_DPI
+    page_contents = b'q %f 0 0 %f 0 0 cm /image Do Q\n' % (page_width, page_height)
+
+    with open(path, 'w+b') as pdf_file:
+        pdf = PdfParser.PdfParser(f=pdf_file)
+        pdf.start_writing()
+        pdf.write_header()
+        pages_ref = pdf.next_object_id(0)
+        for sheet in _iter_sheets(iter_cards(members, workers=workers)):
+            image_data = BytesIO()
+            sheet.save(image_data, format='JPEG')
+            image_ref = pdf.write_obj(
+                None,
+                stream=image_data.getvalue(),
+                Type=PdfParser.PdfName('XObject'),
+                Subtype=PdfParser.PdfName('Image'),
+                Width=SHEET_WIDTH,
+                Height=SHEET_HEIGHT,
+                Filter=PdfParser.PdfName('DCTDecode'),
+                BitsPerComponent=8,
+                ColorSpace=PdfParser.PdfName('DeviceRGB'),
+            )
+            contents_ref = pdf.write_obj(None, stream=page_contents)
+            pdf.pages.append(pdf.write_obj(
+                None,
+                Type=PdfParser.PdfName('Page'),
+                Parent=pages_ref,
+                Resources=PdfParser.PdfDict(
+                    ProcSet=[PdfParser.PdfName('PDF'), PdfParser.PdfName('ImageC')],
+                    XObject=PdfParser.PdfDict(image=image_ref),
+                ),
+                MediaBox=[0, 0, page_width, page_height],
+                Contents=contents_ref,
+            ))
+        if not pdf.pages:
+            return 0
+        pdf.write_obj(pages_ref, Type=PdfParser.PdfName('Pages'), Count=len(pdf.pages), Kids=pdf.pages)
+        root_ref = pdf.write_obj(None, Type=PdfParser.PdfName('Catalog'), Pages=pages_ref)
+        pdf.write_xref_and_trailer(root_ref)
+    return len(pdf.pages)
+
+
+class _ZipStream:
+    """Write-only file object that collects what zipfile writes so it can be yielded"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_cards_zip(members, sheets=False, workers=None):
+    """
+    Stream a ZIP of card PNGs (one per member, or A4 sheets with sheets=True).
+
+    Yields:
+        bytes: Chunks of the ZIP file
+    """
+    stream = _ZipStream()
+    cards = iter_cards(members, workers=workers)
+    # PNGs are already compressed, so entries are stored as they are
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        if sheets:
+            for number, sheet in enumerate(_iter_sheets(cards), start=1):
+                img_io = BytesIO()
+                sheet.save(img_io, format='PNG', dpi=(SHEET_DPI, SHEET_DPI))
+                archive.writestr(f'card_sheet_{number:04d}.png', img_io.getvalue())
+                yield stream.pop()
+        else:
+            for member_id, card_png in cards:
+                archive.writestr(f'membership_card_{member_id}.png', card_png)
+                yield stream.pop()
+    yield stream.pop()
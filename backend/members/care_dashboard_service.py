@@ -0,0 +1,151 @@
+"""
+Care dashboard - everything the pastoral care dashboard shows, in one payload
+
+build_care_dashboard() replaces paging through the member, metric and alert
+lists from the client. It runs a fixed number of queries whatever the size
+of the congregation:
+1. member counts per absenteeism band (one aggregate over members + metrics)
+2. unresolved absenteeism alert counts per level
+3. the top-N members by absenteeism ratio, with their metrics joined
+4. their latest unresolved absenteeism alerts (prefetch)
+5. pending follow-ups (contact logs due a follow-up), with members joined
+
+The result is cached for CARE_DASHBOARD_CACHE_SECONDS. Resolving an alert
+or logging a contact (views) and updating a member's metric and alerts
+(utils.update_absenteeism_alerts, used by check-ins, auto-marking and the
+recalculate_* functions) call invalidate_care_dashboard().
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+
+from .models import ContactLog, Member, MemberAbsenteeismAlert
+
+# Absenteeism bands (same thresholds as utils.get_alert_level_for_ratio)
+CRITICAL_RATIO = 0.60
+AT_RISK_RATIO = 0.40
+EARLY_WARNING_RATIO = 0.25
+
+CARE_DASHBOARD_DEFAULT_LIMIT = 50
+CARE_DASHBOARD_MAX_LIMIT = 500
+
+_VERSION_KEY = 'care_dashboard:version'
+
+
+def _cache_key(limit):
+    # Bumping the version invalidates every cached limit at once
+    version = cache.get_or_set(_VERSION_KEY, 1, None)
+    return f'care_dashboard:{version}:{limit}'
+
+
+def invalidate_care_dashboard():
+    """Drop cached dashboards (call after alerts, contacts or metrics change)"""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 1, None)
+
+
+def _band_counts():
+    ratio = 'absenteeism_metric__absenteeism_ratio'
+    return Member.objects.filter(is_visitor=False).aggregate(
+        total=Count('id'),
+        critical=Count('id', filter=Q(**{f'{ratio}__gte': CRITICAL_RATIO})),
+        at_risk=Count('id', filter=Q(**{f'{ratio}__gte': AT_RISK_RATIO, f'{ratio}__lt': CRITICAL_RATIO})),
+        early_warning=Count('id', filter=Q(**{f'{ratio}__gte': EARLY_WARNING_RATIO, f'{ratio}__lt': AT_RISK_RATIO})),
+        # Members without a metric haven't missed anything yet
+        active=Count('id', filter=Q(**{f'{ratio}__lt': EARLY_WARNING_RATIO}) | Q(**{f'{ratio}__isnull': True})),
+    )
+
+
+def _alert_counts():
+    counts = {'critical': 0, 'at_risk': 0, 'early_warning': 0}
+    rows = (
+        MemberAbsenteeismAlert.objects.filter(is_resolved=False)
+        .values('alert_level')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['alert_level']] = row['count']
+    return counts
+
+
+def _member_row(member):
+    metric = member.absenteeism_metric
+    alert = member.unresolved_absenteeism_alerts[0] if member.unresolved_absenteeism_alerts else None
+    return {
+        'id': member.id,
+        'member_id': member.member_id,
+        'full_name': member.full_name,
+        'department': member.department,
+        'class_name': member.class_name,
+        'last_attendance_date': member.last_attendance_date,
+        'metric': {
+            'absenteeism_ratio': metric.absenteeism_ratio,
+            'absenteeism_percentage': round(metric.absenteeism_ratio * 100, 1),
+            'absent_count': metric.absent_count,
+            'present_count': metric.present_count,
+            'total_services': metric.total_services,
+        },
+        'alert': {
+            'id': alert.id,
+            'alert_level': alert.alert_level,
+            'reason': alert.reason,
+        } if alert else None,
+    }
+
+
+def _at_risk_members(limit):
+    members = (
+        Member.objects.filter(is_visitor=False, absenteeism_metric__isnull=False)
+        .select_related('absenteeism_metric')
+        .prefetch_related(Prefetch(
+            'absenteeism_alerts',
+            queryset=MemberAbsenteeismAlert.objects.filter(is_resolved=False),
+            to_attr='unresolved_absenteeism_alerts',
+        ))
+        .order_by('-absenteeism_metric__absenteeism_ratio', 'full_name')[:limit]
+    )
+    return [_member_row(member) for member in members]
+
+
+def _pending_follow_ups(limit):
+    from .serializers import ContactLogSerializer
+
+    # Same set as /contact-logs/pending_followup/
+    follow_ups = (
+        ContactLog.objects.filter(follow_up_needed=True, follow_up_date__isnull=False)
+        .select_related('member')
+        .order_by('follow_up_date')[:limit]
+    )
+    return list(ContactLogSerializer(follow_ups, many=True).data)
+
+
+def build_care_dashboard(limit=CARE_DASHBOARD_DEFAULT_LIMIT, use_cache=True):
+    """
+    Counts, top at-risk members and pending follow-ups for the care dashboard.
+
+    Args:
+        limit: Number of at-risk members (and follow-ups) to return
+        use_cache: Serve (and store) the cached result
+
+    Returns:
+        dict: counts, alert_counts, at_risk_members, follow_ups
+    """
+    limit = max(1, min(limit, CARE_DASHBOARD_MAX_LIMIT))
+    key = _cache_key(limit)
+    if use_cache:
+        dashboard = cache.get(key)
+        if dashboard is not None:
+            return dashboard
+
+    dashboard = {
+        'counts': _band_counts(),
+        'alert_counts': _alert_counts(),
+        'at_risk_members': _at_risk_members(limit),
+        'follow_ups': _pending_follow_ups(limit),
+    }
+    cache.set(key, dashboard, getattr(settings, 'CARE_DASHBOARD_CACHE_SECONDS', 30))
+    return dashboard
@@ -0,0 +1,228 @@
+"""
+Email outbox - queued, batched delivery of member emails
+
+Emails are queued as EmailOutbox rows in the same transaction as the change
+that triggers them, and delivered later by dispatch_email_outbox(): messages
+are claimed in batches, built, and sent over a single reused connection
+(get_connection() / send_messages()). Failed messages are retried with
+exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached.
+
+The delivery backend is Django's EMAIL_BACKEND, so the console or file
+backend (EMAIL_FILE_PATH) can be used locally and locmem in tests.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Messages stuck in 'sending' this long (e.g. the worker died mid-batch) are retried
+SENDING_TIMEOUT = timedelta(minutes=10)
+
+
+def _message_builders():
+    from .email_service import build_qr_code_email
+
+    return {
+        EmailOutbox.KIND_QR_CODE: build_qr_code_email,
+    }
+
+
+def queue_qr_code_email(member):
+    """
+    Queue the QR code email for a member.
+
+    Call inside the transaction that creates/updates the member.
+
+    Returns:
+        EmailOutbox row, or None for visitors and members without an email
+    """
+    if member.is_visitor or not member.email:
+        return None
+    return EmailOutbox.objects.create(
+        member=member,
+        kind=EmailOutbox.KIND_QR_CODE,
+        to_email=member.email,
+    )
+
+
+def queue_qr_code_emails(members):
+    """Queue QR code emails for many members with one insert"""
+    rows = [
+        EmailOutbox(member=member, kind=EmailOutbox.KIND_QR_CODE, to_email=member.email)
+        for member in members
+        if member.email and not member.is_visitor
+    ]
+    return EmailOutbox.objects.bulk_create(rows)
+
+
+def send_over_connection(messages, rate_per_minute=None):
+    """
+    Send messages one by one over a single reused connection.
+
+    Args:
+        messages: Iterable of EmailMessage objects
+        rate_per_minute: Optional cap on messages sent per minute
+
+    Yields:
+        (message, error): error is None if the message was sent
+    """
+    min_interval = 60.0 / rate_per_minute if rate_per_minute else 0
+    connection = get_connection(fail_silently=False)
+    connected = True
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not connect to the mail server: {str(e)}")
+        connected = False
+        connect_error = e
+
+    last_sent = None
+    try:
+        for message in messages:
+            if not connected:
+                yield message, connect_error
+                continue
+
+            if min_interval and last_sent is not None:
+                wait = min_interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+            last_sent = time.monotonic()
+
+            try:
+                connection.send_messages([message])
+                yield message, None
+            except Exception as e:
+                yield message, e
+                # The connection may be unusable after an SMTP error; start a fresh one
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception:
+                    pass
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at the max delay"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+    maximum = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), maximum))
+
+
+def _claim_due_messages(member_ids=None, limit=None):
+    """Mark a batch of due messages as 'sending' so no other dispatcher picks them up"""
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(
+        Q(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now) |
+        Q(status=EmailOutbox.STATUS_SENDING, updated_at__lt=now - SENDING_TIMEOUT)
+    )
+    if member_ids is not None:
+        due = due.filter(member_id__in=member_ids)
+
+    with transaction.atomic():
+        # skip_locked lets concurrent dispatchers take different batches
+        # (ignored on backends without row locks, e.g. SQLite)
+        rows = list(
+            due.select_for_update(skip_locked=True)
+            .select_related('member')
+            .order_by('next_attempt_at', 'id')[:limit or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                status=EmailOutbox.STATUS_SENDING, updated_at=now
+            )
+    return rows
+
+
+def _record_failure(row, error, now):
+    row.attempts += 1
+    row.last_error = str(error)[:2000]
+    if row.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        row.status = EmailOutbox.STATUS_FAILED
+    else:
+        row.status = EmailOutbox.STATUS_PENDING
+        row.next_attempt_at = now + retry_delay(row.attempts)
+
+
+def dispatch_email_outbox(member_ids=None, limit=None):
+    """
+    Deliver one batch of due outbox messages over a single connection.
+
+    Args:
+        member_ids: Only deliver messages for these members (default: all)
+        limit: Batch size (default: settings.EMAIL_OUTBOX_BATCH_SIZE)
+
+    Returns:
+        dict: Summary with processed, sent, retrying and failed counts
+    """
+    summary = {
+        'processed': 0,
+        'sent': 0,
+        'retrying': 0,
+        'failed': 0,
+    }
+
+    rows = _claim_due_messages(member_ids=member_ids, limit=limit)
+    if not rows:
+        return summary
+
+    builders = _message_builders()
+    now = timezone.now()
+
+    # Build every message first; a build error only affects its own row
+    to_send = []
+    for row in rows:
+        try:
+            message = builders[row.kind](row.member)
+            if message is None:
+                raise ValueError('Nothing to send (member is a visitor or has no email address)')
+            message.to = [row.to_email]
+            to_send.append((row, message))
+        except Exception as e:
+            logger.warning(f"Could not build {row.kind} email for {row.to_email}: {str(e)}")
+            _record_failure(row, e, now)
+
+    rows_by_message = {id(message): row for row, message in to_send}
+    messages = [message for _, message in to_send]
+    for message, error in (send_over_connection(messages) if messages else []):
+        row = rows_by_message[id(message)]
+        if error is None:
+            row.status = EmailOutbox.STATUS_SENT
+            row.sent_at = timezone.now()
+            row.last_error = ''
+            row.attempts += 1
+        else:
+            logger.warning(f"Error sending {row.kind} email to {row.to_email}: {str(error)}")
+            _record_failure(row, error, now)
+
+    for row in rows:
+        row.updated_at = timezone.now()
+        summary['processed'] += 1
+        if row.status == EmailOutbox.STATUS_SENT:
+            summary['sent'] += 1
+        elif row.status == EmailOutbox.STATUS_FAILED:
+            summary['failed'] += 1
+        else:
+            summary['retrying'] += 1
+
+    EmailOutbox.objects.bulk_update(
+        rows, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'updated_at']
+    )
+
+    logger.info(f"Email outbox batch complete. Summary: {summary}")
+    return summary
@@ -8,175 +8,205 @@ from django.core.files.base import ContentFile
 from .qr_card_generator import generate_qr_code_card, get_card_as_data_uri
 import os
 
+# Width in pixels the plain QR code is sent at; compact-mode images are only
+# a few dozen pixels and mail clients blur them when scaling up
+EMAIL_QR_SIZE = 300
 
-def send_qr_code_email(member):
+
+def build_qr_code_email(member):
     """
-    Send member's QR code via email with styled membership card.
+    Build the QR code email (styled membership card plus plain QR code) for a member.
     
     Args:
         member: Member instance
     
     Returns:
-        False if member is a visitor (no email sent)
-        False if member has no email
-        True if email sent successfully
+        EmailMultiAlternatives ready to send, or None for visitors and
+        members without an email address
     """
     # Don't send QR code to visitors
     if member.is_visitor:
-        return False
+        return None
     
     if not member.email:
-        return False
+        return None
+    
+    # Render the QR code now if the background batch hasn't reached this member yet
+    from .qr_code_generator import ensure_qr_code, get_qr_code_png, upscale_qr_png
+    member = ensure_qr_code(member)
+    qr_png_data = get_qr_code_png(member)
+    if qr_png_data:
+        qr_png_data = upscale_qr_png(qr_png_data, EMAIL_QR_SIZE)
+    
+    subject = f"Your Church Attendance QR Code - {member.full_name}"
     
+    # Generate styled QR code card
     try:
-        subject = f"Your Church Attendance QR Code - {member.full_name}"
-        
-        # Generate styled QR code card
-        try:
-            qr_card_data_uri = get_card_as_data_uri(member, format='png')
-            card_generated = True
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Could not generate styled card, using plain QR: {str(e)}")
-            card_generated = False
-            qr_card_data_uri = None
-        
-        # Email context
-        context = {
-            'member_name': member.full_name,
-            'member_id': member.member_id,
-            'church_name': settings.CHURCH_NAME if hasattr(settings, 'CHURCH_NAME') else 'Our Church',
-            'qr_code_data_uri': qr_card_data_uri,
-            'card_generated': card_generated,
-        }
-        
-        # Also include plain QR code for fallback
-        if getattr(member, 'qr_code_data', None):
-            context['plain_qr_code_uri'] = f"data:image/png;base64,{member.qr_code_data}"
-        
-        # HTML email template with styled card
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #2c3e50;">Welcome to {context['church_name']}!</h2>
-                    
-                    <p>Hi <strong>{context['member_name']}</strong>,</p>
-                    
-                    <p>Your unique QR code for attendance tracking has been generated. Please find your membership card below:</p>
-        """
-        
-        # Add styled card if generated successfully
-        if card_generated and qr_card_data_uri:
-            html_content += f"""
-                    <div style="text-align: center; margin: 30px 0;">
-                        <img src="{qr_card_data_uri}" alt="Membership Card" style="max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 5px;">
-                    </div>
-            """
-        elif context.get('plain_qr_code_uri'):
-            # Fallback to plain QR code
-            html_content += f"""
-                    <div style="text-align: center; margin: 30px 0;">
-                        <p><strong>Your Member ID:</strong> <code style="background: #f0f0f0; padding: 5px 10px; border-radius: 3px;">{context['member_id']}</code></p>
-                        <img src="{context.get('plain_qr_code_uri')}" alt="QR Code" style="max-width: 300px; height: auto; border: 1px solid #ddd; padding: 10px; border-radius: 5px;">
-                    </div>
-            """
-        
-        html_content += """
-                    <h3 style="color: #2c3e50;">How to Use Your QR Code:</h3>
-                    <ol>
-                        <li>Keep your membership card safe - you'll need it for attendance check-in</li>
-                        <li>You can print out the card and carry it with you</li>
-                        <li>Or take a screenshot and show it on your phone during check-in</li>
-                        <li>Simply present your QR code to be scanned during services</li>
-                    </ol>
-                    
-                    <h3 style="color: #2c3e50;">About Your Card:</h3>
-                    <ul>
-                        <li><strong>Name:</strong> Your registered name</li>
-                        <li><strong>Member ID:</strong> Your unique church identifier</li>
-                        <li><strong>Department:</strong> Your ministry assignment</li>
-                        <li><strong>Class:</strong> Your bible class</li>
-                        <li><strong>QR Code:</strong> Scanned during attendance check-in</li>
-                    </ul>
-                    
-                    <p style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee; color: #666; font-size: 0.9em;">
-                        If you have any questions or need a new QR code, please contact us.
-                    </p>
-                    
-                    <p style="color: #666; font-size: 0.9em;">
-                        Best regards,<br>
-                        <strong>WIS Administration</strong>
-                    </p>
+        qr_card_data_uri = get_card_as_data_uri(member, format='png')
+        card_generated = True
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Could not generate styled card, using plain QR: {str(e)}")
+        card_generated = False
+        qr_card_data_uri = None
+    
+    # Email context
+    context = {
+        'member_name': member.full_name,
+        'member_id': member.member_id,
+        'church_name': settings.CHURCH_NAME if hasattr(settings, 'CHURCH_NAME') else 'Our Church',
+        'qr_code_data_uri': qr_card_data_uri,
+        'card_generated': card_generated,
+    }
+    
+    # Also include plain QR code for fallback
+    if qr_png_data:
+        import base64
+        context['plain_qr_code_uri'] = f"data:image/png;base64,{base64.b64encode(qr_png_data).decode('utf-8')}"
+    
+    # HTML email template with styled card
+    html_content = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c3e50;">Welcome to {context['church_name']}!</h2>
+                
+                <p>Hi <strong>{context['member_name']}</strong>,</p>
+                
+                <p>Your unique QR code for attendance tracking has been generated. Please find your membership card below:</p>
+    """
+    
+    # Add styled card if generated successfully
+    if card_generated and qr_card_data_uri:
+        html_content += f"""
+                <div style="text-align: center; margin: 30px 0;">
+                    <img src="{qr_card_data_uri}" alt="Membership Card" style="max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 5px;">
                 </div>
-            </body>
-        </html>
         """
-        
-        # Plain text alternative
-        text_content = f"""
-        Welcome to {context['church_name']}!
-        
-        Hi {context['member_name']},
-        
-        Your unique QR code for attendance tracking has been generated.
-        
-        Your Member ID: {context['member_id']}
-        
-        How to Use Your QR Code:
-        1. Keep your membership card safe - you'll need it for attendance check-in
-        2. You can print out the card and carry it with you
-        3. Or take a screenshot and show it on your phone during check-in
-        4. Simply present your QR code to be scanned during services
-        
-        If you have any questions or need a new QR code, please contact us.
-        
-        Best regards,
-        WIS Administration
+    elif context.get('plain_qr_code_uri'):
+        # Fallback to plain QR code
+        html_content += f"""
+                <div style="text-align: center; margin: 30px 0;">
+                    <p><strong>Your Member ID:</strong> <code style="background: #f0f0f0; padding: 5px 10px; border-radius: 3px;">{context['member_id']}</code></p>
+                    <img src="{context.get('plain_qr_code_uri')}" alt="QR Code" style="max-width: 300px; height: auto; border: 1px solid #ddd; padding: 10px; border-radius: 5px;">
+                </div>
         """
-        
-        # Create email
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[member.email],
+    
+    html_content += """
+                <h3 style="color: #2c3e50;">How to Use Your QR Code:</h3>
+                <ol>
+                    <li>Keep your membership card safe - you'll need it for attendance check-in</li>
+                    <li>You can print out the card and carry it with you</li>
+                    <li>Or take a screenshot and show it on your phone during check-in</li>
+                    <li>Simply present your QR code to be scanned during services</li>
+                </ol>
+                
+                <h3 style="color: #2c3e50;">About Your Card:</h3>
+                <ul>
+                    <li><strong>Name:</strong> Your registered name</li>
+                    <li><strong>Member ID:</strong> Your unique church identifier</li>
+                    <li><strong>Department:</strong> Your ministry assignment</li>
+                    <li><strong>Class:</strong> Your bible class</li>
+                    <li><strong>QR Code:</strong> Scanned during attendance check-in</li>
+                </ul>
+                
+                <p style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee; color: #666; font-size: 0.9em;">
+                    If you have any questions or need a new QR code, please contact us.
+                </p>
+                
+                <p style="color: #666; font-size: 0.9em;">
+                    Best regards,<br>
+                    <strong>WIS Administration</strong>
+                </p>
+            </div>
+        </body>
+    </html>
+    """
+    
+    # Plain text alternative
+    text_content = f"""
+    Welcome to {context['church_name']}!
+    
+    Hi {context['member_name']},
+    
+    Your unique QR code for attendance tracking has been generated.
+    
+    Your Member ID: {context['member_id']}
+    
+    How to Use Your QR Code:
+    1. Keep your membership card safe - you'll need it for attendance check-in
+    2. You can print out the card and carry it with you
+    3. Or take a screenshot and show it on your phone during check-in
+    4. Simply present your QR code to be scanned during services
+    
+    If you have any questions or need a new QR code, please contact us.
+    
+    Best regards,
+    WIS Administration
+    """
+    
+    # Create email
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[member.email],
+    )
+    
+    # Attach HTML version
+    email.attach_alternative(html_content, "text/html")
+    
+    # Attach QR code card as PNG attachment
+    try:
+        card_png = generate_qr_code_card(member, format='png')
+        email.attach(
+            f'membership_card_{member.member_id}.png',
+            card_png,
+            'image/png'
         )
-        
-        # Attach HTML version
-        email.attach_alternative(html_content, "text/html")
-        
-        # Attach QR code card as PNG attachment
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Could not attach card image: {str(e)}")
+        # Continue anyway - card is already embedded as data URI
+    
+    # Also attach plain QR code for reference
+    if qr_png_data:
         try:
-            card_png = generate_qr_code_card(member, format='png')
             email.attach(
-                f'membership_card_{member.member_id}.png',
-                card_png,
+                f'qr_code_{member.member_id}.png',
+                qr_png_data,
                 'image/png'
             )
-        except Exception as e:
+        except Exception as file_error:
             import logging
             logger = logging.getLogger(__name__)
-            logger.warning(f"Could not attach card image: {str(e)}")
-            # Continue anyway - card is already embedded as data URI
-        
-        # Also attach plain QR code for reference
-        if getattr(member, 'qr_code_data', None):
-            try:
-                import base64
-                data = base64.b64decode(member.qr_code_data)
-                email.attach(
-                    f'qr_code_{member.member_id}.png',
-                    data,
-                    'image/png'
-                )
-            except Exception as file_error:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.debug(f"Could not attach plain QR code: {str(file_error)}")
+            logger.debug(f"Could not attach plain QR code: {str(file_error)}")
+    
+    return email
+
+
+def send_qr_code_email(member):
+    """
+    Send member's QR code via email with styled membership card.
+    
+    Sends immediately; background sends go through the email outbox
+    (see members.email_outbox).
+    
+    Args:
+        member: Member instance
+    
+    Returns:
+        False if member is a visitor (no email sent)
+        False if member has no email
+        True if email sent successfully
+    """
+    try:
+        email = build_qr_code_email(member)
+        if email is None:
+            return False
         
-        # Send email
         email.send(fail_silently=False)
         return True
         
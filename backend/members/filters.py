@@ -0,0 +1,27 @@
+"""
+Query filters for the members API
+
+Every filter maps onto an indexed column (see Member.Meta.indexes), so
+segments like "at-risk members of one class" are index lookups rather
+than a scan of the member table.
+"""
+
+import django_filters
+
+from .models import Member
+
+
+class MemberFilter(django_filters.FilterSet):
+    """
+    Usage: /members/?is_visitor=false&attendance_status=at_risk&class_name=airport
+           /members/?min_absenteeism_ratio=0.5&created_after=2026-01-01
+    """
+
+    min_absenteeism_ratio = django_filters.NumberFilter(field_name='current_absenteeism_ratio', lookup_expr='gte')
+    max_absenteeism_ratio = django_filters.NumberFilter(field_name='current_absenteeism_ratio', lookup_expr='lte')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Member
+        fields = ['is_visitor', 'attendance_status', 'class_name', 'department', 'committee', 'sex']
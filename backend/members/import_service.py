@@ -0,0 +1,258 @@
+"""
+Bulk member import from CSV or XLSX files
+
+Rows are validated in memory, duplicate emails are checked with a single
+set-based query, member IDs are reserved as one block and the members are
+inserted with bulk_create(). QR codes and welcome emails are left to the
+onboarding batch in members.tasks so the import itself stays fast.
+"""
+
+import csv
+import io
+import logging
+
+from django.db import transaction
+
+from .email_outbox import queue_qr_code_emails
+from .models import Member
+from .serializers import MemberImportRowSerializer
+from .utils import reserve_member_ids
+
+logger = logging.getLogger(__name__)
+
+# Columns accepted in an import file (header matching is case-insensitive and
+# treats spaces like underscores, so "Full Name" maps to full_name)
+IMPORT_FIELDS = [
+    'full_name',
+    'date_of_birth',
+    'sex',
+    'phone',
+    'email',
+    'place_of_residence',
+    'profession',
+    'department',
+    'class_name',
+    'committee',
+    'marital_status',
+    'is_visitor',
+    'baptised',
+    'confirmed',
+]
+
+HEADER_ALIASES = {
+    'name': 'full_name',
+    'class': 'class_name',
+    'gender': 'sex',
+    'dob': 'date_of_birth',
+    'phone_number': 'phone',
+    'email_address': 'email',
+    'residence': 'place_of_residence',
+    'visitor': 'is_visitor',
+}
+
+CHOICE_FIELDS = {
+    'sex': Member.SEX_CHOICES,
+    'department': Member.DEPARTMENT_CHOICES,
+    'class_name': Member.CLASS_CHOICES,
+    'committee': Member.COMMITTEE_CHOICES,
+    'marital_status': Member.MARITAL_STATUS,
+}
+
+BOOLEAN_FIELDS = ['is_visitor', 'baptised', 'confirmed']
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'x')
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+class MemberImportError(Exception):
+    """Raised when an import file cannot be read at all"""
+
+
+def read_member_rows(file_obj, filename):
+    """
+    Read member rows from an uploaded CSV or XLSX file.
+
+    Args:
+        file_obj: Binary file object
+        filename: Original file name, used to pick the format
+
+    Returns:
+        list: One dict per data row, keyed by member field name
+
+    Raises:
+        MemberImportError: If the file type is unsupported or unreadable
+    """
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        raw_rows = _read_csv_rows(file_obj)
+    elif name.endswith('.xlsx'):
+        raw_rows = _read_xlsx_rows(file_obj)
+    else:
+        raise MemberImportError('Unsupported file type. Upload a .csv or .xlsx file.')
+
+    if not raw_rows:
+        raise MemberImportError('The import file is empty.')
+
+    headers = [_normalize_header(header) for header in raw_rows[0]]
+    if 'full_name' not in headers:
+        raise MemberImportError('The import file must have a "full_name" column.')
+
+    rows = []
+    for values in raw_rows[1:]:
+        row = {
+            header: value
+            for header, value in zip(headers, values)
+            if header in IMPORT_FIELDS
+        }
+        # Skip completely blank lines (common at the end of spreadsheets)
+        if any(str(value).strip() for value in row.values() if value is not None):
+            rows.append(row)
+    return rows
+
+
+def _read_csv_rows(file_obj):
+    try:
+        text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+        return [row for row in csv.reader(text)]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise MemberImportError(f'Could not read CSV file: {str(e)}')
+
+
+def _read_xlsx_rows(file_obj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise MemberImportError('XLSX import requires openpyxl. Install with: pip install openpyxl')
+
+    try:
+        workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        sheet = workbook.active
+        rows = [['' if value is None else value for value in row] for row in sheet.iter_rows(values_only=True)]
+        workbook.close()
+        return rows
+    except Exception as e:
+        raise MemberImportError(f'Could not read XLSX file: {str(e)}')
+
+
+def _normalize_header(header):
+    key = str(header or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def _normalize_row(row):
+    """Convert spreadsheet values into serializer input (labels -> choice keys, yes/no -> bool)"""
+    data = {}
+    for field, value in row.items():
+        if hasattr(value, 'isoformat'):
+            # openpyxl returns datetime objects for date cells
+            value = value.date().isoformat() if hasattr(value, 'date') else value.isoformat()
+        value = '' if value is None else str(value).strip()
+
+        if field in BOOLEAN_FIELDS:
+            data[field] = value.lower() in TRUE_VALUES
+        elif field in CHOICE_FIELDS:
+            if value:
+                data[field] = _match_choice(value, CHOICE_FIELDS[field])
+        elif value:
+            data[field] = value
+    return data
+
+
+def _match_choice(value, choices):
+    lowered = value.lower()
+    for key, label in choices:
+        if lowered == key or lowered == label.lower():
+            return key
+    # Leave unknown values untouched so the serializer reports them
+    return value
+
+
+def import_members(rows, dry_run=False, queue_emails=True):
+    """
+    Validate and insert member rows in bulk.
+
+    Rows that fail validation are reported and skipped; all valid rows are
+    inserted together. QR codes are NOT generated and emails are only queued
+    in the outbox here - pass the returned created_ids to
+    members.tasks.schedule_member_onboarding().
+
+    Args:
+        rows: List of dicts from read_member_rows()
+        dry_run: Validate only, don't create anything
+        queue_emails: Queue QR code emails for the new members
+
+    Returns:
+        dict: {
+            'total_rows': int,
+            'created': int,
+            'created_ids': list of Member primary keys,
+            'errors': list of {'row': int, 'errors': dict}
+        }
+    """
+    summary = {
+        'total_rows': len(rows),
+        'created': 0,
+        'created_ids': [],
+        'errors': [],
+    }
+
+    # Validate every row in memory (row numbers match the spreadsheet, where row 1 is the header)
+    valid_rows = []
+    for index, row in enumerate(rows, start=2):
+        serializer = MemberImportRowSerializer(data=_normalize_row(row))
+        if serializer.is_valid():
+            valid_rows.append((index, serializer.validated_data))
+        else:
+            summary['errors'].append({'row': index, 'errors': serializer.errors})
+
+    # Check duplicate emails for the whole file with one query
+    emails = {data['email'] for _, data in valid_rows if data.get('email')}
+    existing_emails = set(
+        Member.objects.filter(email__in=emails, is_visitor=False).values_list('email', flat=True)
+    ) if emails else set()
+
+    seen_emails = set()
+    members_to_create = []
+    for index, data in valid_rows:
+        email = data.get('email')
+        if email and not data.get('is_visitor'):
+            if email in existing_emails:
+                summary['errors'].append({
+                    'row': index,
+                    'errors': {'email': ['A non-visitor member with this email already exists.']}
+                })
+                continue
+            if email in seen_emails:
+                summary['errors'].append({
+                    'row': index,
+                    'errors': {'email': ['This email appears more than once in the import file.']}
+                })
+                continue
+            seen_emails.add(email)
+        members_to_create.append(Member(**data))
+
+    summary['errors'].sort(key=lambda error: error['row'])
+
+    if dry_run or not members_to_create:
+        summary['valid_rows'] = len(members_to_create)
+        return summary
+
+    with transaction.atomic():
+        member_ids = reserve_member_ids(len(members_to_create))
+        for member, member_id in zip(members_to_create, member_ids):
+            member.member_id = member_id
+        created = Member.objects.bulk_create(members_to_create, batch_size=BULK_CREATE_BATCH_SIZE)
+
+        if not all(member.pk for member in created):
+            # Backends without INSERT ... RETURNING don't set primary keys on
+            # bulk_create, so look them up by the reserved member IDs
+            created = list(Member.objects.filter(member_id__in=member_ids))
+
+        if queue_emails:
+            queue_qr_code_emails(created)
+
+    summary['created_ids'] = [member.pk for member in created]
+    summary['created'] = len(summary['created_ids'])
+
+    logger.info(f"Imported {summary['created']} members ({len(summary['errors'])} rows rejected)")
+    return summary
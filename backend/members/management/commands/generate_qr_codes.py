@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from members.models import Member
+from members.qr_code_generator import generate_qr_codes
+
+
+class Command(BaseCommand):
+    help = ('Render and upload QR codes for members whose QR code is still pending. '
+            'Images are generated on a worker pool and written back in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry members whose previous QR generation failed',
+        )
+        parser.add_argument(
+            '--rerender',
+            action='store_true',
+            help='Re-render every member (e.g. after changing QR_RENDER_MODE)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of members processed per batch (default: 200)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker pool size (default: QR_GENERATION_WORKERS setting)',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = Member.objects.filter(qr_status=Member.QR_STATUS_FAILED).update(qr_status=Member.QR_STATUS_PENDING)
+            self.stdout.write(f'Retrying {retried} failed QR codes')
+
+        if options['rerender']:
+            # Clearing qr_code_image makes the batch upload the new rendering too
+            queued = Member.objects.exclude(qr_status=Member.QR_STATUS_PENDING).update(
+                qr_status=Member.QR_STATUS_PENDING, qr_code_image='')
+            self.stdout.write(f'Re-rendering {queued} existing QR codes')
+
+        pending = Member.objects.filter(qr_status=Member.QR_STATUS_PENDING).count()
+        self.stdout.write(f'Generating QR codes for {pending} pending members...')
+
+        totals = {'processed': 0, 'generated': 0, 'failed': 0}
+        while True:
+            summary = generate_qr_codes(limit=options['batch_size'], workers=options['workers'])
+            if not summary['processed']:
+                break
+            for key in totals:
+                totals[key] += summary[key]
+            # Failed members leave the pending set, so every batch makes progress
+            self.stdout.write(f"  {totals['processed']}/{pending} processed")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {totals['generated']} QR codes ({totals['failed']} failed)"))
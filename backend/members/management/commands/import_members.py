@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from members.import_service import read_member_rows, import_members, MemberImportError
+from members.tasks import process_member_onboarding
+
+
+class Command(BaseCommand):
+    help = ('Bulk import members from a CSV or XLSX file. Rows are validated together, '
+            'inserted with bulk_create and then QR codes and emails are generated in one batch.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file with a header row')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating any members',
+        )
+        parser.add_argument(
+            '--no-email',
+            action='store_true',
+            help='Do not send QR code emails to imported members',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as f:
+                rows = read_member_rows(f, path)
+        except OSError as e:
+            raise CommandError(f'Could not open {path}: {e}')
+        except MemberImportError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'Importing {len(rows)} rows from {path}...')
+        summary = import_members(rows, dry_run=options['dry_run'], queue_emails=not options['no_email'])
+
+        for error in summary['errors']:
+            self.stdout.write(self.style.ERROR(f"  Row {error['row']}: {error['errors']}"))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: {summary['valid_rows']} valid rows, {len(summary['errors'])} rejected"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} members, {len(summary['errors'])} rows rejected"))
+
+        if summary['created_ids']:
+            self.stdout.write('Generating QR codes and sending emails...')
+            result = process_member_onboarding(summary['created_ids'])
+            self.stdout.write(f"  QR codes generated: {result['qr_generated']}")
+            self.stdout.write(f"  Emails sent: {result['emails_sent']} (failed: {result['emails_failed']})")
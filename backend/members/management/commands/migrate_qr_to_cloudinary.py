@@ -1,52 +1,101 @@
-from django.core.management.base import BaseCommand
-from django.core.files import File
-from members.models import Member
-from django.conf import settings
-import os
-import logging
+from django.core.management.base import BaseCommand, CommandError
+from members.qr_migration_service import (
+    MIGRATION_TARGETS, get_checkpoint, get_migration_target, members_to_migrate, migrate_qr_images, size_report
+)
 
-logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = ('Upload existing local QR code images to Cloudinary storage. ' 
-            'This will iterate over members with a local qr_code_image file, ' 
-            'save it using the configured default storage (which should be ' 
-            'Cloudinary) and optionally remove the original local file.')
+    help = ('Upload existing local QR code images to Cloudinary storage. '
+            'Uploads run on a thread pool and progress is checkpointed after every batch, '
+            'so an interrupted run resumes where it stopped. Local files are removed once '
+            'uploaded unless --keep-local is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            choices=sorted(MIGRATION_TARGETS),
+            default='cloudinary',
+            help="Storage to upload to (default: cloudinary; 'local' copies to --target-dir)",
+        )
+        parser.add_argument('--target-dir', type=str, default=None, help="Directory for --target local")
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many images (and bytes) would be uploaded',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Discard the saved progress and start from the first member',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Retry only the members whose upload failed in earlier runs',
+        )
+        parser.add_argument('--keep-local', action='store_true', help='Keep local files after uploading')
+        parser.add_argument(
+            '--from-blobs',
+            action='store_true',
+            help='Upload members whose local file is gone from their database (QRCodeBlob) copy',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Members per checkpointed batch (default: 100)',
+        )
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent uploads (default: 8)')
 
     def handle(self, *args, **options):
-        # ensure Cloudinary storage is active
-        storage_backend = settings.DEFAULT_FILE_STORAGE
-        if 'cloudinary' not in storage_backend:
+        if options['target'] == 'local' and not options['target_dir']:
+            raise CommandError('--target local requires --target-dir')
+
+        target = get_migration_target(options['target'], location=options['target_dir'])
+        if not target.is_configured():
             self.stdout.write(self.style.WARNING(
-                f"Default storage is '{storage_backend}', not a cloudinary backend."
+                f"Storage '{target.name}' is not configured as the default storage."
                 " Set CLOUDINARY_* env vars and restart before running."))
             return
 
-        members = Member.objects.exclude(qr_code_image='')
-        count = 0
-        for m in members:
-            try:
-                field = m.qr_code_image
-                # only process files that have a local filesystem path
-                if not hasattr(field, 'path'):
-                    continue
-                local_path = field.path
-                if not os.path.exists(local_path):
-                    self.stdout.write(self.style.ERROR(f"Local file missing: {local_path}"))
-                    continue
-                self.stdout.write(f"Uploading {local_path} for member {m.member_id}...")
-                with open(local_path, 'rb') as f:
-                    # saving with same name will cause cloudinary to upload
-                    field.save(os.path.basename(local_path), File(f), save=True)
-                # remove local copy if desired
-                try:
-                    os.remove(local_path)
-                    self.stdout.write(self.style.SUCCESS(f"Removed local file {local_path}"))
-                except Exception:
-                    # not critical
-                    pass
-                count += 1
-            except Exception as e:
-                logger.exception(f"Error processing member {m.id}")
-                self.stdout.write(self.style.ERROR(f"Failed for member {m.id}: {e}"))
-        self.stdout.write(self.style.SUCCESS(f"Finished uploading {count} QR images."))
+        checkpoint = get_checkpoint(target.name, reset=options['reset'] and not options['dry_run'])
+        members = members_to_migrate(checkpoint, retry_failed=options['retry_failed'])
+
+        if options['dry_run']:
+            report = size_report(members, use_blobs=options['from_blobs'])
+            self.stdout.write(
+                f"{report['members']} QR images to upload to {target.name} "
+                f"({report['total_bytes'] / 1024:.1f} KB): {report['local_files']} local files, "
+                f"{report['from_blobs']} from the database, {report['missing']} not local (skipped)")
+            if checkpoint.last_pk:
+                self.stdout.write(f"Resuming after member pk {checkpoint.last_pk} ({checkpoint.migrated} already migrated)")
+            return
+
+        total = members.count()
+        if checkpoint.last_pk and not options['retry_failed']:
+            self.stdout.write(f"Resuming after member pk {checkpoint.last_pk} ({checkpoint.migrated} already migrated)")
+        self.stdout.write(f"Checking {total} members for QR images to upload to {target.name}...")
+
+        migrated_before = checkpoint.migrated
+
+        def on_batch(checkpoint):
+            self.stdout.write(f"  {checkpoint.migrated - migrated_before}/{total} uploaded, "
+                              f"{len(checkpoint.failed_ids)} failed")
+
+        checkpoint = migrate_qr_images(
+            target,
+            checkpoint,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            retry_failed=options['retry_failed'],
+            delete_local=not options['keep_local'],
+            use_blobs=options['from_blobs'],
+            on_batch=on_batch,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Finished uploading {checkpoint.migrated - migrated_before} QR images "
+            f"({checkpoint.bytes_uploaded / 1024:.1f} KB in total)."))
+        if checkpoint.failed_ids:
+            self.stdout.write(self.style.ERROR(
+                f"{len(checkpoint.failed_ids)} uploads failed; rerun with --retry-failed"))
@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from members.card_batch_service import (
+    CARD_BATCH_FORMATS, select_card_members, stream_cards_zip, write_cards_pdf
+)
+
+
+class Command(BaseCommand):
+    help = ('Render membership cards for all members (or one department/class) on a process pool, '
+            'as A4 PDF sheets, a ZIP of A4 PNG sheets or a ZIP of individual cards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Path of the PDF or ZIP file to write')
+        parser.add_argument(
+            '--format',
+            choices=CARD_BATCH_FORMATS,
+            default=None,
+            help='pdf, sheets or zip (default: from the output file extension)',
+        )
+        parser.add_argument('--department', type=str, default=None, help='Only this department')
+        parser.add_argument('--class-name', type=str, default=None, help='Only this class')
+        parser.add_argument(
+            '--include-visitors',
+            action='store_true',
+            help='Also render cards for visitors',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (default: CARD_RENDER_WORKERS setting or CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output']
+        output_format = options['format'] or ('zip' if path.lower().endswith('.zip') else 'pdf')
+
+        members = select_card_members(
+            department=options['department'],
+            class_name=options['class_name'],
+            include_visitors=options['include_visitors'],
+        )
+        count = members.count()
+        if not count:
+            raise CommandError('No members match the given filters')
+
+        self.stdout.write(f'Rendering {count} membership cards ({output_format})...')
+
+        if output_format == 'pdf':
+            if os.path.exists(path):
+                os.remove(path)
+            pages = write_cards_pdf(members, path, workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {pages} A4 pages to {path}'))
+            return
+
+        with open(path, 'wb') as zip_file:
+            for chunk in stream_cards_zip(members, sheets=output_format == 'sheets', workers=options['workers']):
+                zip_file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} cards to {path}'))
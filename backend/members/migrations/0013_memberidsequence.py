@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_recalculate_consecutive_absences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-year'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='memberabsenteeismmetric',
+            options={'ordering': ['-absenteeism_ratio', '-last_updated'], 'verbose_name_plural': 'Member Absenteeism Metrics'},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+def mark_existing_qr_codes_ready(apps, schema_editor):
+    """Members that already have QR data don't need the background batch"""
+    Member = apps.get_model('members', 'Member')
+    Member.objects.exclude(qr_code_data__isnull=True).exclude(qr_code_data='').update(qr_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0013_memberidsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='qr_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_qr_codes_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:41
+
+import base64
+import binascii
+import hashlib
+
+from django.db import migrations, models
+
+
+def move_qr_data_to_blobs(apps, schema_editor):
+    """Copy each member's base64 QR image into the content-addressed blob table"""
+    Member = apps.get_model('members', 'Member')
+    QRCodeBlob = apps.get_model('members', 'QRCodeBlob')
+
+    members = Member.objects.exclude(qr_code_data__isnull=True).exclude(qr_code_data='')
+    for member in members.only('id', 'qr_code_data').iterator():
+        try:
+            data = base64.b64decode(member.qr_code_data)
+        except (binascii.Error, ValueError):
+            continue
+        sha256 = hashlib.sha256(data).hexdigest()
+        QRCodeBlob.objects.get_or_create(
+            sha256=sha256,
+            defaults={'data': data, 'size': len(data), 'content_type': 'image/png'}
+        )
+        Member.objects.filter(pk=member.pk).update(qr_code_hash=sha256)
+
+
+def restore_qr_data_from_blobs(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    QRCodeBlob = apps.get_model('members', 'QRCodeBlob')
+
+    for member in Member.objects.exclude(qr_code_hash__isnull=True).only('id', 'qr_code_hash').iterator():
+        blob = QRCodeBlob.objects.filter(sha256=member.qr_code_hash).first()
+        if blob:
+            Member.objects.filter(pk=member.pk).update(
+                qr_code_data=base64.b64encode(bytes(blob.data)).decode('utf-8')
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0014_member_qr_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRCodeBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content_type', models.CharField(default='image/png', max_length=50)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='qr_code_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(move_qr_data_to_blobs, restore_qr_data_from_blobs),
+        migrations.RemoveField(
+            model_name='member',
+            name='qr_code_data',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0017_messagejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage', models.CharField(max_length=20)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('public_url', models.URLField(max_length=500)),
+                ('uploaded_at', models.DateTimeField(auto_now=True)),
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='card_upload', to='members.member')),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0018_cardupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRMigrationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_pk', models.PositiveIntegerField(default=0)),
+                ('migrated', models.PositiveIntegerField(default=0)),
+                ('bytes_uploaded', models.PositiveBigIntegerField(default=0)),
+                ('failed_ids', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
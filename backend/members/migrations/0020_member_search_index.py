@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 21:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """pg_trgm indexes on PostgreSQL, an FTS5 table with sync triggers on SQLite"""
+    from members.search_service import create_search_index
+    create_search_index(schema_editor.connection)
+
+
+def remove_search_index(apps, schema_editor):
+    from members.search_service import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0019_qrmigrationcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0022_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagejob',
+            name='done_ids',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='messagejob',
+            name='progress_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0023_message_job_resume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagejob',
+            name='options',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='messagejob',
+            name='runner',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
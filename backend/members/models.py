@@ -1,10 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-import qrcode
-from io import BytesIO
-from django.core.files import File
-from PIL import Image
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 import secrets
 from datetime import timedelta
@@ -123,6 +119,16 @@ class Member(models.Model):
         ('married', 'Married')
     ]
     
+    # QR code generation status (images are rendered by a background batch)
+    QR_STATUS_PENDING = 'pending'
+    QR_STATUS_READY = 'ready'
+    QR_STATUS_FAILED = 'failed'
+    QR_STATUS_CHOICES = [
+        (QR_STATUS_PENDING, 'Pending'),
+        (QR_STATUS_READY, 'Ready'),
+        (QR_STATUS_FAILED, 'Failed'),
+    ]
+    
     # Attendance Status choices
     ATTENDANCE_STATUS_CHOICES = [
         ('active', 'Active - Good Attendance'),
@@ -148,7 +154,8 @@ class Member(models.Model):
     baptised = models.BooleanField(default=False)
     confirmed = models.BooleanField(default=False)
     qr_code_image = models.ImageField(upload_to='qr_codes/', blank=True, null=True)
-    qr_code_data = models.TextField(blank=True, null=True)  # base64-encoded PNG data of QR code
+    qr_code_hash = models.CharField(max_length=64, blank=True, null=True)  # SHA-256 key of the QR image in QRCodeBlob
+    qr_status = models.CharField(max_length=10, choices=QR_STATUS_CHOICES, default=QR_STATUS_PENDING, db_index=True)
     
     # Absence & Engagement Tracking
     consecutive_absences = models.IntegerField(default=0)  # DEPRECATED: use current_absenteeism_ratio instead
@@ -164,74 +171,107 @@ class Member(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bulk paths (mark absent, absenteeism recalculation, campaigns) start
+            # from is_visitor=False, so it leads the composite indexes; the
+            # created_at one also serves the default ordering
+            models.Index(fields=['is_visitor', 'created_at'], name='members_visitor_created_idx'),
+            models.Index(fields=['is_visitor', 'attendance_status'], name='members_visitor_status_idx'),
+            models.Index(fields=['is_visitor', 'class_name'], name='members_visitor_class_idx'),
+            models.Index(fields=['is_visitor', 'department'], name='members_visitor_dept_idx'),
+            models.Index(fields=['is_visitor', 'current_absenteeism_ratio'], name='members_visitor_ratio_idx'),
+            models.Index(fields=['attendance_status'], name='members_status_idx'),
+            models.Index(fields=['class_name'], name='members_class_idx'),
+            models.Index(fields=['department'], name='members_department_idx'),
+            models.Index(fields=['current_absenteeism_ratio'], name='members_ratio_idx'),
+            models.Index(fields=['created_at'], name='members_created_idx'),
+            # Delta sync (sync_service) reads members changed since a cursor
+            models.Index(fields=['updated_at'], name='members_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} ({self.member_id})"
     
     def save(self, *args, **kwargs):
-        """Override save to generate sequential member ID and QR code"""
-        import base64
-        import logging
-        from .utils import generate_sequential_member_id
+        """
+        Override save to generate sequential member ID.
         
-        logger = logging.getLogger(__name__)
+        QR codes are not rendered here: members without a QR image stay
+        qr_status='pending' and are picked up by the background batch
+        (see qr_code_generator.generate_qr_codes).
+        """
+        from .utils import generate_sequential_member_id
         
         # Generate sequential member_id if not provided
         if not self.member_id:
             self.member_id = generate_sequential_member_id()
         
-        # Generate QR code if we don't already have data
-        if not self.qr_code_data:
-            try:
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_L,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(self.member_id)
-                qr.make(fit=True)
-                
-                img = qr.make_image(fill_color="black", back_color="white")
-                
-                # Save to BytesIO buffer
-                img_io = BytesIO()
-                img.save(img_io, format='PNG')
-                img_io.seek(0)  # Reset position for reading
-                
-                # Encode as base64 for database storage
-                qr_png_data = img_io.getvalue()
-                self.qr_code_data = base64.b64encode(qr_png_data).decode('utf-8')
-                
-                # Optionally save as file for backward compatibility (will use Cloudinary if configured)
-                if not self.qr_code_image:
-                    img_io.seek(0)  # Reset again before saving to file field
-                    self.qr_code_image.save(
-                        f"qr_code_{self.member_id}.png",
-                        File(img_io),
-                        save=False  # Don't save yet - we'll do it below
-                    )
-                    
-                logger.info(f"Generated QR code for member {self.member_id}")
-                    
-            except Exception as e:
-                logger.error(f"Error generating QR code for {self.member_id}: {str(e)}")
-                # Don't raise - allow member creation even if QR generation fails
-        
         # Now save the member record to database
         super().save(*args, **kwargs)
+
+
+class QRCodeBlob(models.Model):
+    """
+    Content-addressed storage for QR code images.
+    
+    Image bytes live here instead of on the Member row, keyed by their SHA-256
+    hash, so member scans and list payloads only carry the short hash.
+    Identical images are stored once.
+    """
+    
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    content_type = models.CharField(max_length=50, default='image/png')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)  # Size of data in bytes
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.content_type}, {self.size} bytes)"
+
+
+class MemberIdSequence(models.Model):
+    """
+    Per-year counter backing the sequential WIS-YYYY-NNNN member IDs.
+    
+    The counter is incremented atomically so concurrent member creations never
+    hand out the same ID, and bulk imports can reserve a whole block at once.
+    """
+    
+    year = models.PositiveIntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)  # Highest sequence number handed out so far
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-year']
+    
+    def __str__(self):
+        return f"WIS-{self.year}: {self.last_value}"
+
+
 @receiver(post_save, sender=Member)
 def send_qr_code_on_creation(sender, instance, created, **kwargs):
-    """Send QR code email when a new member is created"""
-    if created and instance.email:
-        from .email_service import send_qr_code_email
-        import logging
-        logger = logging.getLogger(__name__)
-        try:
-            result = send_qr_code_email(instance)
-            logger.info(f"QR code email sent to {instance.email}: {result}")
-        except Exception as e:
-            logger.error(f"Failed to send QR code email to {instance.email}: {str(e)}")
+    """
+    Queue QR code generation and the QR code email when a new member is created.
+    
+    The email is written to the EmailOutbox in the member's transaction; the
+    QR code and delivery run in the background once it commits, so the
+    request that creates the member doesn't wait on image encoding, storage
+    uploads or the mail server.
+    """
+    if created and instance.qr_status == Member.QR_STATUS_PENDING:
+        from django.db import transaction
+        from .email_outbox import queue_qr_code_email
+        from .tasks import schedule_member_onboarding
+        
+        queue_qr_code_email(instance)
+        member_pk = instance.pk
+        transaction.on_commit(lambda: schedule_member_onboarding([member_pk]))
+
+
+@receiver(post_delete, sender=Member)
+def record_member_tombstone(sender, instance, **kwargs):
+    """Log the deletion so sync clients drop their copy of the member"""
+    SyncTombstone.objects.create(kind=SyncTombstone.KIND_MEMBER, object_id=instance.pk)
 
 
 class MemberAlert(models.Model):
@@ -358,4 +398,167 @@ class MemberAbsenteeismAlert(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.member.full_name} - {self.alert_level} ({self.absenteeism_ratio_at_creation:.1%})"
\ No newline at end of file
+        return f"{self.member.full_name} - {self.alert_level} ({self.absenteeism_ratio_at_creation:.1%})"
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for emails sent to members.
+    
+    Rows are written in the same transaction as the change that triggers the
+    email (e.g. creating a member), so an email is never lost or sent for a
+    rolled-back change. members.email_outbox delivers them in the background
+    in batches over one SMTP connection, retrying failures with backoff.
+    """
+    
+    KIND_QR_CODE = 'qr_code'
+    KIND_CHOICES = [
+        (KIND_QR_CODE, 'QR Code Email'),
+    ]
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='outbox_emails')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, default=KIND_QR_CODE)
+    to_email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The dispatcher's "due messages" query
+            models.Index(fields=['status', 'next_attempt_at'], name='members_outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_email} ({self.status})"
+
+
+class MessageJob(models.Model):
+    """
+    A bulk messaging run (e.g. QR code emails to every member), tracked so
+    the client can poll its progress while it runs in the background.
+    """
+    
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_WHATSAPP = 'whatsapp'
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_WHATSAPP, 'WhatsApp'),
+    ]
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    member_ids = models.JSONField(default=list)  # Primary keys of the recipients
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list)  # [{'member_id': ..., 'error': ...}], first 100 only
+    done_ids = models.JSONField(default=list)  # Recipients already handled, skipped if the job is resumed
+    options = models.JSONField(default=dict)  # Runner options, e.g. rate_per_minute
+    runner = models.CharField(max_length=32, blank=True, default='')  # Token of the run that claimed the job
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    progress_at = models.DateTimeField(null=True, blank=True)  # Last progress written while running
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_channel_display()} job {self.pk} ({self.status}, {self.processed}/{self.total})"
+    
+    def remaining_members(self):
+        """Recipients not handled yet (all of them unless the job was resumed)"""
+        return Member.objects.filter(pk__in=self.member_ids).exclude(pk__in=self.done_ids)
+
+
+class CardUpload(models.Model):
+    """
+    The last membership card uploaded to external media storage for a
+    member, so unchanged cards are not rendered or uploaded again.
+    """
+    
+    member = models.OneToOneField(Member, on_delete=models.CASCADE, related_name='card_upload')
+    storage = models.CharField(max_length=20)  # MediaStorage name, e.g. 'supabase'
+    content_hash = models.CharField(max_length=64)  # qr_card_generator.card_content_hash
+    public_url = models.URLField(max_length=500)
+    uploaded_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Card upload for {self.member.member_id} ({self.storage})"
+
+
+class QRMigrationCheckpoint(models.Model):
+    """
+    Progress of migrating QR images to a storage backend, so an interrupted
+    migrate_qr_to_cloudinary run resumes where it stopped.
+    """
+    
+    name = models.CharField(max_length=50, unique=True)  # Target storage, e.g. 'cloudinary'
+    last_pk = models.PositiveIntegerField(default=0)  # Every member up to this pk has been processed
+    migrated = models.PositiveIntegerField(default=0)
+    bytes_uploaded = models.PositiveBigIntegerField(default=0)
+    failed_ids = models.JSONField(default=list)  # Member pks whose upload failed
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"QR migration to {self.name} (after pk {self.last_pk}, {self.migrated} migrated)"
+
+
+class SyncTombstone(models.Model):
+    """
+    A deleted member or service, kept so delta sync clients can drop their
+    local copy (see sync_service). Written by post_delete signals and pruned
+    after SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    
+    KIND_MEMBER = 'member'
+    KIND_SERVICE = 'service'
+    KIND_CHOICES = [
+        (KIND_MEMBER, 'Member'),
+        (KIND_SERVICE, 'Service'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['deleted_at'], name='members_tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id} at {self.deleted_at}"
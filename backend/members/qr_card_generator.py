@@ -3,78 +3,217 @@ QR Code Card Generator - Creates styled QR code cards with member details
 
 This module generates professional-looking QR code cards in PNG or PDF format
 identical to the QRCodeModal design shown in the frontend.
+
+Fonts and the card background (header band and title) are loaded once per
+process. Rendered cards are cached (Django cache) under a hash of the fields
+printed on them, so repeated email/WhatsApp sends for an unchanged member
+reuse the same bytes instead of re-rendering. The PNG renderer only takes
+a plain dict of fields, so it can also run in worker processes.
 """
 
 from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
 from io import BytesIO
 import base64
+import hashlib
+import json
 import logging
 from django.conf import settings
+from django.core.cache import cache
+
+from .qr_code_generator import QR_RENDER_MODES, generate_qr_code_svg, render_qr_image
 
 logger = logging.getLogger(__name__)
 
+CARD_WIDTH = 600
+CARD_HEIGHT = 900
+CARD_HEADER_COLOR = (37, 99, 235)  # #2563eb
+CARD_QR_SIZE = 500
+
+# Bump when the card layout changes so cached cards are re-rendered
+CARD_LAYOUT_VERSION = 2
+CARD_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days
+
+DEPARTMENT_LABELS = {
+    'technical': 'Technical',
+    'media': 'Media',
+    'echoes_of_grace': 'Echoes of Grace',
+    'celestial_harmony_choir': 'Celestial Harmony Choir',
+    'heavenly_vibes': 'Heavenly Vibes',
+    'prayer_evangelism': 'Prayer and Evangelism',
+    'visitor_care': 'Visitor Care',
+    'protocol_ushering': 'Protocol & Ushering',
+}
+
+CLASS_LABELS = {
+    'airport': 'Airport',
+    'abesim': 'Abesim',
+    'old_abesim': 'Old Abesim',
+    'asufufu_adomako': 'Asufufu / Adomako',
+    'baakoniaba': 'Baakoniaba',
+    'berlin_top_class_1': 'Berlin Top class 1',
+    'berlin_top_class_2': 'Berlin Top class 2',
+    'penkwase_class_1': 'Penkwase class 1',
+    'penkwase_class_2': 'Penkwase class 2',
+    'mayfair': 'Mayfair',
+    'odumase': 'Odumase',
+    'new_dormaa_kotokrom': 'New Dormaa / Kotokrom',
+    'dumasua': 'Dumasua',
+    'fiapre_class_1': 'Fiapre Class 1',
+    'fiapre_class_2': 'Fiapre Class 2',
+    'magazine': 'Magazine',
+    'town_centre': 'Town Centre',
+    'newton_estate': 'Newtown/Estate',
+    'distance': 'Distance',
+}
+
+
+def card_fields(member):
+    """
+    The member fields printed on a card, as a plain (picklable) dict.
+    
+    Args:
+        member: Member instance
+    
+    Returns:
+        dict: full_name, member_id, department, class_name
+    """
+    return {
+        'full_name': member.full_name or '',
+        'member_id': member.member_id or '',
+        'department': member.department or '',
+        'class_name': member.class_name or '',
+    }
+
+
+def card_content_hash(fields, format='png'):
+    """
+    SHA-256 of what determines a card's bytes (displayed fields and layout).
+
+    Computed without rendering, so callers can tell whether a card changed
+    before doing any work.
+    """
+    payload = json.dumps(
+        [CARD_LAYOUT_VERSION, format, fields, QR_RENDER_MODES['compact']],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def card_cache_key(fields, format='png'):
+    """Cache key for a rendered card: hash of the displayed fields and layout"""
+    return f"member_card:{card_content_hash(fields, format)}"
+
 
 def generate_qr_code_card(member, format='png'):
     """
     Generate a styled QR code card with member details.
     
+    Returns the cached card if the displayed fields haven't changed since it
+    was last rendered.
+    
     Args:
-        member: Member instance with qr_code_data
+        member: Member instance
         format: 'png' or 'pdf' - output format
     
     Returns:
-        bytes: PNG or PDF data
+        bytes: PNG or PDF data (PNG if a PDF was asked for but can't be
+               rendered; use render_qr_code_card to tell which)
+    """
+    return render_qr_code_card(member, format)[0]
+
+
+def render_qr_code_card(member, format='png'):
+    """
+    Like generate_qr_code_card, but also says which format was produced.
+    
+    Returns:
+        tuple: (card bytes, 'png' or 'pdf')
     """
+    format = format.lower()
+    fields = card_fields(member)
+    
+    if format == 'pdf':
+        key = card_cache_key(fields, 'pdf')
+        card_data = cache.get(key)
+        if card_data is not None:
+            return card_data, 'pdf'
+        card_data = _generate_pdf_card(member)
+        if card_data is not None:
+            cache.set(key, card_data, CARD_CACHE_TIMEOUT)
+            return card_data, 'pdf'
+        # Not cached as a PDF, so it's retried once PDF rendering works
+    
+    key = card_cache_key(fields, 'png')
+    card_data = cache.get(key)
+    if card_data is None:
+        card_data = render_card_png(fields)
+        cache.set(key, card_data, CARD_CACHE_TIMEOUT)
+    return card_data, 'png'
+
+
+@lru_cache(maxsize=1)
+def _load_fonts():
+    """Load the card fonts once per process (title, label, value)"""
+    try:
+        return (
+            ImageFont.truetype("arial.ttf", 24),
+            ImageFont.truetype("arial.ttf", 20),
+            ImageFont.truetype("arial.ttf", 18),
+        )
+    except (IOError, OSError):
+        # Fall back to default font
+        default_font = ImageFont.load_default()
+        return default_font, default_font, default_font
+
+
+@lru_cache(maxsize=1)
+def _base_card_template():
+    """The parts of the card that are the same for every member"""
+    title_font, _, _ = _load_fonts()
     
-    if format.lower() == 'pdf':
-        return _generate_pdf_card(member)
-    else:
-        return _generate_png_card(member)
+    img = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), color='white')
+    draw = ImageDraw.Draw(img)
+    
+    # ============ Header (Blue background) ============
+    draw.rectangle([(0, 0), (CARD_WIDTH, 60)], fill=CARD_HEADER_COLOR)
+    draw.text(
+        (CARD_WIDTH // 2, 30),
+        'Membership Card - WIS',
+        fill='white',
+        font=title_font,
+        anchor='mm'
+    )
+    return img
 
 
 def _generate_png_card(member):
     """
     Generate a PNG card with QR code and member details.
     
+    Returns:
+        bytes: PNG image data
+    """
+    return render_card_png(card_fields(member))
+
+
+def render_card_png(fields):
+    """
+    Render a PNG card from card_fields().
+    
+    Args:
+        fields: dict with full_name, member_id, department, class_name
+    
     Returns:
         bytes: PNG image data
     """
     try:
-        # Card dimensions
-        card_width = 600
-        card_height = 900
+        _, label_font, value_font = _load_fonts()
         
-        # Create new image with white background
-        img = Image.new('RGB', (card_width, card_height), color='white')
+        # Start from a copy of the preloaded background
+        img = _base_card_template().copy()
         draw = ImageDraw.Draw(img)
         
-        # Try to load fonts, fall back to default if not available
-        try:
-            # Use default system fonts
-            from PIL import ImageFont
-            title_font = ImageFont.truetype("arial.ttf", 24)
-            label_font = ImageFont.truetype("arial.ttf", 20)
-            value_font = ImageFont.truetype("arial.ttf", 18)
-        except (IOError, OSError):
-            # Fall back to default font
-            title_font = ImageFont.load_default()
-            label_font = ImageFont.load_default()
-            value_font = ImageFont.load_default()
-        
-        # ============ Header (Blue background) ============
-        header_color = (37, 99, 235)  # #2563eb
-        draw.rectangle([(0, 0), (card_width, 60)], fill=header_color)
-        
-        # Church name in header
-        header_text = 'Membership Card - WIS'
-        draw.text(
-            (card_width // 2, 30),
-            header_text,
-            fill='white',
-            font=title_font,
-            anchor='mm'
-        )
-        
         # ============ Member Information ============
         left_margin = 40
         y_pos = 100
@@ -84,7 +223,7 @@ def _generate_png_card(member):
         draw.text((left_margin, y_pos), 'Name:', fill='#333333', font=label_font)
         draw.text(
             (left_margin + 120, y_pos),
-            member.full_name.upper(),
+            fields['full_name'].upper(),
             fill='#333333',
             font=value_font
         )
@@ -94,24 +233,15 @@ def _generate_png_card(member):
         draw.text((left_margin, y_pos), 'ID:', fill='#333333', font=label_font)
         draw.text(
             (left_margin + 120, y_pos),
-            str(member.member_id),
-            fill=header_color,
+            str(fields['member_id']),
+            fill=CARD_HEADER_COLOR,
             font=value_font
         )
         y_pos += line_height
         
         # Department (if exists)
-        if member.department:
-            department_label = {
-                'technical': 'Technical',
-                'media': 'Media',
-                'echoes_of_grace': 'Echoes of Grace',
-                'celestial_harmony_choir': 'Celestial Harmony Choir',
-                'heavenly_vibes': 'Heavenly Vibes',
-                'prayer_evangelism': 'Prayer and Evangelism',
-                'visitor_care': 'Visitor Care',
-                'protocol_ushering': 'Protocol & Ushering',
-            }.get(member.department, member.department.upper())
+        if fields['department']:
+            department_label = DEPARTMENT_LABELS.get(fields['department'], fields['department'].upper())
             
             draw.text((left_margin, y_pos), 'Department:', fill='#333333', font=label_font)
             draw.text(
@@ -123,28 +253,8 @@ def _generate_png_card(member):
             y_pos += line_height
         
         # Class (if exists)
-        if member.class_name:
-            class_label = {
-                'airport': 'Airport',
-                'abesim': 'Abesim',
-                'old_abesim': 'Old Abesim',
-                'asufufu_adomako': 'Asufufu / Adomako',
-                'baakoniaba': 'Baakoniaba',
-                'berlin_top_class_1': 'Berlin Top class 1',
-                'berlin_top_class_2': 'Berlin Top class 2',
-                'penkwase_class_1': 'Penkwase class 1',
-                'penkwase_class_2': 'Penkwase class 2',
-                'mayfair': 'Mayfair',
-                'odumase': 'Odumase',
-                'new_dormaa_kotokrom': 'New Dormaa / Kotokrom',
-                'dumasua': 'Dumasua',
-                'fiapre_class_1': 'Fiapre Class 1',
-                'fiapre_class_2': 'Fiapre Class 2',
-                'magazine': 'Magazine',
-                'town_centre': 'Town Centre',
-                'newton_estate': 'Newtown/Estate',
-                'distance': 'Distance',
-            }.get(member.class_name, member.class_name)
+        if fields['class_name']:
+            class_label = CLASS_LABELS.get(fields['class_name'], fields['class_name'])
             
             draw.text((left_margin, y_pos), 'Class:', fill='#333333', font=label_font)
             draw.text(
@@ -156,18 +266,18 @@ def _generate_png_card(member):
             y_pos += line_height
         
         # ============ QR Code ============
-        if member.qr_code_data:
+        if fields['member_id']:
             try:
-                # Decode base64 QR code
-                qr_data = base64.b64decode(member.qr_code_data)
-                qr_img = Image.open(BytesIO(qr_data))
-                
-                # Resize QR code to fit card
-                qr_size = 500
-                qr_img = qr_img.resize((qr_size, qr_size), Image.Resampling.LANCZOS)
+                # Render the module grid directly (1 pixel per module, 1-bit)
+                # instead of decoding the stored PNG, then scale it up by a
+                # whole number with NEAREST so module edges stay sharp
+                qr_img = render_qr_image(fields['member_id'], QR_RENDER_MODES['compact'])
+                scale = max(1, CARD_QR_SIZE // qr_img.width)
+                qr_size = qr_img.width * scale
+                qr_img = qr_img.resize((qr_size, qr_size), Image.Resampling.NEAREST)
                 
                 # Center QR code
-                qr_x = (card_width - qr_size) // 2
+                qr_x = (CARD_WIDTH - qr_size) // 2
                 qr_y = y_pos + 40
                 
                 # Paste QR code
@@ -192,10 +302,9 @@ def _generate_pdf_card(member):
     Generate a PDF card with QR code and member details.
     
     Note: Requires weasyprint package for HTML to PDF conversion.
-    Falls back to PNG if weasyprint not available.
     
     Returns:
-        bytes: PDF data
+        bytes: PDF data, or None if weasyprint is missing or fails
     """
     try:
         from weasyprint import HTML, CSS
@@ -207,7 +316,11 @@ def _generate_pdf_card(member):
         dept_label = member.get_department_display() if hasattr(member, 'get_department_display') else member.department
         class_label = member.get_class_name_display() if hasattr(member, 'get_class_name_display') else member.class_name
         
-        qr_data_uri = f"data:image/png;base64,{member.qr_code_data}" if member.qr_code_data else ""
+        # Vector QR code: stays sharp at any print size
+        qr_data_uri = ""
+        if member.member_id:
+            qr_svg = generate_qr_code_svg(member.member_id)
+            qr_data_uri = f"data:image/svg+xml;base64,{base64.b64encode(qr_svg).decode('utf-8')}"
         
         html_template = f"""
         <!DOCTYPE html>
@@ -264,7 +377,7 @@ def _generate_pdf_card(member):
                     margin-top: 40px;
                 }}
                 .qr-section img {{
-                    max-width: 400px;
+                    width: 400px;
                     border: 2px solid #ddd;
                     padding: 10px;
                 }}
@@ -299,8 +412,7 @@ def _generate_pdf_card(member):
         
     except Exception as e:
         logger.warning(f"PDF generation failed, falling back to PNG: {str(e)}")
-        # Fall back to PNG if PDF generation fails
-        return _generate_png_card(member)
+        return None
 
 
 def get_card_as_base64(member, format='png'):
@@ -329,6 +441,7 @@ def get_card_as_data_uri(member, format='png'):
     Returns:
         str: Data URI string
     """
-    mime_type = 'image/png' if format.lower() == 'png' else 'application/pdf'
-    base64_data = get_card_as_base64(member, format)
+    card_data, format = render_qr_code_card(member, format)
+    mime_type = 'image/png' if format == 'png' else 'application/pdf'
+    base64_data = base64.b64encode(card_data).decode('utf-8')
     return f"data:{mime_type};base64,{base64_data}"
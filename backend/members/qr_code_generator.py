@@ -0,0 +1,279 @@
+"""
+QR Code Generator - Builds the plain member QR code images
+
+The QR code only encodes the member_id. Member.save() no longer renders it;
+new members are marked qr_status='pending' and generate_qr_codes() renders
+and uploads their images in batches on a worker pool, so member creation
+latency doesn't depend on image encoding or remote storage round trips.
+
+Image bytes are stored in the content-addressed QRCodeBlob table; the member
+row only keeps the SHA-256 hash (qr_code_hash).
+
+settings.QR_RENDER_MODE picks how images are rendered:
+- 'compact' (default): smallest QR version that fits the member_id, one pixel
+  per module, saved as a 1-bit PNG. Consumers scale it up by an integer
+  factor with nearest-neighbour resampling (or CSS image-rendering: pixelated).
+- 'standard': the previous 10px-per-module rendering.
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rendering parameters per QR_RENDER_MODE; part of the image ETag, so
+# changing them busts client caches. version=None picks the smallest version
+# that fits the payload.
+QR_RENDER_MODES = {
+    'compact': {
+        'version': None,
+        'error_correction': 'L',
+        'box_size': 1,
+        'border': 4,
+    },
+    'standard': {
+        'version': 1,
+        'error_correction': 'L',
+        'box_size': 10,
+        'border': 4,
+    },
+}
+
+QR_IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def get_qr_render_params():
+    """Rendering parameters for the configured QR_RENDER_MODE"""
+    mode = getattr(settings, 'QR_RENDER_MODE', 'compact')
+    return QR_RENDER_MODES.get(mode, QR_RENDER_MODES['compact'])
+
+
+def _build_qr(payload, params=None):
+    params = params or get_qr_render_params()
+    qr = qrcode.QRCode(
+        version=params['version'],
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=params['box_size'],
+        border=params['border'],
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_image(payload, params=None):
+    """
+    Render a QR code as a 1-bit PIL image.
+
+    Black-on-white images are built in PIL mode '1' by qrcode, so no RGB
+    pixel data is ever allocated.
+    """
+    return _build_qr(payload, params).make_image(fill_color="black", back_color="white").get_image()
+
+
+def generate_qr_code_png(payload):
+    """
+    Render a QR code for the given payload.
+
+    Args:
+        payload: String encoded in the QR code (the member_id)
+
+    Returns:
+        bytes: 1-bit PNG image data
+    """
+    img = render_qr_image(payload)
+
+    img_io = BytesIO()
+    img.save(img_io, format='PNG', optimize=True)
+    return img_io.getvalue()
+
+
+def upscale_qr_png(png_data, min_size):
+    """
+    Scale a QR code PNG up by an integer factor (nearest neighbour) so it is
+    at least min_size pixels wide, for consumers that would otherwise smooth
+    a compact image when enlarging it (e.g. mail clients).
+
+    Returns:
+        bytes: PNG image data (the input if it is already large enough)
+    """
+    from PIL import Image
+
+    with Image.open(BytesIO(png_data)) as img:
+        factor = -(-min_size // img.width)
+        if factor <= 1:
+            return png_data
+        scaled = img.resize((img.width * factor, img.height * factor), Image.NEAREST)
+
+    img_io = BytesIO()
+    scaled.save(img_io, format='PNG', optimize=True)
+    return img_io.getvalue()
+
+
+def generate_qr_code_svg(payload):
+    """
+    Render a QR code for the given payload as SVG.
+
+    Returns:
+        bytes: SVG document
+    """
+    from qrcode.image.svg import SvgPathImage
+
+    # Vector output: box_size only sets the nominal physical size
+    params = dict(get_qr_render_params(), box_size=10)
+    img = _build_qr(payload, params).make_image(image_factory=SvgPathImage)
+
+    img_io = BytesIO()
+    img.save(img_io)
+    return img_io.getvalue()
+
+
+def render_qr_code(payload, image_format='png'):
+    """Render a QR code in the given format ('png' or 'svg')"""
+    if image_format == 'svg':
+        return generate_qr_code_svg(payload)
+    return generate_qr_code_png(payload)
+
+
+def qr_code_etag(member_id, image_format='png'):
+    """
+    ETag for a member's QR image.
+
+    Derived from what determines the image bytes (the encoded member_id, the
+    format and the rendering parameters), so it can be computed without
+    rendering anything.
+    """
+    params = ','.join(f"{key}={value}" for key, value in sorted(get_qr_render_params().items()))
+    digest = hashlib.sha256(f"{member_id}|{image_format}|{params}".encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _render_and_upload(job):
+    """
+    Worker: render one member's QR code and upload it to the storage backend.
+
+    Runs on the pool without touching the database; the caller writes all
+    results back with a single bulk_update.
+    """
+    pk, member_id, needs_upload = job
+    try:
+        qr_png_data = generate_qr_code_png(member_id)
+
+        stored_name = None
+        if needs_upload:
+            # Saved through the configured storage (Cloudinary if configured)
+            from .models import Member
+            field = Member._meta.get_field('qr_code_image')
+            name = field.generate_filename(None, f"qr_code_{member_id}.png")
+            stored_name = field.storage.save(name, ContentFile(qr_png_data))
+
+        return pk, qr_png_data, stored_name, None
+    except Exception as e:
+        return pk, None, None, str(e)
+
+
+def generate_qr_codes(member_ids=None, limit=None, workers=None):
+    """
+    Render and upload QR codes for members whose QR code is pending.
+
+    Args:
+        member_ids: Only process these members (default: every pending member)
+        limit: Maximum number of members to process in this call
+        workers: Pool size (default: settings.QR_GENERATION_WORKERS)
+
+    Returns:
+        dict: Summary with processed, generated and failed counts
+    """
+    from .models import Member, QRCodeBlob
+
+    summary = {
+        'processed': 0,
+        'generated': 0,
+        'failed': 0,
+    }
+
+    members = Member.objects.filter(qr_status=Member.QR_STATUS_PENDING).order_by('id')
+    if member_ids is not None:
+        members = members.filter(pk__in=member_ids)
+    if limit:
+        members = members[:limit]
+
+    members = list(members.only('id', 'member_id', 'qr_code_image'))
+    if not members:
+        return summary
+
+    jobs = [(member.pk, member.member_id, not member.qr_code_image) for member in members]
+    workers = workers or getattr(settings, 'QR_GENERATION_WORKERS', 4)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        results = {pk: (data, stored_name, error) for pk, data, stored_name, error in pool.map(_render_and_upload, jobs)}
+
+    blobs = {}
+    for member in members:
+        data, stored_name, error = results[member.pk]
+        summary['processed'] += 1
+        if error:
+            logger.error(f"Error generating QR code for {member.member_id}: {error}")
+            member.qr_status = Member.QR_STATUS_FAILED
+            summary['failed'] += 1
+            continue
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        blobs[sha256] = QRCodeBlob(sha256=sha256, data=data, size=len(data), content_type='image/png')
+        member.qr_code_hash = sha256
+        if stored_name:
+            member.qr_code_image = stored_name
+        member.qr_status = Member.QR_STATUS_READY
+        member.updated_at = timezone.now()
+        summary['generated'] += 1
+
+    # One write per table for the whole batch instead of a save() per member
+    # (blobs that already exist are identical by construction, so conflicts are skipped)
+    QRCodeBlob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+    Member.objects.bulk_update(members, ['qr_code_hash', 'qr_code_image', 'qr_status', 'updated_at'], batch_size=500)
+
+    logger.info(f"QR generation batch complete. Summary: {summary}")
+    return summary
+
+
+def ensure_qr_code(member):
+    """
+    Generate a member's QR code immediately if it is still pending.
+
+    Used by endpoints that need the image right away; everything else
+    waits for the background batch.
+
+    Returns:
+        Member: The refreshed member instance
+    """
+    if member.qr_status != member.QR_STATUS_READY or not member.qr_code_hash:
+        if member.qr_status != member.QR_STATUS_PENDING:
+            type(member).objects.filter(pk=member.pk).update(qr_status=member.QR_STATUS_PENDING)
+        generate_qr_codes(member_ids=[member.pk], workers=1)
+        member.refresh_from_db(fields=['qr_code_hash', 'qr_code_image', 'qr_status'])
+    return member
+
+
+def get_qr_code_png(member):
+    """
+    Load a member's QR code PNG bytes from the blob table.
+
+    Returns:
+        bytes: PNG data, or None if the member has no QR image yet
+    """
+    from .models import QRCodeBlob
+
+    if not member.qr_code_hash:
+        return None
+    data = QRCodeBlob.objects.filter(sha256=member.qr_code_hash).values_list('data', flat=True).first()
+    return bytes(data) if data is not None else None
@@ -0,0 +1,286 @@
+"""
+QR image migration - copies members' QR code images to another storage backend
+
+Used by the migrate_qr_to_cloudinary command. Only images still in the local
+media directory are uploaded: a member whose file isn't there, or whose name
+already resolves on the target, is skipped as already migrated. With
+use_blobs (--from-blobs), members whose local file is gone are uploaded from
+their QRCodeBlob copy instead. Uploads run on a thread pool and the new
+names are written back to Member.qr_code_image one batch at a time.
+
+Progress is persisted in a QRMigrationCheckpoint row: after every batch the
+cursor moves past the highest member pk processed, so an interrupted run
+resumes where it stopped. Members whose upload failed are remembered on the
+checkpoint and can be retried.
+
+Targets (MIGRATION_TARGETS):
+- 'cloudinary': Cloudinary media storage (needs CLOUDINARY_* settings)
+- 'local':      a directory on the local filesystem, as a stand-in for tests
+                and trial runs
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from .models import Member, QRCodeBlob, QRMigrationCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Only the first failures are kept on the checkpoint, so the row stays small
+MAX_FAILED_IDS = 1000
+
+
+class QRImageTarget:
+    """Interface for a storage backend QR images are migrated to"""
+
+    name = None
+
+    def is_configured(self):
+        return True
+
+    def exists(self, name):
+        """Whether name already resolves on the target"""
+        raise NotImplementedError
+
+    def upload(self, name, data):
+        """
+        Store data under name.
+
+        Returns:
+            str: The name the file was stored under
+        """
+        raise NotImplementedError
+
+
+class DjangoStorageTarget(QRImageTarget):
+    """Any Django storage backend"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def exists(self, name):
+        return self.storage.exists(name)
+
+    def upload(self, name, data):
+        return self.storage.save(name, ContentFile(data))
+
+
+class CloudinaryTarget(DjangoStorageTarget):
+    name = 'cloudinary'
+
+    def __init__(self):
+        from cloudinary_storage.storage import MediaCloudinaryStorage
+        super().__init__(MediaCloudinaryStorage())
+
+    def is_configured(self):
+        # Cloudinary must also be the default storage, or the app would keep
+        # looking for the migrated names on local disk
+        return (all(getattr(settings, 'CLOUDINARY_STORAGE', {}).values())
+                and 'cloudinary' in getattr(settings, 'DEFAULT_FILE_STORAGE', ''))
+
+
+class LocalDirectoryTarget(DjangoStorageTarget):
+    name = 'local'
+
+    def __init__(self, location):
+        super().__init__(FileSystemStorage(location=location))
+
+
+MIGRATION_TARGETS = {
+    'cloudinary': CloudinaryTarget,
+    'local': LocalDirectoryTarget,
+}
+
+
+def get_migration_target(name, location=None):
+    """Instantiate a target from MIGRATION_TARGETS ('local' needs a location)"""
+    if name == 'local':
+        return LocalDirectoryTarget(location)
+    return MIGRATION_TARGETS[name]()
+
+
+def _local_storage():
+    # The images being migrated were written here before a remote storage was configured
+    return FileSystemStorage(location=settings.MEDIA_ROOT)
+
+
+def get_checkpoint(target_name, reset=False):
+    """The persisted progress for migrating to target_name (created if needed)"""
+    checkpoint, created = QRMigrationCheckpoint.objects.get_or_create(name=target_name)
+    if reset and not created:
+        checkpoint.last_pk = 0
+        checkpoint.migrated = 0
+        checkpoint.failed_ids = []
+        checkpoint.bytes_uploaded = 0
+        checkpoint.completed_at = None
+        checkpoint.save()
+    return checkpoint
+
+
+def members_to_migrate(checkpoint, retry_failed=False):
+    """Members with a QR image after the checkpoint cursor (plus earlier failures with retry_failed)"""
+    members = Member.objects.exclude(qr_code_image='').exclude(qr_code_image__isnull=True)
+    if retry_failed and checkpoint.failed_ids:
+        return members.filter(pk__in=checkpoint.failed_ids).order_by('pk')
+    return members.filter(pk__gt=checkpoint.last_pk).order_by('pk')
+
+
+def _read_image(member, local_storage, blobs):
+    """
+    PNG bytes for a member's QR image and whether they came from a local file.
+
+    blobs maps qr_code_hash to blob data, loaded for the batch up front so
+    workers don't query the database; it is empty unless blobs are used.
+
+    Returns:
+        (bytes or None, bool): None when there is nothing to upload
+    """
+    name = member.qr_code_image.name
+    if local_storage.exists(name):
+        with local_storage.open(name, 'rb') as f:
+            return f.read(), True
+    data = blobs.get(member.qr_code_hash)
+    if data is not None:
+        return bytes(data), False
+    return None, False
+
+
+def size_report(members, use_blobs=False):
+    """
+    What a migration of these members would upload, without uploading anything.
+
+    Returns:
+        dict: members, local_files, from_blobs, missing (not local: already
+              migrated or lost) and total_bytes
+    """
+    local_storage = _local_storage()
+    blob_sizes = {}
+    if use_blobs:
+        blob_sizes = dict(
+            QRCodeBlob.objects.filter(
+                sha256__in=members.exclude(qr_code_hash__isnull=True).values('qr_code_hash')
+            ).values_list('sha256', 'size')
+        )
+    report = {
+        'members': 0,
+        'local_files': 0,
+        'from_blobs': 0,
+        'missing': 0,
+        'total_bytes': 0,
+    }
+    for member in members.only('id', 'qr_code_image', 'qr_code_hash').iterator():
+        report['members'] += 1
+        name = member.qr_code_image.name
+        if local_storage.exists(name):
+            report['local_files'] += 1
+            report['total_bytes'] += local_storage.size(name)
+        elif member.qr_code_hash in blob_sizes:
+            report['from_blobs'] += 1
+            report['total_bytes'] += blob_sizes[member.qr_code_hash]
+        else:
+            report['missing'] += 1
+    return report
+
+
+def _migrate_one(job):
+    """
+    Worker: upload one member's image. Doesn't write to the database.
+
+    Returns:
+        (member, stored_name, local_name, size, error); stored_name is None
+        when the member is skipped (already on the target, or no local file)
+    """
+    member, target, local_storage, blobs = job
+    try:
+        data, is_local = _read_image(member, local_storage, blobs)
+        if data is None or target.exists(member.qr_code_image.name):
+            return member, None, None, 0, None
+        stored_name = target.upload(member.qr_code_image.name, data)
+        return member, stored_name, member.qr_code_image.name if is_local else None, len(data), None
+    except Exception as e:
+        return member, None, None, 0, str(e)
+
+
+def migrate_qr_images(target, checkpoint, batch_size=100, workers=8, retry_failed=False,
+                      delete_local=True, use_blobs=False, on_batch=None):
+    """
+    Upload QR images to target, resuming from the checkpoint.
+
+    Args:
+        target: QRImageTarget to upload to
+        checkpoint: QRMigrationCheckpoint for this target (see get_checkpoint)
+        batch_size: Members per batch; the checkpoint is saved after each batch
+        workers: Concurrent uploads
+        retry_failed: Only retry the members that failed in earlier runs
+        delete_local: Remove local files once they are uploaded
+        use_blobs: Upload members whose local file is gone from their QRCodeBlob copy
+        on_batch: Optional callback receiving the checkpoint after each batch
+
+    Returns:
+        QRMigrationCheckpoint: The updated checkpoint
+    """
+    local_storage = _local_storage()
+    members = members_to_migrate(checkpoint, retry_failed=retry_failed).only(
+        'id', 'member_id', 'qr_code_image', 'qr_code_hash', 'updated_at'
+    )
+    if retry_failed:
+        checkpoint.failed_ids = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        cursor = 0
+        while True:
+            batch = list(members.filter(pk__gt=cursor)[:batch_size])
+            if not batch:
+                break
+            cursor = batch[-1].pk
+            blobs = {}
+            if use_blobs:
+                blobs = dict(QRCodeBlob.objects.filter(
+                    sha256__in=[member.qr_code_hash for member in batch if member.qr_code_hash]
+                ).values_list('sha256', 'data'))
+
+            migrated = []
+            local_names = []
+            for member, stored_name, local_name, size, error in pool.map(
+                _migrate_one, [(member, target, local_storage, blobs) for member in batch]
+            ):
+                if error:
+                    logger.warning(f"Could not migrate QR image for {member.member_id}: {error}")
+                    if len(checkpoint.failed_ids) < MAX_FAILED_IDS:
+                        checkpoint.failed_ids.append(member.pk)
+                    continue
+                if stored_name is None:
+                    continue
+                member.qr_code_image = stored_name
+                member.updated_at = timezone.now()
+                migrated.append(member)
+                checkpoint.bytes_uploaded += size
+                if local_name:
+                    local_names.append(local_name)
+
+            Member.objects.bulk_update(migrated, ['qr_code_image', 'updated_at'])
+            checkpoint.migrated += len(migrated)
+            if not retry_failed:
+                checkpoint.last_pk = max(checkpoint.last_pk, cursor)
+            checkpoint.save()
+
+            # Only after the new names are saved, so an interrupted run never loses an image
+            if delete_local:
+                for name in local_names:
+                    try:
+                        local_storage.delete(name)
+                    except OSError:
+                        pass
+
+            if on_batch:
+                on_batch(checkpoint)
+
+    if not checkpoint.failed_ids and not members_to_migrate(checkpoint).exists():
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=['completed_at', 'updated_at'])
+    return checkpoint
@@ -0,0 +1,238 @@
+"""
+Member search - typeahead lookup by name, member ID and phone
+
+Used by the autocomplete endpoint (scanner manual entry, members page), so
+clients no longer download the whole member list to filter it themselves.
+Only a handful of fields are returned per match (AUTOCOMPLETE_FIELDS).
+
+The lookup uses an index on every backend:
+- PostgreSQL: pg_trgm GIN indexes on upper(full_name), upper(member_id) and
+  phone; matches are ranked by trigram word similarity.
+- SQLite: an FTS5 table (members_member_fts) kept in sync by triggers;
+  every typed word is matched as a prefix and ranked with bm25.
+- Anything else (or SQLite built without FTS5): istartswith lookups.
+
+The indexes are created by migration 0020 (create_search_index, which
+fails the migration if a statement fails) and re-checked after every
+migrate (ensure_search_index, best effort), since SQLite drops triggers
+whenever a migration rebuilds the member table.
+"""
+
+import logging
+import re
+
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+from .models import Member
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_FIELDS = (
+    'id', 'member_id', 'full_name', 'phone', 'email', 'sex', 'department', 'class_name', 'is_visitor'
+)
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+
+FTS_TABLE = 'members_member_fts'
+FTS_COLUMNS = ('full_name', 'member_id', 'phone')
+FTS_TRIGGERS = {
+    'members_member_fts_ai': (
+        "AFTER INSERT ON members_member BEGIN "
+        "INSERT INTO members_member_fts(rowid, full_name, member_id, phone) "
+        "VALUES (new.id, new.full_name, new.member_id, new.phone); END"
+    ),
+    'members_member_fts_ad': (
+        "AFTER DELETE ON members_member BEGIN "
+        "INSERT INTO members_member_fts(members_member_fts, rowid, full_name, member_id, phone) "
+        "VALUES ('delete', old.id, old.full_name, old.member_id, old.phone); END"
+    ),
+    'members_member_fts_au': (
+        "AFTER UPDATE OF full_name, member_id, phone ON members_member BEGIN "
+        "INSERT INTO members_member_fts(members_member_fts, rowid, full_name, member_id, phone) "
+        "VALUES ('delete', old.id, old.full_name, old.member_id, old.phone); "
+        "INSERT INTO members_member_fts(rowid, full_name, member_id, phone) "
+        "VALUES (new.id, new.full_name, new.member_id, new.phone); END"
+    ),
+}
+
+POSTGRES_INDEXES = {
+    'members_member_name_trgm_idx': 'upper(full_name) gin_trgm_ops',
+    'members_member_id_trgm_idx': 'upper(member_id) gin_trgm_ops',
+    'members_member_phone_trgm_idx': 'phone gin_trgm_ops',
+}
+
+
+# ============ Index setup ============
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute("PRAGMA compile_options")
+    return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def create_search_index(db_connection=None):
+    """
+    Create the search index for the connection's backend if it is missing.
+
+    Safe to run repeatedly. On SQLite the FTS table is rebuilt from the
+    member table whenever a trigger had to be (re)created. SQLite builds
+    without FTS5 are skipped (search uses the istartswith fallback).
+
+    Raises:
+        DatabaseError: A statement failed, e.g. CREATE EXTENSION pg_trgm by a
+            role that may not create extensions (have an administrator run
+            it once, then migrate again)
+    """
+    db_connection = db_connection or connection
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for name, expression in POSTGRES_INDEXES.items():
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON members_member USING gin ({expression})")
+        elif db_connection.vendor == 'sqlite':
+            if not _sqlite_has_fts5(cursor):
+                logger.info("SQLite was built without FTS5; member search uses plain lookups")
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(FTS_COLUMNS)}, content='members_member', content_rowid='id', "
+                "tokenize='unicode61', prefix='1 2 3')"
+            )
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'members_member'")
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in FTS_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(f"CREATE TRIGGER {name} {FTS_TRIGGERS[name]}")
+            if missing:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def ensure_search_index(db_connection=None):
+    """
+    Best-effort create_search_index() for the post_migrate hook. A failure
+    is rolled back to a savepoint and logged; search still works through
+    the istartswith fallback.
+    """
+    db_connection = db_connection or connection
+    try:
+        with transaction.atomic(using=db_connection.alias):
+            create_search_index(db_connection)
+    except DatabaseError as e:
+        logger.warning(f"Could not create the member search index: {str(e)}")
+
+
+def drop_search_index(db_connection=None):
+    db_connection = db_connection or connection
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            for name in POSTGRES_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        elif db_connection.vendor == 'sqlite':
+            for name in FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+# ============ Search ============
+
+def _rank(query):
+    """Exact member ID first, then member ID / name / surname prefix matches"""
+    return Case(
+        When(member_id_upper=query, then=Value(0)),
+        When(member_id_upper__startswith=query, then=Value(1)),
+        When(full_name_upper__startswith=query, then=Value(2)),
+        When(full_name_upper__contains=f' {query}', then=Value(3)),
+        default=Value(4),
+        output_field=IntegerField(),
+    )
+
+
+def _annotated(members):
+    return members.annotate(full_name_upper=Upper('full_name'), member_id_upper=Upper('member_id'))
+
+
+def _search_postgres(members, query, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    query = query.upper()
+    members = _annotated(members).filter(
+        Q(full_name_upper__contains=query) | Q(member_id_upper__contains=query) | Q(phone__contains=query)
+    )
+    return list(
+        members.annotate(rank=_rank(query), similarity=TrigramWordSimilarity(query, 'full_name_upper'))
+        .order_by('rank', '-similarity', 'full_name')
+        .values(*AUTOCOMPLETE_FIELDS)[:limit]
+    )
+
+
+def _fts_match(query):
+    # Every word must match as a prefix; words are quoted so FTS5 syntax is never interpreted
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _search_sqlite(members, query, limit):
+    match = _fts_match(query)
+    if not match:
+        return []
+
+    # Over-fetch so the visitor filter and re-ranking still leave `limit` results
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, 4.0, 8.0, 1.0) LIMIT %s",
+            [match, limit * 4],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+    position = {pk: index for index, pk in enumerate(ids)}
+    query = query.upper()
+    rows = _annotated(members.filter(pk__in=ids)).annotate(rank=_rank(query)).values(*AUTOCOMPLETE_FIELDS, 'rank')
+    rows = sorted(rows, key=lambda row: (row['rank'], position[row['id']]))[:limit]
+    for row in rows:
+        del row['rank']
+    return rows
+
+
+def _search_fallback(members, query, limit):
+    query = query.upper()
+    members = _annotated(members).filter(
+        Q(full_name_upper__startswith=query) | Q(full_name_upper__contains=f' {query}') |
+        Q(member_id_upper__startswith=query) | Q(phone__startswith=query)
+    )
+    return list(
+        members.annotate(rank=_rank(query)).order_by('rank', 'full_name').values(*AUTOCOMPLETE_FIELDS)[:limit]
+    )
+
+
+def search_members(query, limit=AUTOCOMPLETE_DEFAULT_LIMIT, include_visitors=True):
+    """
+    Find members whose name, member ID or phone match what was typed.
+
+    Args:
+        query: Search text (name words, member ID or phone prefix)
+        limit: Maximum number of results (capped at AUTOCOMPLETE_MAX_LIMIT)
+        include_visitors: Also return visitors
+
+    Returns:
+        list: Dicts with AUTOCOMPLETE_FIELDS, best match first
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+
+    members = Member.objects.all()
+    if not include_visitors:
+        members = members.filter(is_visitor=False)
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(members, query, limit)
+    if connection.vendor == 'sqlite':
+        try:
+            return _search_sqlite(members, query, limit)
+        except OperationalError as e:
+            # FTS5 missing (or the table wasn't created); fall back to plain lookups
+            logger.warning(f"Member FTS search unavailable: {str(e)}")
+    return _search_fallback(members, query, limit)
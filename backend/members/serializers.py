@@ -1,9 +1,30 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Member, MemberAlert, ContactLog, MemberAbsenteeismMetric, MemberAbsenteeismAlert, InvitationCode
+from .models import (
+    Member, MemberAlert, ContactLog, MemberAbsenteeismMetric, MemberAbsenteeismAlert, InvitationCode, MessageJob
+)
+
+
+def qr_code_image_url(obj, request=None):
+    """
+    URL of a member's QR code image.
+    
+    Points at the content-addressed blob endpoint (cacheable forever, served
+    from our own origin so there are no CORS/CORB issues); falls back to the
+    storage URL if the image hasn't been stored as a blob.
+    """
+    if obj.qr_code_hash:
+        url = reverse('qr-code-blob', kwargs={'qr_hash': obj.qr_code_hash})
+        return request.build_absolute_uri(url) if request else url
+    elif obj.qr_code_image:
+        return obj.qr_code_image.url
+    return None
 
 
 class MemberSerializer(serializers.ModelSerializer):
-    # Override qr_code_image to return base64 data (or URL if data unavailable)
+    # Override qr_code_image to return the blob URL (or storage URL if no blob)
     qr_code_image = serializers.SerializerMethodField()
     
     class Meta:
@@ -26,7 +47,8 @@ class MemberSerializer(serializers.ModelSerializer):
             'baptised',
             'confirmed',
             'qr_code_image',
-            'qr_code_data',
+            'qr_code_hash',
+            'qr_status',
             'consecutive_absences',
             'last_attendance_date',
             'attendance_status',
@@ -35,18 +57,13 @@ class MemberSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'member_id', 'qr_code_image', 'qr_code_data', 'created_at', 'updated_at', 
+        read_only_fields = ['id', 'member_id', 'qr_code_image', 'qr_code_hash', 'qr_status', 'created_at', 'updated_at', 
                            'consecutive_absences', 'last_attendance_date', 'attendance_status', 
                            'engagement_score', 'last_contact_date']
     
     def get_qr_code_image(self, obj):
-        """Return base64 QR code data if available, otherwise return URL.
-        This avoids CORS/CORB issues when displaying images from different origins."""
-        if obj.qr_code_data:
-            return f"data:image/png;base64,{obj.qr_code_data}"
-        elif obj.qr_code_image:
-            return obj.qr_code_image.url
-        return None
+        """Return the QR code image URL (the PNG is no longer inlined as base64)"""
+        return qr_code_image_url(obj, self.context.get('request'))
     
     def validate_full_name(self, value):
         """Validate that full_name is not empty and not duplicated"""
@@ -94,43 +111,83 @@ class MemberSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        """Create member and trigger QR code generation"""
-        member = Member.objects.create(**validated_data)
+        """Create member; QR code generation and email are queued by the post_save signal"""
+        # The outbox email row is written in the same transaction as the member
+        with transaction.atomic():
+            member = Member.objects.create(**validated_data)
         return member
 
 
+class MemberImportRowSerializer(MemberSerializer):
+    """
+    Validates a single row of a bulk member import.
+    
+    Duplicate emails are checked for the whole file with one set-based query
+    in import_service, so the per-row database lookup is skipped here.
+    """
+    
+    def validate_email(self, value):
+        if value:
+            return value.lower().strip()
+        return value
+
+
 class MemberDetailSerializer(serializers.ModelSerializer):
     alerts = serializers.SerializerMethodField()
     absenteeism_alerts = serializers.SerializerMethodField()
     absenteeism_metric = serializers.SerializerMethodField()
     recent_contacts = serializers.SerializerMethodField()
     attendance_history = serializers.SerializerMethodField()
-    # Override qr_code_image to return base64 data (or URL if data unavailable)
+    # Override qr_code_image to return the blob URL (or storage URL if no blob)
     qr_code_image = serializers.SerializerMethodField()
     
     class Meta:
         model = Member
         fields = '__all__'
-        read_only_fields = ['id', 'member_id', 'qr_code_image', 'qr_code_data', 'created_at', 'updated_at',
+        read_only_fields = ['id', 'member_id', 'qr_code_image', 'qr_code_hash', 'qr_status', 'created_at', 'updated_at',
                            'consecutive_absences', 'last_attendance_date', 'attendance_status',
                            'engagement_score', 'last_contact_date', 'current_absenteeism_ratio']
     
     def get_qr_code_image(self, obj):
-        """Return base64 QR code data if available, otherwise return URL.
-        This avoids CORS/CORB issues when displaying images from different origins."""
-        if obj.qr_code_data:
-            return f"data:image/png;base64,{obj.qr_code_data}"
-        elif obj.qr_code_image:
-            return obj.qr_code_image.url
-        return None
+        """Return the QR code image URL (the PNG is no longer inlined as base64)"""
+        return qr_code_image_url(obj, self.context.get('request'))
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything the serializer needs in a constant number of queries,
+        however many members are serialized (one per related table).
+        """
+        from attendance.models import Attendance
+        
+        return queryset.select_related('absenteeism_metric').prefetch_related(
+            Prefetch('alerts', queryset=MemberAlert.objects.filter(is_resolved=False), to_attr='unresolved_alerts'),
+            Prefetch(
+                'absenteeism_alerts',
+                queryset=MemberAbsenteeismAlert.objects.filter(is_resolved=False),
+                to_attr='unresolved_absenteeism_alerts',
+            ),
+            Prefetch('contact_logs', queryset=ContactLog.objects.all()[:5], to_attr='recent_contact_logs'),
+            Prefetch(
+                'attendances',
+                queryset=Attendance.objects.select_related('service').order_by('-service__date')[:10],
+                to_attr='recent_attendances',
+            ),
+        )
     
     def get_alerts(self, obj):
-        alerts = obj.alerts.filter(is_resolved=False)
+        alerts = getattr(obj, 'unresolved_alerts', None)
+        if alerts is None:
+            alerts = obj.alerts.filter(is_resolved=False)
         return MemberAlertSerializer(alerts, many=True).data
     
     def get_absenteeism_alerts(self, obj):
         """Get the latest unresolved absenteeism alert"""
-        alert = obj.absenteeism_alerts.filter(is_resolved=False).first()
+        if hasattr(obj, 'unresolved_absenteeism_alerts'):
+            alerts = obj.unresolved_absenteeism_alerts
+            alert = alerts[0] if alerts else None
+        else:
+            alert = obj.absenteeism_alerts.filter(is_resolved=False).first()
         if alert:
             return MemberAbsenteeismAlertSerializer(alert).data
         return None
@@ -144,14 +201,18 @@ class MemberDetailSerializer(serializers.ModelSerializer):
             return None
     
     def get_recent_contacts(self, obj):
-        contacts = obj.contact_logs.all()[:5]
+        contacts = getattr(obj, 'recent_contact_logs', None)
+        if contacts is None:
+            contacts = obj.contact_logs.all()[:5]
         return ContactLogSerializer(contacts, many=True).data
     
     def get_attendance_history(self, obj):
         """Get recent attendance records for display in care dashboard"""
         from attendance.models import Attendance
-        # Get last 10 attendance records
-        attendances = Attendance.objects.filter(member=obj).order_by('-service__date')[:10]
+        # Last 10 attendance records (prefetched by setup_eager_loading)
+        attendances = getattr(obj, 'recent_attendances', None)
+        if attendances is None:
+            attendances = Attendance.objects.filter(member=obj).select_related('service').order_by('-service__date')[:10]
         return AttendanceDetailSerializer(attendances, many=True).data
 
 
@@ -177,7 +238,7 @@ class AttendanceDetailSerializer(serializers.Serializer):
         return obj.service.date
     
     def get_service_is_recurring(self, obj):
-        return obj.service.parent_service is not None
+        return obj.service.parent_service_id is not None
 
 
 class MemberAlertSerializer(serializers.ModelSerializer):
@@ -326,4 +387,33 @@ class InvitationCodeSerializer(serializers.ModelSerializer):
                 return super().create(validated_data)
         
         # If we couldn't generate a unique code after max_attempts, raise an error
-        raise serializers.ValidationError("Failed to generate a unique invitation code. Please try again.")
\ No newline at end of file
+        raise serializers.ValidationError("Failed to generate a unique invitation code. Please try again.")
+
+
+class MessageJobSerializer(serializers.ModelSerializer):
+    progress_percentage = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = MessageJob
+        fields = [
+            'id',
+            'channel',
+            'status',
+            'total',
+            'processed',
+            'sent',
+            'failed',
+            'progress_percentage',
+            'errors',
+            'last_error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+    
+    def get_progress_percentage(self, obj):
+        """Return progress as percentage"""
+        if not obj.total:
+            return 100.0
+        return round(obj.processed / obj.total * 100, 1)
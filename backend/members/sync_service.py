@@ -0,0 +1,97 @@
+"""
+Delta sync - members and services changed since a client's last sync
+
+Backs GET /api/sync/?since=<cursor>. Scanner and dashboard clients keep a
+local copy of the member and service lists and refresh it with only what
+changed, instead of paging through both lists again:
+
+1. First sync (no cursor): every member and service, plus a cursor.
+2. Later syncs: rows whose updated_at is at or after the cursor, and the
+   ids deleted since then (SyncTombstone rows written by post_delete
+   signals). Clients upsert the rows, drop the deleted ids and keep the
+   new cursor.
+
+The cursor is the server time of the previous sync minus CURSOR_OVERLAP,
+so rows saved by transactions that committed just after that sync read the
+tables are sent (again) next time; upserts make the repeats harmless.
+Tombstones are pruned after SYNC_TOMBSTONE_RETENTION_DAYS, so a cursor older
+than that gets a full sync ('full': true) and clients replace their copy.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from services.models import Service
+from services.serializers import ServiceSerializer
+
+from .models import Member, SyncTombstone
+from .serializers import MemberSerializer
+
+CURSOR_OVERLAP = timedelta(seconds=30)
+
+
+def encode_cursor(moment):
+    """Opaque cursor for a point in time (microseconds since the epoch)"""
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    """
+    Point in time for a cursor from encode_cursor.
+
+    Raises:
+        ValueError: The cursor is malformed
+    """
+    return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+
+
+def _retention_cutoff(now):
+    return now - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+
+def build_sync(since=None, request=None):
+    """
+    Members and services changed (or deleted) since a cursor.
+
+    Args:
+        since: Cursor from a previous sync, or None for everything
+        request: Passed to the serializers for absolute URLs
+
+    Returns:
+        dict: cursor, full, members, services, deleted ({'members': [...], 'services': [...]})
+
+    Raises:
+        ValueError: since is not a valid cursor
+    """
+    now = timezone.now()
+    since_at = decode_cursor(since) if since else None
+    if since_at is not None and since_at < _retention_cutoff(now):
+        # Deletions that old may have been pruned; start over
+        since_at = None
+
+    members = Member.objects.order_by('id')
+    services = Service.objects.order_by('id')
+    deleted = {'members': [], 'services': []}
+    if since_at is not None:
+        members = members.filter(updated_at__gte=since_at)
+        services = services.filter(updated_at__gte=since_at)
+        tombstones = SyncTombstone.objects.filter(deleted_at__gte=since_at).values_list('kind', 'object_id')
+        for kind, object_id in tombstones:
+            deleted[f'{kind}s'].append(object_id)
+
+    context = {'request': request}
+    return {
+        'cursor': encode_cursor(now - CURSOR_OVERLAP),
+        'full': since_at is None,
+        'members': MemberSerializer(members, many=True, context=context).data,
+        'services': ServiceSerializer(services, many=True, context=context).data,
+        'deleted': deleted,
+    }
+
+
+def prune_tombstones():
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS; returns how many"""
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=_retention_cutoff(timezone.now())).delete()
+    return deleted
@@ -0,0 +1,197 @@
+"""
+Background tasks for member workflows.
+"""
+import logging
+from threading import Thread
+
+from celery import shared_task
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_member_onboarding(member_ids, send_email=True):
+    """
+    Start a best-effort background batch that generates QR codes and delivers
+    queued QR code emails for newly created members.
+
+    Member creation (single or bulk import) only records the member with
+    qr_status='pending' and queues its email in the EmailOutbox. The QR image,
+    storage upload and email delivery happen here, after the response has been
+    returned. Anything lost to a restart is picked up by
+    generate_pending_qr_codes_async and dispatch_email_outbox_async.
+    """
+    thread = Thread(
+        target=_run_member_onboarding,
+        args=(list(member_ids), send_email),
+        daemon=True,
+    )
+    thread.start()
+
+
+def _run_member_onboarding(member_ids, send_email):
+    try:
+        close_old_connections()
+        process_member_onboarding(member_ids, send_email=send_email)
+    except Exception:
+        logger.exception("Error onboarding %s new members", len(member_ids))
+    finally:
+        close_old_connections()
+
+
+def process_member_onboarding(member_ids, send_email=True):
+    """
+    Generate pending QR codes and deliver queued QR code emails for a batch of members.
+
+    Args:
+        member_ids: Primary keys of the members to process
+        send_email: Whether to deliver the members' queued outbox emails now
+                    (otherwise they go out with the next periodic dispatch)
+
+    Returns:
+        dict: Summary with qr_generated, emails_sent and emails_failed counts
+    """
+    from .qr_code_generator import generate_qr_codes
+    from .email_outbox import dispatch_email_outbox
+
+    qr_summary = generate_qr_codes(member_ids=member_ids)
+
+    summary = {
+        'members_processed': len(member_ids),
+        'qr_generated': qr_summary['generated'],
+        'qr_failed': qr_summary['failed'],
+        'emails_sent': 0,
+        'emails_failed': 0,
+    }
+
+    if send_email:
+        # One SMTP connection per batch instead of one per member
+        while True:
+            email_summary = dispatch_email_outbox(member_ids=member_ids)
+            summary['emails_sent'] += email_summary['sent']
+            summary['emails_failed'] += email_summary['retrying'] + email_summary['failed']
+            if not email_summary['processed']:
+                break
+
+    logger.info(f"Member onboarding batch complete. Summary: {summary}")
+    return summary
+
+
+@shared_task(bind=True)
+def process_member_onboarding_async(self, member_ids, send_email=True):
+    """
+    Celery entry point for the onboarding batch (QR codes + welcome emails).
+    """
+    try:
+        return process_member_onboarding(member_ids, send_email=send_email)
+    except Exception as exc:
+        logger.error(f"Error in process_member_onboarding_async: {str(exc)}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True)
+def generate_pending_qr_codes_async(self, limit=500):
+    """
+    Periodic safety net: render QR codes still pending (e.g. after a restart
+    killed the background thread that was generating them).
+    """
+    try:
+        from .qr_code_generator import generate_qr_codes
+        return generate_qr_codes(limit=limit)
+    except Exception as exc:
+        logger.error(f"Error in generate_pending_qr_codes_async: {str(exc)}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True)
+def dispatch_email_outbox_async(self, limit=None):
+    """
+    Periodic delivery of queued emails (new messages and due retries).
+    """
+    try:
+        from .email_outbox import dispatch_email_outbox
+        return dispatch_email_outbox(limit=limit)
+    except Exception as exc:
+        logger.error(f"Error in dispatch_email_outbox_async: {str(exc)}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True)
+def prune_sync_tombstones_async(self):
+    """
+    Periodic cleanup of deletion records older than the sync retention window.
+    """
+    try:
+        from .sync_service import prune_tombstones
+        return prune_tombstones()
+    except Exception as exc:
+        logger.error(f"Error in prune_sync_tombstones_async: {str(exc)}", exc_info=True)
+        raise
+
+
+def schedule_message_job(job_id, **options):
+    """
+    Run a bulk messaging job (members.campaign_service) in the background:
+    on a Celery worker when settings.MESSAGE_JOBS_USE_CELERY is set,
+    otherwise (or if the broker can't be reached) in a background thread.
+
+    The job's progress is stored on its MessageJob row, so the request that
+    started it can return the job ID immediately. Jobs lost with the thread
+    or worker are picked up by resume_message_jobs_async.
+    """
+    if getattr(settings, 'MESSAGE_JOBS_USE_CELERY', False):
+        try:
+            run_message_job_async.delay(job_id, **options)
+            return
+        except Exception:
+            logger.exception("Could not queue message job %s on Celery, running it in a thread", job_id)
+
+    thread = Thread(
+        target=_run_message_job,
+        args=(job_id,),
+        kwargs=options,
+        daemon=True,
+    )
+    thread.start()
+
+
+def _run_message_job(job_id, **options):
+    try:
+        close_old_connections()
+        from .campaign_service import run_message_job
+        run_message_job(job_id, **options)
+    except Exception:
+        logger.exception("Error running message job %s", job_id)
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True)
+def run_message_job_async(self, job_id, **options):
+    """
+    Celery entry point for a bulk messaging job.
+    """
+    try:
+        from .campaign_service import run_message_job
+        return run_message_job(job_id, **options).status
+    except Exception as exc:
+        logger.error(f"Error in run_message_job_async: {str(exc)}", exc_info=True)
+        raise
+
+
+@shared_task(bind=True)
+def resume_message_jobs_async(self):
+    """
+    Periodic task: run message jobs that were never started or whose
+    runner stopped (e.g. the web process restarted mid-campaign).
+    """
+    try:
+        from .campaign_service import resume_stale_message_jobs
+        job_ids = resume_stale_message_jobs()
+        for job_id in job_ids:
+            run_message_job_async.delay(job_id)
+        return job_ids
+    except Exception as exc:
+        logger.error(f"Error in resume_message_jobs_async: {str(exc)}", exc_info=True)
+        raise
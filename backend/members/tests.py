@@ -1,22 +1,34 @@
 from django.test import TestCase
 from .models import Member
 import base64
+import io
 from rest_framework.test import APIRequestFactory
 from .views import MemberViewSet
 
 
 class QRCodeDataTests(TestCase):
     def test_qr_code_data_generated(self):
-        # creating a member should automatically generate base64 QR data
+        from .qr_code_generator import generate_qr_codes
+
+        # creating a member queues QR generation instead of rendering in save()
         m = Member.objects.create(full_name="Test User")
-        self.assertIsNotNone(m.qr_code_data)
-        # ensure it's valid PNG base64
-        decoded = base64.b64decode(m.qr_code_data)
-        self.assertTrue(decoded.startswith(b"\x89PNG"))
+        self.assertEqual(m.qr_status, Member.QR_STATUS_PENDING)
+        self.assertIsNone(m.qr_code_hash)
+
+        summary = generate_qr_codes(member_ids=[m.pk])
+        self.assertEqual(summary['generated'], 1)
+
+        m.refresh_from_db()
+        self.assertEqual(m.qr_status, Member.QR_STATUS_READY)
+        self.assertTrue(m.qr_code_image)
+        # the PNG lives in the blob table, keyed by its hash
+        from .qr_code_generator import get_qr_code_png
+        self.assertTrue(get_qr_code_png(m).startswith(b"\x89PNG"))
 
     def test_qr_code_api_returns_base64(self):
         m = Member.objects.create(full_name="API User")
-        self.assertTrue(m.qr_code_data)
+        # still pending: the endpoint renders it on demand
+        self.assertFalse(m.qr_code_hash)
 
         # use API client so URL routing matches actual endpoints
         from rest_framework.test import APIClient
@@ -26,4 +38,667 @@ class QRCodeDataTests(TestCase):
         # so it's included via the simple router
         self.assertEqual(response.status_code, 200, msg=response.content if response.status_code != 200 else '')
         self.assertIn('qr_code_base64', response.data)
+        decoded = base64.b64decode(response.data['qr_code_base64'])
+        self.assertTrue(decoded.startswith(b"\x89PNG"))
+
+    def test_qr_blob_is_cacheable_and_not_inlined(self):
+        from rest_framework.test import APIClient
+        from .qr_code_generator import generate_qr_codes
+
+        m = Member.objects.create(full_name="Blob User", phone="0240000000")
+        generate_qr_codes(member_ids=[m.pk])
+        m.refresh_from_db()
+
+        client = APIClient()
+        # list payloads carry a URL, not the base64 image
+        detail = client.get(f'/api/members/{m.pk}/')
+        self.assertEqual(detail.data['qr_code_hash'], m.qr_code_hash)
+        self.assertTrue(detail.data['qr_code_image'].endswith(f'/api/members/qr/{m.qr_code_hash}.png'))
+
+        response = client.get(f'/api/members/qr/{m.qr_code_hash}.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        revalidate = client.get(f'/api/members/qr/{m.qr_code_hash}.png', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidate.status_code, 304)
+
+
+    def test_qr_image_endpoint_sends_raw_bytes_with_etag(self):
+        from rest_framework.test import APIClient
+
+        m = Member.objects.create(full_name="Image User", phone="0240000000")
+        client = APIClient()
+
+        png = client.get(f'/api/members/{m.pk}/qr.png')
+        self.assertEqual(png.status_code, 200)
+        self.assertEqual(png['Content-Type'], 'image/png')
+        self.assertTrue(png.content.startswith(b"\x89PNG"))
+        self.assertIn('immutable', png['Cache-Control'])
+
+        svg = client.get(f'/api/members/{m.pk}/qr.svg')
+        self.assertEqual(svg['Content-Type'], 'image/svg+xml')
+        self.assertNotEqual(svg['ETag'], png['ETag'])
+
+        revalidate = client.get(f'/api/members/{m.pk}/qr.png', HTTP_IF_NONE_MATCH=png['ETag'])
+        self.assertEqual(revalidate.status_code, 304)
+
+    def test_compact_mode_renders_one_bit_module_grid(self):
+        from io import BytesIO
+        from PIL import Image
+        from .qr_card_generator import generate_qr_code_card
+        from .qr_code_generator import generate_qr_code_png
+
+        with self.settings(QR_RENDER_MODE='compact'):
+            compact = generate_qr_code_png("WIS-2026-0001")
+        with self.settings(QR_RENDER_MODE='standard'):
+            standard = generate_qr_code_png("WIS-2026-0001")
+
+        img = Image.open(BytesIO(compact))
+        self.assertEqual(img.mode, '1')
+        # version 1 is 21 modules plus a 4-module border on each side
+        self.assertEqual(img.size, (29, 29))
+        self.assertLess(len(compact), len(standard))
+
+        card = Image.open(BytesIO(generate_qr_code_card(Member(full_name="Card User", member_id="WIS-2026-0001"))))
+        self.assertEqual(card.size, (600, 900))
+
+    def test_email_sends_compact_qr_code_scaled_up(self):
+        from io import BytesIO
+        from PIL import Image
+        from .email_service import EMAIL_QR_SIZE, build_qr_code_email
+
+        member = Member.objects.create(full_name="Mail User", email="mail@example.com")
+        email = build_qr_code_email(member)
+        qr_png = next(content for name, content, _ in email.attachments if name.startswith('qr_code_'))
+        qr = Image.open(BytesIO(qr_png))
+        self.assertEqual(qr.mode, '1')
+        self.assertGreaterEqual(qr.width, EMAIL_QR_SIZE)
+
+    def test_card_is_cached_by_displayed_fields(self):
+        from django.core.cache import cache
+        from .qr_card_generator import card_cache_key, card_fields, generate_qr_code_card
+
+        cache.clear()
+        member = Member(full_name="Cached User", member_id="WIS-2026-0002", department="media")
+        first = generate_qr_code_card(member)
+        key = card_cache_key(card_fields(member))
+        self.assertEqual(cache.get(key), first)
+        self.assertEqual(generate_qr_code_card(member), first)
+
+        # fields not printed on the card don't invalidate it; printed ones do
+        member.phone = "0240000000"
+        self.assertEqual(card_cache_key(card_fields(member)), key)
+        member.department = "technical"
+        self.assertNotEqual(card_cache_key(card_fields(member)), key)
+
+
+
+    def test_pdf_fallback_is_returned_and_cached_as_png(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from .qr_card_generator import card_cache_key, card_fields, get_card_as_data_uri, render_qr_code_card
+
+        cache.clear()
+        member = Member(full_name="Pdf User", member_id="WIS-2026-0003")
+        with mock.patch('members.qr_card_generator._generate_pdf_card', return_value=None):
+            card, card_format = render_qr_code_card(member, format='pdf')
+            self.assertTrue(get_card_as_data_uri(member, format='pdf').startswith('data:image/png;base64,'))
+        self.assertEqual(card_format, 'png')
+        self.assertTrue(card.startswith(b'\x89PNG'))
+        self.assertIsNone(cache.get(card_cache_key(card_fields(member), 'pdf')))
+        self.assertEqual(cache.get(card_cache_key(card_fields(member), 'png')), card)
+
+class MemberIdAllocatorTests(TestCase):
+    def test_reserve_block_continues_existing_sequence(self):
+        from django.utils import timezone
+        from .utils import reserve_member_ids
+
+        year = timezone.now().year
+        Member.objects.create(full_name="Existing Member", member_id=f"WIS-{year}-0041")
+
+        ids = reserve_member_ids(3)
+        self.assertEqual(ids, [f"WIS-{year}-0042", f"WIS-{year}-0043", f"WIS-{year}-0044"])
+
+        # Single creations continue after the reserved block
+        member = Member.objects.create(full_name="Next Member")
+        self.assertEqual(member.member_id, f"WIS-{year}-0045")
+
+    def test_sequences_are_kept_per_year(self):
+        from .utils import reserve_member_ids
+
+        self.assertEqual(reserve_member_ids(2, year=2030), ["WIS-2030-0001", "WIS-2030-0002"])
+        self.assertEqual(reserve_member_ids(1, year=2031), ["WIS-2031-0001"])
+        self.assertEqual(reserve_member_ids(1, year=2030), ["WIS-2030-0003"])
+
+
+class MemberImportTests(TestCase):
+    def test_csv_import_validates_rows_and_defers_qr_generation(self):
+        import io
+        from .import_service import read_member_rows, import_members
+        from .tasks import process_member_onboarding
+
+        Member.objects.create(full_name="Already Here", email="taken@example.com")
+
+        csv_file = io.BytesIO(
+            b"Full Name,Email,Phone,Department,Class\n"
+            b"Ama Mensah,ama@example.com,0240000001,Media,Mayfair\n"
+            b"Kofi Taken,TAKEN@example.com,0240000002,,\n"
+            b",nobody@example.com,0240000003,,\n"
+            b"Ama Twin,ama@example.com,0240000004,,\n"
+        )
+        rows = read_member_rows(csv_file, "members.csv")
+        summary = import_members(rows)
+
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual([error['row'] for error in summary['errors']], [3, 4, 5])
+
+        member = Member.objects.get(email="ama@example.com")
+        self.assertEqual(member.department, "media")
+        self.assertEqual(member.class_name, "mayfair")
+        self.assertTrue(member.member_id.startswith("WIS-"))
+        # QR codes come from the onboarding batch, not the import request
+        self.assertEqual(member.qr_status, Member.QR_STATUS_PENDING)
+        self.assertIsNone(member.qr_code_hash)
+
+        result = process_member_onboarding(summary['created_ids'], send_email=False)
+        self.assertEqual(result['qr_generated'], 1)
+        member.refresh_from_db()
+        self.assertTrue(member.qr_code_hash)
+
+
+class CardBatchTests(TestCase):
+    def test_cards_endpoint_builds_pdf_sheets_and_zip(self):
+        import io
+        import zipfile
+        from rest_framework.test import APIClient
+
+        for index in range(5):
+            Member.objects.create(full_name=f"Mayfair {index}", phone=f"02400000{index:02d}", class_name="mayfair")
+        Member.objects.create(full_name="Other Class", phone="0240000099", class_name="airport")
+
+        client = APIClient()
+        response = client.get('/api/members/cards/', {'class_name': 'mayfair', 'output': 'zip'})
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 5)
+
+        response = client.get('/api/members/cards/', {'class_name': 'mayfair'})
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        from PIL import PdfParser
+        # four cards per A4 sheet
+        self.assertEqual(len(PdfParser.PdfParser(buf=pdf).pages), 2)
+
+
+class FailingEmailBackend:
+    """Email backend whose connection always fails (used to test outbox retries)"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open(self):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+    def close(self):
+        pass
+
+
+class EmailOutboxTests(TestCase):
+    def test_member_creation_queues_email_and_dispatcher_delivers(self):
+        from django.core import mail
+        from rest_framework.test import APIClient
+        from .email_outbox import dispatch_email_outbox
+        from .models import EmailOutbox
+
+        response = APIClient().post('/api/members/', {'full_name': 'Outbox User', 'email': 'outbox@example.com'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        # nothing is sent inside the request, the email is only queued
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get(to_email='outbox@example.com')
+        self.assertEqual(queued.status, EmailOutbox.STATUS_PENDING)
+
+        summary = dispatch_email_outbox()
+        self.assertEqual(summary['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, EmailOutbox.STATUS_SENT)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        from django.utils import timezone
+        from .email_outbox import dispatch_email_outbox
+        from .models import EmailOutbox
+
+        Member.objects.create(full_name="Retry User", email="retry@example.com")
+        with self.settings(EMAIL_BACKEND='members.tests.FailingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2):
+            self.assertEqual(dispatch_email_outbox()['retrying'], 1)
+            queued = EmailOutbox.objects.get(to_email='retry@example.com')
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreater(queued.next_attempt_at, timezone.now())
+            self.assertIn('SMTP server unavailable', queued.last_error)
+
+            # not due yet; once due, the last attempt marks it failed
+            self.assertEqual(dispatch_email_outbox()['processed'], 0)
+            EmailOutbox.objects.filter(pk=queued.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(dispatch_email_outbox()['failed'], 1)
+
+
+class EmailCampaignTests(TestCase):
+    def test_bulk_email_job_sends_over_one_connection_and_reports_progress(self):
+        from unittest import mock
+        from django.core import mail
+        from rest_framework.test import APIClient
+        from .campaign_service import run_message_job
+        from .models import MessageJob
+
+        for index in range(3):
+            Member.objects.create(full_name=f"Campaign {index}", email=f"campaign{index}@example.com")
+        Member.objects.create(full_name="Phone Only", phone="0240000000")
+
+        client = APIClient()
+        with mock.patch('members.tasks.schedule_message_job') as schedule:
+            response = client.post('/api/members/send_qr_email_bulk/', {'filter': 'with_email'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['total'], 3)
+        job_id = response.data['job_id']
+        schedule.assert_called_once_with(job_id)
+
+        with mock.patch('members.email_outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            job = run_message_job(job_id)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(job.status, MessageJob.STATUS_COMPLETED)
+        self.assertEqual(len(mail.outbox), 3)
+
+        progress = client.get(f'/api/members/message-jobs/{job_id}/')
+        self.assertEqual(progress.data['sent'], 3)
+        self.assertEqual(progress.data['progress_percentage'], 100.0)
+
+    def test_stale_job_is_resumed_without_resending(self):
+        import datetime
+        from unittest import mock
+        from django.core import mail
+        from django.utils import timezone
+        from .campaign_service import create_message_job, resume_stale_message_jobs, run_message_job
+        from .models import MessageJob
+        from .tasks import schedule_message_job
+
+        members = [Member.objects.create(full_name=f"Resumed {index}", email=f"resumed{index}@example.com")
+                   for index in range(3)]
+        job = create_message_job(MessageJob.CHANNEL_EMAIL, Member.objects.filter(pk__in=[m.pk for m in members]))
+        # The web process died after the first email
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        MessageJob.objects.filter(pk=job.pk).update(
+            status=MessageJob.STATUS_RUNNING, processed=1, sent=1, done_ids=[members[0].pk],
+            started_at=an_hour_ago, progress_at=an_hour_ago,
+        )
+        fresh = create_message_job(MessageJob.CHANNEL_EMAIL, Member.objects.filter(pk=members[0].pk))
+
+        self.assertEqual(resume_stale_message_jobs(), [job.pk])
+        job = run_message_job(job.pk)
+        self.assertEqual((job.status, job.sent, job.processed), (MessageJob.STATUS_COMPLETED, 3, 3))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['resumed1@example.com', 'resumed2@example.com'])
+
+        with self.settings(MESSAGE_JOBS_USE_CELERY=True), \
+                mock.patch('members.tasks.run_message_job_async.delay') as delay:
+            schedule_message_job(fresh.pk)
+        delay.assert_called_once_with(fresh.pk)
+
+    def test_requeued_job_keeps_options_and_stops_its_old_runner(self):
+        from unittest import mock
+        from .campaign_service import CAMPAIGN_RUNNERS, JobProgress, create_message_job, run_message_job
+        from .models import MessageJob
+
+        member = Member.objects.create(full_name="Leased", email="leased@example.com")
+        job = create_message_job(MessageJob.CHANNEL_EMAIL, Member.objects.filter(pk=member.pk),
+                                 options={'rate_per_minute': 30})
+        runs = []
+
+        def runner(job, **options):
+            runs.append(options)
+            if len(runs) == 1:
+                # Requeued while still running, and claimed by a second run
+                MessageJob.objects.filter(pk=job.pk).update(status=MessageJob.STATUS_QUEUED)
+                run_message_job(job.pk)
+                progress = JobProgress(job)
+                progress.success(member)
+                progress.save()
+
+        with mock.patch.dict(CAMPAIGN_RUNNERS, {MessageJob.CHANNEL_EMAIL: runner}):
+            job = run_message_job(job.pk)
+
+        self.assertEqual(runs, [{'rate_per_minute': 30}, {'rate_per_minute': 30}])
+        # The second run finished the job; the first stopped at its progress write
+        self.assertEqual((job.status, job.sent), (MessageJob.STATUS_COMPLETED, 0))
+        self.assertEqual(job.done_ids, [])
+
+
+class WhatsAppDispatcherTests(TestCase):
+    def setUp(self):
+        from . import whatsapp_dispatcher
+        whatsapp_dispatcher._instances.clear()
+        self.addCleanup(whatsapp_dispatcher._instances.clear)
+
+    def test_campaign_sends_concurrently_through_stub_provider(self):
+        import tempfile
+        from .campaign_service import create_message_job, run_message_job, select_campaign_members
+        from .models import MessageJob
+        from .whatsapp_dispatcher import get_whatsapp_provider
+
+        for index in range(5):
+            Member.objects.create(full_name=f"WhatsApp {index}", phone=f"02400001{index:02d}")
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(
+            WHATSAPP_PROVIDER='stub', WHATSAPP_MEDIA_STORAGE='local', MEDIA_ROOT=media_root,
+            PUBLIC_BASE_URL='https://church.example.com', WHATSAPP_DISPATCH_WORKERS=3,
+        ):
+            members = select_campaign_members(filter_type='with_phone', channel=MessageJob.CHANNEL_WHATSAPP)
+            job = run_message_job(create_message_job(MessageJob.CHANNEL_WHATSAPP, members).pk)
+
+            self.assertEqual(job.status, MessageJob.STATUS_COMPLETED)
+            self.assertEqual((job.sent, job.failed), (5, 0))
+            sent = get_whatsapp_provider().sent
+            self.assertEqual(len(sent), 5)
+            self.assertTrue(sent[0]['to'].startswith('whatsapp:+233'))
+            self.assertTrue(sent[0]['media_url'].startswith('https://church.example.com/'))
+
+    def test_only_transient_errors_are_retried(self):
+        from .whatsapp_dispatcher import TransientSendError, with_retries
+
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise TransientSendError('busy')
+            return 'SM123'
+
+        self.assertEqual(with_retries(flaky, attempts=3, base_delay=0), 'SM123')
+        self.assertEqual(len(calls), 3)
+
+        with self.assertRaises(ValueError):
+            with_retries(lambda: calls.append(1) or (_ for _ in ()).throw(ValueError('bad number')), attempts=3, base_delay=0)
+        self.assertEqual(len(calls), 4)
+
+    def test_unchanged_cards_are_not_uploaded_again(self):
+        from .whatsapp_dispatcher import LocalMediaStorage, StubWhatsAppProvider, dispatch_whatsapp_cards
+
+        class CountingStorage(LocalMediaStorage):
+            uploads = 0
+
+            def upload(self, name, data, content_type='image/png'):
+                CountingStorage.uploads += 1
+                return f"https://cdn.example.com/{name}"
+
+        for index in range(3):
+            Member.objects.create(full_name=f"Repeat {index}", phone=f"02400002{index:02d}")
+        provider, storage = StubWhatsAppProvider(), CountingStorage()
+        results = []
+
+        def send_all():
+            dispatch_whatsapp_cards(Member.objects.all(), lambda member, result: results.append(result),
+                                    provider=provider, storage=storage)
+
+        send_all()
+        send_all()
+        self.assertEqual(CountingStorage.uploads, 3)
+        self.assertEqual(len(provider.sent), 6)
+        urls = [message['media_url'] for message in provider.sent]
+        self.assertEqual(sorted(urls[:3]), sorted(urls[3:]))
+
+        Member.objects.filter(full_name='Repeat 0').update(full_name='Renamed')
+        send_all()
+        self.assertEqual(CountingStorage.uploads, 4)
+        self.assertTrue(all(result['success'] for result in results))
+
+
+class QRMigrationTests(TestCase):
+    def test_interrupted_migration_resumes_from_checkpoint(self):
+        import os
+        import tempfile
+        from .qr_migration_service import LocalDirectoryTarget, get_checkpoint, migrate_qr_images, size_report
+
+        class Interrupted(Exception):
+            pass
+
+        with tempfile.TemporaryDirectory() as media_root, tempfile.TemporaryDirectory() as target_dir, \
+                self.settings(MEDIA_ROOT=media_root):
+            os.makedirs(os.path.join(media_root, 'qr_codes'))
+            for index in range(5):
+                name = f'qr_codes/qr_code_MIG{index}.png'
+                with open(os.path.join(media_root, name), 'wb') as f:
+                    f.write(b'png' * (index + 1))
+                Member.objects.create(full_name=f"Migrate {index}", qr_code_image=name)
+            # Already uploaded elsewhere: skipped, not re-uploaded or failed
+            Member.objects.create(full_name="Migrated Before", qr_code_image='qr_codes/remote.png')
+
+            checkpoint = get_checkpoint('local')
+            report = size_report(Member.objects.all())
+            self.assertEqual((report['local_files'], report['missing'], report['total_bytes']), (5, 1, 45))
+
+            def interrupt(checkpoint):
+                raise Interrupted()
+
+            target = LocalDirectoryTarget(target_dir)
+            with self.assertRaises(Interrupted):
+                migrate_qr_images(target, checkpoint, batch_size=2, workers=2, on_batch=interrupt)
+
+            checkpoint = get_checkpoint('local')
+            self.assertEqual(checkpoint.migrated, 2)
+            checkpoint = migrate_qr_images(target, checkpoint, batch_size=2, workers=2)
+
+            self.assertEqual(checkpoint.migrated, 5)
+            self.assertEqual(checkpoint.failed_ids, [])
+            self.assertIsNotNone(checkpoint.completed_at)
+            self.assertEqual(len(os.listdir(os.path.join(target_dir, 'qr_codes'))), 5)
+            self.assertEqual(os.listdir(os.path.join(media_root, 'qr_codes')), [])
+
+            # Starting over uploads nothing again
+            checkpoint = migrate_qr_images(target, get_checkpoint('local', reset=True), batch_size=2, workers=2)
+            self.assertEqual(checkpoint.migrated, 0)
+            self.assertEqual(len(os.listdir(os.path.join(target_dir, 'qr_codes'))), 5)
+
+
+class MemberSearchTests(TestCase):
+    def test_autocomplete_ranks_prefix_matches_and_tracks_updates(self):
+        from .search_service import search_members
+
+        kwame = Member.objects.create(full_name="Kwame Mensah", phone="0244000111")
+        Member.objects.create(full_name="Ama Kwarteng", phone="0201234567")
+        Member.objects.create(full_name="Yaw Boateng", phone="0557654321", is_visitor=True)
+
+        names = [result['full_name'] for result in search_members('kwa')]
+        self.assertEqual(names, ['Kwame Mensah', 'Ama Kwarteng'])
+        self.assertEqual(search_members(kwame.member_id)[0]['id'], kwame.pk)
+        self.assertEqual([r['full_name'] for r in search_members('0557')], ['Yaw Boateng'])
+        self.assertEqual(search_members('0557', include_visitors=False), [])
+
+        Member.objects.filter(pk=kwame.pk).update(full_name='Kofi Mensah')
+        self.assertEqual([r['full_name'] for r in search_members('kwa')], ['Ama Kwarteng'])
+
+        request = APIRequestFactory().get('/api/members/autocomplete/', {'q': 'men'})
+        response = MemberViewSet.as_view({'get': 'autocomplete'})(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {
+            'id', 'member_id', 'full_name', 'phone', 'email', 'sex', 'department', 'class_name', 'is_visitor'
+        })
+
+
+class MemberSegmentFilterTests(TestCase):
+    def test_list_filters_by_segment_and_orders_by_ratio(self):
+        Member.objects.create(full_name="At Risk High", class_name='airport', attendance_status='at_risk',
+                              current_absenteeism_ratio=0.8)
+        Member.objects.create(full_name="At Risk Low", class_name='airport', attendance_status='at_risk',
+                              current_absenteeism_ratio=0.5)
+        Member.objects.create(full_name="Other Class", class_name='mayfair', attendance_status='at_risk')
+        Member.objects.create(full_name="Visitor", class_name='airport', attendance_status='at_risk', is_visitor=True)
+
+        request = APIRequestFactory().get('/api/members/', {
+            'is_visitor': 'false', 'attendance_status': 'at_risk', 'class_name': 'airport',
+            'min_absenteeism_ratio': '0.4', 'ordering': 'current_absenteeism_ratio',
+        })
+        response = MemberViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual([m['full_name'] for m in response.data['results']], ['At Risk Low', 'At Risk High'])
+
+    def test_segment_query_uses_an_index(self):
+        from django.db import connection
+
+        members = Member.objects.filter(is_visitor=False, class_name='airport').order_by()
+        sql, params = members.values_list('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('SEARCH members_member USING', plan)
+
+
+class MemberDetailQueryTests(TestCase):
+    def _member_with_history(self, name, services):
+        from attendance.models import Attendance
+        from .models import ContactLog, MemberAlert
+
+        member = Member.objects.create(full_name=name, phone="0240000999")
+        MemberAlert.objects.create(member=member, alert_level='warning', reason='Missed services')
+        ContactLog.objects.bulk_create([
+            ContactLog(member=member, contact_method='call', contacted_by='Pastor') for _ in range(7)
+        ])
+        Attendance.objects.bulk_create([Attendance(member=member, service=service) for service in services])
+        return member
+
+    def test_batch_detail_uses_a_constant_number_of_queries(self):
+        import datetime
+        from services.models import Service
+
+        services = [
+            Service.objects.create(name=f"Service {day}", date=datetime.date(2026, 1, day), start_time='09:00')
+            for day in range(1, 13)
+        ]
+        members = [self._member_with_history(f"Detail {index}", services) for index in range(3)]
+        view = MemberViewSet.as_view({'get': 'batch'})
+        ids = ','.join(str(member.pk) for member in reversed(members))
+
+        # Members, alerts, absenteeism alerts, contacts, attendances (+ services); metric is joined
+        with self.assertNumQueries(5):
+            response = view(APIRequestFactory().get('/api/members/batch/', {'ids': ids}))
+
+        self.assertEqual([m['id'] for m in response.data], [m.pk for m in reversed(members)])
+        first = response.data[0]
+        self.assertEqual((len(first['alerts']), len(first['recent_contacts'])), (1, 5))
+        self.assertEqual(len(first['attendance_history']), 10)
+        self.assertEqual(first['attendance_history'][0]['service_date'], datetime.date(2026, 1, 12))
+
+
+class CareDashboardTests(TestCase):
+    def test_dashboard_is_built_from_fixed_queries_and_cached(self):
+        import datetime
+        from django.core.cache import cache
+        from .care_dashboard_service import build_care_dashboard, invalidate_care_dashboard
+        from .models import ContactLog, MemberAbsenteeismAlert, MemberAbsenteeismMetric
+
+        cache.clear()
+        for index, ratio in enumerate([0.7, 0.5, 0.3, 0.1, 0.65]):
+            member = Member.objects.create(full_name=f"Care {index}")
+            MemberAbsenteeismMetric.objects.create(member=member, absenteeism_ratio=ratio,
+                                                   absent_count=int(ratio * 10), total_services=10)
+            if ratio >= 0.6:
+                MemberAbsenteeismAlert.objects.create(
+                    member=member, alert_level='critical', absenteeism_ratio_at_creation=ratio,
+                    absent_count_at_creation=int(ratio * 10), total_services_at_creation=10, reason='Absent'
+                )
+                ContactLog.objects.create(member=member, contact_method='call', message_sent='Checking in',
+                                          follow_up_needed=True, follow_up_date=datetime.date(2026, 11, 1))
+        Member.objects.create(full_name="No metric yet")
+
+        with self.assertNumQueries(5):
+            dashboard = build_care_dashboard(limit=3)
+        self.assertEqual(dashboard['counts'], {
+            'total': 6, 'critical': 2, 'at_risk': 1, 'early_warning': 1, 'active': 2
+        })
+        self.assertEqual(dashboard['alert_counts']['critical'], 2)
+        self.assertEqual([m['full_name'] for m in dashboard['at_risk_members']], ['Care 0', 'Care 4', 'Care 1'])
+        self.assertEqual(dashboard['at_risk_members'][0]['alert']['alert_level'], 'critical')
+        self.assertEqual(len(dashboard['follow_ups']), 2)
+
+        with self.assertNumQueries(0):
+            build_care_dashboard(limit=3)
+        invalidate_care_dashboard()
+        with self.assertNumQueries(5):
+            build_care_dashboard(limit=3)
+
+        # Metric updates outside the views also drop the cached dashboard
+        from .utils import update_absenteeism_alerts
+        update_absenteeism_alerts(member)
+        with self.assertNumQueries(5):
+            build_care_dashboard(limit=3)
+
+
+class CursorPaginationTests(TestCase):
+    def test_attendance_pages_follow_the_cursor(self):
+        import datetime
+        from rest_framework.test import APIClient
+        from attendance.models import Attendance
+        from services.models import Service
+
+        member = Member.objects.create(full_name="Paged Member")
+        for day in range(1, 6):
+            service = Service.objects.create(name=f"Service {day}", date=datetime.date(2026, 10, day),
+                                             start_time=datetime.time(9, 0))
+            Attendance.objects.create(member=member, service=service, status='present')
+
+        client = APIClient()
+        response = client.get('/api/attendance/', {'member': member.id, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        ids = [row['id'] for row in response.data['results']]
+        while response.data['next']:
+            response = client.get(response.data['next'])
+            ids.extend(row['id'] for row in response.data['results'])
+
+        expected = list(Attendance.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_page_size_is_bounded(self):
+        from rest_framework.request import Request
+        from church_config.pagination import CreatedAtCursorPagination
+
+        pagination = CreatedAtCursorPagination()
+        factory = APIRequestFactory()
+        self.assertEqual(pagination.get_page_size(Request(factory.get('/', {'page_size': 10000}))), 500)
+        self.assertEqual(pagination.get_page_size(Request(factory.get('/', {'page_size': 10}))), 10)
+        self.assertEqual(pagination.get_page_size(Request(factory.get('/'))), 50)
+
+
+class DeltaSyncTests(TestCase):
+    def test_sync_returns_changes_and_deletions_since_cursor(self):
+        import datetime
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from services.models import Service
+        from .sync_service import encode_cursor
+
+        kept = Member.objects.create(full_name="Unchanged Member")
+        changed = Member.objects.create(full_name="Changed Member")
+        service = Service.objects.create(name="Removed Service", date=datetime.date(2026, 10, 4),
+                                         start_time=datetime.time(9, 0))
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        Member.objects.update(updated_at=an_hour_ago)
+        Service.objects.update(updated_at=an_hour_ago)
+
+        client = APIClient()
+        response = client.get('/api/sync/')
+        self.assertTrue(response.data['full'])
+        self.assertEqual({m['id'] for m in response.data['members']}, {kept.id, changed.id})
+
+        cursor = encode_cursor(timezone.now() - datetime.timedelta(minutes=1))
+        changed.phone = '0240000000'
+        changed.save()
+        service_id = service.id
+        service.delete()
+
+        response = client.get('/api/sync/', {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['full'])
+        self.assertEqual([m['id'] for m in response.data['members']], [changed.id])
+        self.assertEqual(response.data['services'], [])
+        self.assertEqual(response.data['deleted'], {'members': [], 'services': [service_id]})
 
+        self.assertEqual(client.get('/api/sync/', {'since': 'yesterday'}).status_code, 400)
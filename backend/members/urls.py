@@ -1,8 +1,9 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import SimpleRouter
 from .views import (
     MemberViewSet, MemberAlertViewSet, ContactLogViewSet,
-    MemberAbsenteeismAlertViewSet, MemberAbsenteeismMetricViewSet, InvitationCodeViewSet
+    MemberAbsenteeismAlertViewSet, MemberAbsenteeismMetricViewSet, InvitationCodeViewSet,
+    MessageJobViewSet, qr_code_blob
 )
 
 router = SimpleRouter()
@@ -11,7 +12,14 @@ router.register(r'alerts', MemberAlertViewSet, basename='alert')
 router.register(r'contact-logs', ContactLogViewSet, basename='contact-log')
 router.register(r'absenteeism-alerts', MemberAbsenteeismAlertViewSet, basename='absenteeism-alert')
 router.register(r'absenteeism-metrics', MemberAbsenteeismMetricViewSet, basename='absenteeism-metric')
+router.register(r'message-jobs', MessageJobViewSet, basename='message-job')
 router.register(r'', MemberViewSet, basename='member')  # Must be last - most generic pattern
 
-urlpatterns = [    path('', include(router.urls)),
+urlpatterns = [
+    # Content-addressed QR images; must come before the router's {pk}/ routes
+    path('qr/<str:qr_hash>.png', qr_code_blob, name='qr-code-blob'),
+    # Image URLs without the router's trailing slash (qr.png/ is routed too)
+    re_path(r'^(?P<pk>[^/.]+)/qr\.(?P<image_format>png|svg)$',
+            MemberViewSet.as_view({'get': 'qr_image'}), name='member-qr-image'),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
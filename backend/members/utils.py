@@ -3,8 +3,11 @@ Utility functions for member management and absence tracking.
 """
 from datetime import timedelta
 from django.utils import timezone
-from .models import Member, MemberAlert, ContactLog
-from django.db.models import Q
+from .care_dashboard_service import invalidate_care_dashboard
+from .models import Member, MemberAlert, ContactLog, MemberIdSequence
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 import re
 
 
@@ -19,34 +22,57 @@ def generate_sequential_member_id():
     Returns:
         str: Generated member ID (e.g., 'WIS-2026-0001')
     """
-    from django.utils import timezone
+    return reserve_member_ids(1)[0]
+
+
+def reserve_member_ids(count=1, year=None):
+    """
+    Reserve a block of consecutive member IDs for a year.
     
-    current_year = timezone.now().year
-    prefix = f"WIS-{current_year}-"
+    The per-year MemberIdSequence row is incremented with a single F() update,
+    which takes a row lock for the rest of the transaction, so concurrent callers
+    always receive disjoint blocks regardless of how many IDs they ask for.
     
-    # Get the highest sequence number for the current year
-    # Use regex to find all member IDs matching the pattern WIS-YYYY-XXXX
-    members_this_year = Member.objects.filter(
-        member_id__startswith=prefix
-    ).order_by('member_id')
+    Args:
+        count: Number of IDs to reserve (bulk imports reserve all rows at once)
+        year: Year for the IDs (defaults to the current year)
     
-    if not members_this_year.exists():
-        # First member of the year
-        sequence = 1
-    else:
-        # Get the last member and extract the sequence number
-        last_member = members_this_year.last()
+    Returns:
+        list: Member IDs in ascending order (e.g., ['WIS-2026-0042', 'WIS-2026-0043'])
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    
+    year = year or timezone.now().year
+    prefix = f"WIS-{year}-"
+    
+    with transaction.atomic():
+        if not MemberIdSequence.objects.filter(year=year).exists():
+            # First allocation for this year: continue after any IDs that were
+            # handed out before the sequence table existed
+            MemberIdSequence.objects.get_or_create(
+                year=year,
+                defaults={'last_value': _highest_member_sequence(prefix)}
+            )
+        
+        MemberIdSequence.objects.filter(year=year).update(last_value=F('last_value') + count)
+        last_value = MemberIdSequence.objects.filter(year=year).values_list('last_value', flat=True).get()
+    
+    first_value = last_value - count + 1
+    return [f"{prefix}{sequence:04d}" for sequence in range(first_value, last_value + 1)]
+
+
+def _highest_member_sequence(prefix):
+    """Return the highest numeric suffix among existing member IDs with this prefix"""
+    highest = 0
+    existing_ids = Member.objects.filter(member_id__startswith=prefix).values_list('member_id', flat=True)
+    for member_id in existing_ids.iterator():
         try:
-            # Extract the numeric part (last 4 digits)
-            last_sequence = int(last_member.member_id.split('-')[-1])
-            sequence = last_sequence + 1
-        except (ValueError, IndexError):
-            # Fallback if parsing fails
-            sequence = members_this_year.count() + 1
-    
-    # Format as 4-digit sequence
-    member_id = f"{prefix}{sequence:04d}"
-    return member_id
+            highest = max(highest, int(member_id[len(prefix):]))
+        except ValueError:
+            # Ignore IDs that don't follow the WIS-YYYY-NNNN pattern
+            continue
+    return highest
 
 
 def update_member_absence_tracking(member, attendance_status):
@@ -154,10 +180,20 @@ def get_member_attendance_stats(member):
     attendance_records = Attendance.objects.filter(
         member=member,
         service__date__gte=three_months_ago
-    )
+    ).exclude(marked_by=Attendance.MARKED_BY_ROSTER)
     
     present_count = attendance_records.filter(status='present').count()
-    absent_count = attendance_records.filter(status='absent').count()
+    # Only absences from services the member was expected at
+    scope, in_roster = _roster_membership(member, prefix='service__')
+    absent_count = attendance_records.filter(status='absent').annotate(**scope).filter(in_roster).count()
+    
+    # Absences of sessions closed in implicit mode have no row
+    from attendance.absences import implicit_absent_services
+    scope, in_roster = _roster_membership(member)
+    absent_count += (
+        implicit_absent_services(member).filter(date__gte=three_months_ago)
+        .annotate(**scope).filter(in_roster).count()
+    )
     
     # Calculate percentages
     total_services = present_count + absent_count
@@ -356,14 +392,39 @@ def recalculate_member_alerts():
         # Save updated member
         member.save()
     
+    invalidate_care_dashboard()
     return summary
 
 
+def _roster_membership(member, prefix=''):
+    """
+    Annotations and a condition selecting sessions whose expected roster
+    includes the member (see Service.get_roster_scope). prefix reaches the
+    session from another model, e.g. 'service__' for attendance records.
+    
+    Returns:
+        (dict, Q): annotate(**annotations).filter(condition)
+    """
+    from services.models import Service
+    
+    annotations = {}
+    condition = Q()
+    for field, member_field in Service.ROSTER_SCOPE_FIELDS.items():
+        alias = f'roster_scope_{member_field}'
+        annotations[alias] = Coalesce(
+            NullIf(f'{prefix}{field}', Value('')),
+            NullIf(f'{prefix}parent_service__{field}', Value('')),
+        )
+        condition &= Q(**{f'{alias}__isnull': True}) | Q(**{alias: getattr(member, member_field) or ''})
+    return annotations, condition
+
+
 def calculate_absenteeism_metric(member):
     """
     Calculate absenteeism metric for a member based on last 10 services.
     
-    Recurring services are weighted 1.5x in the calculation.
+    Recurring services are weighted 1.5x in the calculation. Absences only
+    count at services whose expected roster includes the member.
     
     Args:
         member: Member instance
@@ -381,14 +442,26 @@ def calculate_absenteeism_metric(member):
             - onetime_absent
             - onetime_present
     """
-    from attendance.models import Attendance
+    from attendance.models import Attendance, SessionRoster
     from services.models import Service
     
-    # Get last 10 services by date (descending) that have any attendance records
-    last_10_services = Service.objects.filter(
-        attendances__member=member,
-        date__isnull=False
-    ).order_by('-date').distinct()[:10]
+    # Get last 10 services by date (descending) that have any attendance records,
+    # or that were closed in implicit mode with the member expected (an absence
+    # with no row). Roster rows of pre-seeded sessions still open are not
+    # absences (yet), and absences from services the member wasn't expected
+    # at don't count.
+    records = Attendance.objects.filter(service=OuterRef('pk'), member=member)
+    attended = Exists(records.exclude(status='absent'))
+    absent = Exists(records.filter(status='absent').exclude(marked_by=Attendance.MARKED_BY_ROSTER))
+    was_expected = Exists(SessionRoster.objects.filter(service=OuterRef('pk'), snapshot__members=member))
+    scope, in_roster = _roster_membership(member)
+    last_10_services = list(
+        Service.objects.filter(date__isnull=False)
+        .annotate(**scope)
+        .filter(Q(attended) | (in_roster & (Q(absent) | Q(was_expected))))
+        .select_related('parent_service')
+        .order_by('-date')[:10]
+    )
     
     if not last_10_services:
         # No attendance history, return empty metric
@@ -405,15 +478,21 @@ def calculate_absenteeism_metric(member):
             'onetime_present': 0,
         }
     
-    # Count attendance records for these services
-    attendance_records = Attendance.objects.filter(
-        member=member,
-        service__in=last_10_services
-    ).select_related('service', 'service__parent_service')
+    # Attendance records for these services; implicit-mode sessions without
+    # one are absences
+    stored = {
+        record.service_id: record
+        for record in Attendance.objects.filter(member=member, service__in=last_10_services)
+    }
+    attendance_records = []
+    for service in last_10_services:
+        record = stored.get(service.pk) or Attendance(member=member, status='absent')
+        record.service = service  # Already loaded with its parent
+        attendance_records.append(record)
     
-    total_services = attendance_records.count()
-    absent_count = attendance_records.filter(status='absent').count()
-    present_count = attendance_records.filter(status='present').count()
+    total_services = len(attendance_records)
+    absent_count = sum(1 for record in attendance_records if record.status == 'absent')
+    present_count = sum(1 for record in attendance_records if record.status == 'present')
     
     # Calculate weights: recurring services count 1.5x
     weighted_absent = 0.0
@@ -532,7 +611,9 @@ def update_absenteeism_alerts(member):
 
     # Update member's denormalized ratio field efficiently to avoid running full Member.save()
     # (Member.save() may trigger QR generation and other heavy side-effects)
-    Member.objects.filter(pk=member.pk).update(current_absenteeism_ratio=metric_data['absenteeism_ratio'])
+    Member.objects.filter(pk=member.pk).update(
+        current_absenteeism_ratio=metric_data['absenteeism_ratio'], updated_at=timezone.now()
+    )
     
     # Determine required alert level
     required_alert_level = get_alert_level_for_ratio(metric_data['absenteeism_ratio'])
@@ -579,6 +660,7 @@ def update_absenteeism_alerts(member):
             result['alert'] = alert
             result['alert_created'] = True
     
+    invalidate_care_dashboard()
     return result
 
 
@@ -1,19 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Member, MemberAlert, ContactLog, MemberAbsenteeismAlert, MemberAbsenteeismMetric, InvitationCode
+from django_filters.rest_framework import DjangoFilterBackend
+from church_config.pagination import ContactDateCursorPagination, CreatedAtCursorPagination
+from .models import Member, MemberAlert, ContactLog, MemberAbsenteeismAlert, MemberAbsenteeismMetric, InvitationCode, MessageJob
+from .filters import MemberFilter
 from .serializers import (
     MemberSerializer, MemberDetailSerializer, MemberAlertSerializer, 
     ContactLogSerializer, MemberAbsenteeismAlertSerializer, MemberAbsenteeismMetricSerializer,
-    InvitationCodeSerializer
+    InvitationCodeSerializer, MessageJobSerializer
 )
+from .care_dashboard_service import invalidate_care_dashboard
 from .email_service import send_qr_code_email
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, Http404, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.views.decorators.http import require_GET
+import base64
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+# Members per /members/batch/ request
+MAX_BATCH_DETAIL_IDS = 100
+
 
 class InvitationCodeViewSet(viewsets.ModelViewSet):
     """
@@ -192,14 +206,36 @@ class MemberViewSet(viewsets.ModelViewSet):
     - PUT /members/{id}/ - Update member
     - DELETE /members/{id}/ - Delete member
     - GET /members/{id}/qr_code/ - Get member QR code
+    - GET /members/{id}/qr.png, /members/{id}/qr.svg - Raw QR code image (HTTP cacheable)
     - POST /members/{id}/send_qr_email/ - Send QR code via email
+    - POST /members/import/ - Bulk import members from a CSV/XLSX file
+    - GET /members/cards/ - Printable membership cards (PDF sheets or ZIP)
+    - POST /members/send_qr_email_bulk/ - Email QR codes to many members (background job)
+    - GET /members/autocomplete/?q=... - Typeahead search by name, member ID or phone
+    - GET /members/batch/?ids=1,2,3 - Details of several members in one request
+    - GET /members/care_dashboard/ - Counts, top at-risk members and follow-ups (cached)
+    
+    Filters (see members.filters.MemberFilter): is_visitor, attendance_status,
+    class_name, department, committee, sex, min_/max_absenteeism_ratio,
+    created_after/created_before. Ordering: ?ordering=-current_absenteeism_ratio
     """
     
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = MemberFilter
+    ordering_fields = ['created_at', 'full_name', 'member_id', 'current_absenteeism_ratio', 'last_attendance_date']
+    ordering = ['-created_at']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'batch', 'by_member_id'):
+            # Alerts, metric, contacts and attendance history in a fixed number of queries
+            queryset = MemberDetailSerializer.setup_eager_loading(queryset)
+        return queryset
     
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'batch'):
             return MemberDetailSerializer
         return MemberSerializer
     
@@ -210,7 +246,8 @@ class MemberViewSet(viewsets.ModelViewSet):
         Required fields: full_name
         Optional fields: member_id, email, phone, department, group, etc.
         
-        Auto-generated: member_id (if not provided), qr_code_image, qr_code_data
+        Auto-generated: member_id (if not provided)
+        Generated in the background: qr_code_image, qr_code_hash (see qr_status)
         """
         try:
             serializer = self.get_serializer(data=request.data)
@@ -231,6 +268,126 @@ class MemberViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_members(self, request):
+        """
+        Bulk import members from a CSV or XLSX file.
+        
+        Multipart form fields:
+        - file: .csv or .xlsx file with a header row (full_name required)
+        - dry_run: "true" to validate without creating members (optional)
+        - send_email: "false" to skip QR code emails (optional, default true)
+        
+        Valid rows are created; invalid rows are reported by row number.
+        QR codes and emails are generated in a background batch.
+        """
+        from .import_service import read_member_rows, import_members, MemberImportError
+        from .tasks import schedule_member_onboarding
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        send_email = str(request.data.get('send_email', 'true')).lower() in ('1', 'true', 'yes')
+        
+        try:
+            rows = read_member_rows(upload, upload.name)
+            summary = import_members(rows, dry_run=dry_run, queue_emails=send_email)
+        except MemberImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error importing members: {str(e)}", exc_info=True)
+            return Response(
+                {'error': f'Failed to import members: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if summary['created_ids']:
+            schedule_member_onboarding(summary['created_ids'])
+        
+        return Response({
+            'success': True,
+            'dry_run': dry_run,
+            **summary
+        }, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'])
+    def cards(self, request):
+        """
+        Render membership cards for printing, for all members or a filtered set.
+        
+        Query params:
+        - department, class_name: Only render cards for these members (optional)
+        - include_visitors: "true" to include visitors (optional)
+        - output: "pdf" (A4 sheets, default), "sheets" (ZIP of A4 PNG sheets)
+                  or "zip" (ZIP with one PNG card per member)
+        
+        Cards are rendered on a process pool; ZIPs are streamed as they are built.
+        """
+        from .card_batch_service import (
+            CARD_BATCH_FORMATS, select_card_members, stream_cards_zip, write_cards_pdf
+        )
+        
+        output = request.query_params.get('output', 'pdf').lower()
+        if output not in CARD_BATCH_FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(CARD_BATCH_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        members = select_card_members(
+            department=request.query_params.get('department'),
+            class_name=request.query_params.get('class_name'),
+            include_visitors=str(request.query_params.get('include_visitors', '')).lower() in ('1', 'true', 'yes'),
+        )
+        if not members.exists():
+            return Response(
+                {'error': 'No members match the given filters'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if output == 'pdf':
+            with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+                write_cards_pdf(members, pdf_file.name)
+                pdf = open(pdf_file.name, 'rb')
+            # The file was unlinked on close; the open handle keeps it readable while streaming
+            return FileResponse(pdf, as_attachment=True, filename='membership_cards.pdf',
+                                content_type='application/pdf')
+        
+        response = StreamingHttpResponse(
+            stream_cards_zip(members, sheets=output == 'sheets'),
+            content_type='application/zip'
+        )
+        filename = 'membership_card_sheets.zip' if output == 'sheets' else 'membership_cards.zip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Typeahead search by name, member ID or phone, best match first.
+        Usage: /members/autocomplete/?q=kwa&limit=10&visitors=false
+
+        Returns only the fields needed to show and pick a result.
+        """
+        from .search_service import AUTOCOMPLETE_DEFAULT_LIMIT, search_members
+
+        try:
+            limit = int(request.query_params.get('limit', AUTOCOMPLETE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search_members(
+            request.query_params.get('q', ''),
+            limit=limit,
+            include_visitors=request.query_params.get('visitors', 'true').lower() != 'false',
+        )
+        return Response({'results': results})
+
     @action(detail=False, methods=['get'])
     def by_member_id(self, request):
         """
@@ -245,23 +402,65 @@ class MemberViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            member = Member.objects.get(member_id=member_id)
-            serializer = MemberDetailSerializer(member)
+            member = self.get_queryset().get(member_id=member_id)
+            serializer = MemberDetailSerializer(member, context={'request': request})
             return Response(serializer.data)
         except Member.DoesNotExist:
             return Response(
                 {'error': f'Member with ID {member_id} not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Get the details of several members in one request, in the order given
+        Usage: /members/batch/?ids=1,2,3 (member primary keys, at most 100)
+        
+        Unknown ids are left out of the result.
+        """
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response(
+                {'error': 'ids must be a comma-separated list of member ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not ids:
+            return Response(
+                {'error': 'ids query parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > MAX_BATCH_DETAIL_IDS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_DETAIL_IDS} ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        members = {member.pk: member for member in self.get_queryset().filter(pk__in=ids)}
+        ordered = [members[pk] for pk in dict.fromkeys(ids) if pk in members]
+        serializer = self.get_serializer(ordered, many=True)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def qr_code(self, request, pk=None):
-        """Get QR code for a member; returns base64 data as a data URI."""
-        member = self.get_object()
-        if member.qr_code_data:
+        """
+        Get QR code for a member; returns base64 data as a data URI.
+        
+        If the background batch hasn't rendered it yet, it is generated now.
+        """
+        from .qr_code_generator import ensure_qr_code, get_qr_code_png
+        
+        member = ensure_qr_code(self.get_object())
+        qr_png_data = get_qr_code_png(member)
+        if qr_png_data:
+            qr_code_base64 = base64.b64encode(qr_png_data).decode('utf-8')
             return Response({
-                'qr_code_image': f"data:image/png;base64,{member.qr_code_data}",
-                'qr_code_base64': member.qr_code_data,
+                'qr_code_image': f"data:image/png;base64,{qr_code_base64}",
+                'qr_code_base64': qr_code_base64,
+                'qr_code_url': request.build_absolute_uri(
+                    reverse('qr-code-blob', kwargs={'qr_hash': member.qr_code_hash})
+                ),
                 'member_id': member.member_id
             })
         elif member.qr_code_image:
@@ -275,6 +474,30 @@ class MemberViewSet(viewsets.ModelViewSet):
             status=status.HTTP_404_NOT_FOUND
         )
 
+    @action(detail=True, methods=['get'], url_path=r'qr\.(?P<image_format>png|svg)')
+    def qr_image(self, request, pk=None, image_format='png'):
+        """
+        Raw QR code image as PNG or SVG.
+        
+        The ETag is derived from the member_id and rendering parameters, so a
+        client revalidating a cached image gets a 304 without anything being
+        rendered. Member IDs never change, so the image is sent as immutable.
+        """
+        from .qr_code_generator import QR_IMAGE_CONTENT_TYPES, qr_code_etag, render_qr_code
+        
+        member_id = self.get_queryset().filter(pk=pk).values_list('member_id', flat=True).first()
+        if not member_id:
+            return Response(
+                {'error': 'QR code not available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return immutable_image_response(
+            request,
+            qr_code_etag(member_id, image_format),
+            lambda: (QR_IMAGE_CONTENT_TYPES[image_format], render_qr_code(member_id, image_format)),
+        )
+
     @action(detail=True, methods=['post'])
     def send_qr_email(self, request, pk=None):
         """Send QR code email to member"""
@@ -304,6 +527,56 @@ class MemberViewSet(viewsets.ModelViewSet):
                 'message': f'Error sending email: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def send_qr_email_bulk(self, request):
+        """
+        Send QR code emails to many members in a background job
+        
+        Request body:
+        {
+            "member_ids": [1, 2, 3],  // or
+            "filter": "with_email",  // or "all", "recent"
+            "rate_per_minute": 60  // optional, default EMAIL_CAMPAIGN_RATE_PER_MINUTE
+        }
+        
+        Returns the job ID; poll GET /members/message-jobs/{job_id}/ for progress.
+        """
+        from .campaign_service import CampaignError, create_message_job, select_campaign_members
+        from .tasks import schedule_message_job
+        
+        options = {}
+        if request.data.get('rate_per_minute') is not None:
+            try:
+                options['rate_per_minute'] = int(request.data['rate_per_minute'])
+            except (TypeError, ValueError):
+                return Response({
+                    'success': False,
+                    'message': 'rate_per_minute must be a number'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            members = select_campaign_members(
+                member_ids=request.data.get('member_ids'),
+                filter_type=request.data.get('filter', 'with_email'),
+                channel=MessageJob.CHANNEL_EMAIL,
+            )
+            # Options are kept on the job so a resumed run uses them too
+            job = create_message_job(MessageJob.CHANNEL_EMAIL, members, options=options)
+        except CampaignError as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        schedule_message_job(job.pk)
+        
+        return Response({
+            'success': True,
+            'job_id': job.pk,
+            'total': job.total,
+            'message': f'Sending QR code emails to {job.total} members'
+        }, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=True, methods=['post'])
     def send_qr_whatsapp(self, request, pk=None):
         """
@@ -348,15 +621,19 @@ class MemberViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def send_qr_whatsapp_bulk(self, request):
         """
-        Send QR codes via WhatsApp to multiple members
+        Send QR codes via WhatsApp to multiple members in a background job
         
         Request body:
         {
             "member_ids": [1, 2, 3],  // or
             "filter": "all"  // or "recent", "with_phone"
         }
+        
+        Returns the job ID; poll GET /members/message-jobs/{job_id}/ for progress.
         """
         try:
+            from .campaign_service import CampaignError, create_message_job, select_campaign_members
+            from .tasks import schedule_message_job
             from .whatsapp_service import WhatsAppService
             
             service = WhatsAppService()
@@ -367,38 +644,27 @@ class MemberViewSet(viewsets.ModelViewSet):
                     'message': 'WhatsApp service not configured.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get members
-            member_ids = request.data.get('member_ids')
-            filter_type = request.data.get('filter', 'with_phone')
-            
-            if member_ids:
-                members = Member.objects.filter(id__in=member_ids, is_visitor=False)
-            elif filter_type == 'all':
-                members = Member.objects.filter(is_visitor=False)
-            elif filter_type == 'with_phone':
-                members = Member.objects.filter(is_visitor=False, phone__isnull=False).exclude(phone='')
-            elif filter_type == 'recent':
-                from django.utils import timezone
-                from datetime import timedelta
-                recent_date = timezone.now() - timedelta(days=30)
-                members = Member.objects.filter(
-                    is_visitor=False,
-                    phone__isnull=False,
-                    created_at__gte=recent_date
-                ).exclude(phone='')
-            else:
+            try:
+                members = select_campaign_members(
+                    member_ids=request.data.get('member_ids'),
+                    filter_type=request.data.get('filter', 'with_phone'),
+                    channel=MessageJob.CHANNEL_WHATSAPP,
+                )
+                job = create_message_job(MessageJob.CHANNEL_WHATSAPP, members)
+            except CampaignError as e:
                 return Response({
                     'success': False,
-                    'message': f'Unknown filter: {filter_type}'
+                    'message': str(e)
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Send messages
-            results = service.send_qr_code_bulk(list(members))
+            schedule_message_job(job.pk)
             
             return Response({
                 'success': True,
-                **results
-            }, status=status.HTTP_200_OK)
+                'job_id': job.pk,
+                'total': job.total,
+                'message': f'Sending QR codes via WhatsApp to {job.total} members'
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response({
@@ -406,6 +672,25 @@ class MemberViewSet(viewsets.ModelViewSet):
                 'message': f'Error sending bulk WhatsApp messages: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'])
+    def care_dashboard(self, request):
+        """
+        Everything the care dashboard shows, in one response (cached briefly)
+        Usage: /members/care_dashboard/?limit=50
+        
+        Returns member counts per absenteeism band, unresolved alert counts
+        per level, the top `limit` members by absenteeism ratio with their
+        metric and latest alert, and pending follow-ups.
+        """
+        from .care_dashboard_service import CARE_DASHBOARD_DEFAULT_LIMIT, build_care_dashboard
+        
+        try:
+            limit = int(request.query_params.get('limit', CARE_DASHBOARD_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(build_care_dashboard(limit=limit))
+    
     @action(detail=False, methods=['get'])
     def with_ten_absences(self, request):
         """
@@ -459,12 +744,20 @@ class MemberViewSet(viewsets.ModelViewSet):
                 return Response({'count': 0, 'members': []}, status=status.HTTP_200_OK)
 
             # Count distinct absent services per member among these sessions
+            # (roster rows of pre-seeded sessions still open aren't absences yet)
             member_absent_counts = Attendance.objects.filter(
                 service_id__in=last_sessions,
                 status='absent'
-            ).values('member_id').annotate(absent_services=Count('service_id', distinct=True)).filter(absent_services=10)
+            ).exclude(marked_by=Attendance.MARKED_BY_ROSTER).values('member_id').annotate(absent_services=Count('service_id', distinct=True))
+            absent_services = {m['member_id']: m['absent_services'] for m in member_absent_counts}
+
+            # Sessions closed in implicit mode store no absent rows
+            from attendance.absences import implicit_absent_members
+            for session in Service.objects.filter(id__in=last_sessions, session_roster__isnull=False):
+                for member_pk in implicit_absent_members(session).values_list('id', flat=True):
+                    absent_services[member_pk] = absent_services.get(member_pk, 0) + 1
 
-            member_ids = [m['member_id'] for m in member_absent_counts]
+            member_ids = [member_pk for member_pk, count in absent_services.items() if count == 10]
 
             members_qs = Member.objects.filter(id__in=member_ids)
             members_list = [
@@ -490,14 +783,17 @@ class MemberAlertViewSet(viewsets.ModelViewSet):
     ViewSet for Member Alerts
     
     Endpoints:
-    - GET /alerts/ - List all alerts
+    - GET /alerts/ - List all alerts (cursor-paginated, ?page_size=)
     - POST /alerts/ - Create new alert
     - GET /alerts/{id}/ - Get alert details
     - PUT /alerts/{id}/ - Update alert
     """
     
-    queryset = MemberAlert.objects.all()
+    queryset = MemberAlert.objects.select_related('member')
     serializer_class = MemberAlertSerializer
+    pagination_class = CreatedAtCursorPagination
+    ordering_fields = ['created_at', 'id']
+    ordering = ['-created_at', '-id']
     
     @action(detail=False, methods=['get'])
     def unresolved(self, request):
@@ -654,6 +950,7 @@ class MemberAlertViewSet(viewsets.ModelViewSet):
         alert.resolved_at = timezone.now()
         alert.resolution_notes = request.data.get('resolution_notes', '')
         alert.save()
+        invalidate_care_dashboard()
         serializer = self.get_serializer(alert)
         return Response(serializer.data)
 
@@ -663,13 +960,20 @@ class ContactLogViewSet(viewsets.ModelViewSet):
     ViewSet for Contact Logs
     
     Endpoints:
-    - GET /contact-logs/ - List all contact logs
+    - GET /contact-logs/ - List all contact logs (cursor-paginated, ?page_size=)
     - POST /contact-logs/ - Create new contact log
     - GET /contact-logs/{id}/ - Get contact log details
     """
     
-    queryset = ContactLog.objects.all()
+    queryset = ContactLog.objects.select_related('member')
     serializer_class = ContactLogSerializer
+    pagination_class = ContactDateCursorPagination
+    ordering_fields = ['contact_date', 'id']
+    ordering = ['-contact_date', '-id']
+    
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate_care_dashboard()
     
     @action(detail=False, methods=['get'])
     def by_member(self, request):
@@ -710,12 +1014,15 @@ class MemberAbsenteeismAlertViewSet(viewsets.ModelViewSet):
     - POST /absenteeism-alerts/{id}/resolve/ - Resolve an alert
     """
     
-    queryset = MemberAbsenteeismAlert.objects.all()
+    queryset = MemberAbsenteeismAlert.objects.select_related('member')
     serializer_class = MemberAbsenteeismAlertSerializer
+    pagination_class = CreatedAtCursorPagination
+    ordering_fields = ['created_at', 'id']
+    ordering = ['-created_at', '-id']
     
     @action(detail=False, methods=['get'])
     def unresolved(self, request):
-        """Get all unresolved absenteeism alerts with proper pagination"""
+        """Unresolved absenteeism alerts, newest first (cursor-paginated, ?page_size=)"""
         from members.utils import recalculate_all_absenteeism_metrics
         
         # Optionally recalculate metrics if requested
@@ -728,10 +1035,10 @@ class MemberAbsenteeismAlertViewSet(viewsets.ModelViewSet):
                 logger.error(f"Error recalculating absenteeism metrics: {str(e)}")
         
         # Get all unresolved alerts with proper pagination
-        alerts = MemberAbsenteeismAlert.objects.filter(is_resolved=False).select_related('member').order_by('-created_at')
+        alerts = self.filter_queryset(MemberAbsenteeismAlert.objects.filter(is_resolved=False).select_related('member'))
         
         # Apply pagination
-        page = self.paginate_queryset(alerts, request)
+        page = self.paginate_queryset(alerts)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
@@ -761,6 +1068,7 @@ class MemberAbsenteeismAlertViewSet(viewsets.ModelViewSet):
         alert.resolved_at = timezone.now()
         alert.resolution_notes = request.data.get('resolution_notes', 'Resolved through pastoral care')
         alert.save()
+        invalidate_care_dashboard()
         serializer = self.get_serializer(alert)
         return Response(serializer.data)
 
@@ -821,6 +1129,7 @@ class MemberAbsenteeismMetricViewSet(viewsets.ReadOnlyModelViewSet):
         
         try:
             summary = recalculate_all_absenteeism_metrics()
+            invalidate_care_dashboard()
             return Response({
                 'success': True,
                 'message': 'Absenteeism metrics recalculated',
@@ -834,3 +1143,68 @@ class MemberAbsenteeismMetricViewSet(viewsets.ReadOnlyModelViewSet):
                 'success': False,
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MessageJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress of bulk messaging jobs (e.g. send_qr_email_bulk)
+    
+    Endpoints:
+    - GET /message-jobs/ - List recent jobs
+    - GET /message-jobs/{id}/ - Poll a job's progress
+    """
+    
+    queryset = MessageJob.objects.all()
+    serializer_class = MessageJobSerializer
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if if_none_match.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+
+def immutable_image_response(request, etag, load):
+    """
+    Build a forever-cacheable image response.
+    
+    Args:
+        request: The incoming request (checked for If-None-Match)
+        etag: Quoted ETag that identifies the image bytes
+        load: Callable returning (content_type, data), or None if not found;
+              only called when the client doesn't already have the image
+    """
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        image = load()
+        if image is None:
+            raise Http404('QR code not found')
+        content_type, data = image
+        response = HttpResponse(bytes(data), content_type=content_type)
+        response['Content-Length'] = len(data)
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@require_GET
+def qr_code_blob(request, qr_hash):
+    """
+    Serve a QR code PNG by its SHA-256 hash.
+    
+    The URL is content-addressed, so the response never changes and can be
+    cached forever by browsers and CDNs. Revalidation requests (If-None-Match)
+    are answered with 304 before touching the database.
+    """
+    from .models import QRCodeBlob
+    
+    return immutable_image_response(
+        request,
+        f'"{qr_hash}"',
+        lambda: QRCodeBlob.objects.filter(sha256=qr_hash).values_list('content_type', 'data').first(),
+    )
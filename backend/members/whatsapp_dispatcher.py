@@ -0,0 +1,501 @@
+"""
+WhatsApp dispatcher - concurrent delivery of membership cards over WhatsApp
+
+Sending a card means uploading the card image to public storage (the
+provider fetches media by URL) and then calling the messaging provider.
+Both are slow network calls, so bulk sends run on a bounded thread pool:
+- provider and storage clients are created once per process and reused
+- a token bucket per provider keeps sends under WHATSAPP_RATE_PER_SECOND
+- transient failures (timeouts, connection errors, HTTP 429/5xx) are
+  retried with exponential backoff
+- unchanged cards are not re-rendered or re-uploaded: the content hash and
+  public URL of each member's last upload are kept (CardUpload), so a
+  repeat send to the whole congregation only costs the provider calls
+
+Providers (settings.WHATSAPP_PROVIDER):
+- 'twilio': Twilio WhatsApp API
+- 'stub':   no network; records messages in memory with optional latency
+            and failure rate, for tests and offline load testing
+
+Media storage (settings.WHATSAPP_MEDIA_STORAGE):
+- 'supabase': Supabase Storage public bucket
+- 'local':    Django default storage under whatsapp_cards/
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (rate limited or provider-side errors)
+TRANSIENT_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class TransientSendError(Exception):
+    """A failure that is expected to succeed when retried"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    acquire() blocks until a token is available; tokens refill at `rate`
+    per second up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def is_transient_error(error):
+    """Whether a provider/storage error is worth retrying"""
+    if isinstance(error, (TransientSendError, ConnectionError, TimeoutError)):
+        return True
+    if getattr(error, 'status', None) in TRANSIENT_STATUS_CODES:
+        return True
+    try:
+        import requests
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+    except ImportError:
+        pass
+    return False
+
+
+def with_retries(func, attempts=None, base_delay=None):
+    """
+    Call func(), retrying transient errors with exponential backoff.
+
+    Non-transient errors and the last transient error are raised.
+    """
+    attempts = attempts or getattr(settings, 'WHATSAPP_MAX_ATTEMPTS', 3)
+    base_delay = base_delay if base_delay is not None else getattr(settings, 'WHATSAPP_RETRY_BASE_SECONDS', 1.0)
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= attempts or not is_transient_error(e):
+                raise
+            delay = base_delay * 2 ** (attempt - 1)
+            logger.info(f"Transient WhatsApp error (attempt {attempt}/{attempts}), retrying in {delay}s: {str(e)}")
+            time.sleep(delay)
+
+
+# ============ Providers ============
+
+class WhatsAppProvider:
+    """Interface for WhatsApp messaging providers"""
+
+    name = None
+
+    def __init__(self):
+        rate = getattr(settings, 'WHATSAPP_RATE_PER_SECOND', 0)
+        self.rate_limiter = TokenBucket(rate) if rate else None
+
+    def is_configured(self):
+        return True
+
+    def send(self, to, body, media_url=None):
+        """
+        Send one message.
+
+        Args:
+            to: Recipient in 'whatsapp:+233...' form
+            body: Message text
+            media_url: Optional public URL of an image to attach
+
+        Returns:
+            str: Provider message ID
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self._send(to, body, media_url)
+
+    def _send(self, to, body, media_url):
+        raise NotImplementedError
+
+
+class TwilioWhatsAppProvider(WhatsAppProvider):
+    """Twilio WhatsApp API; one Client (and HTTP session) shared by all threads"""
+
+    name = 'twilio'
+
+    def __init__(self):
+        super().__init__()
+        self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+        self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+        whatsapp_from = os.getenv('TWILIO_WHATSAPP_FROM', 'whatsapp:+1234567890')
+
+        # Ensure whatsapp: prefix is present
+        if whatsapp_from and not whatsapp_from.startswith('whatsapp:'):
+            whatsapp_from = f'whatsapp:{whatsapp_from}'
+        self.whatsapp_from = whatsapp_from
+
+        self.client = None
+        if self.account_sid and self.auth_token:
+            try:
+                from twilio.rest import Client
+                self.client = Client(self.account_sid, self.auth_token)
+            except ImportError:
+                logger.warning("Twilio client not installed. WhatsApp service disabled.")
+
+    def is_configured(self):
+        return self.client is not None
+
+    def _send(self, to, body, media_url):
+        kwargs = {'from_': self.whatsapp_from, 'to': to, 'body': body}
+        if media_url:
+            kwargs['media_url'] = [media_url]
+        return self.client.messages.create(**kwargs).sid
+
+
+class StubWhatsAppProvider(WhatsAppProvider):
+    """
+    Offline provider: records messages in memory instead of sending them.
+
+    WHATSAPP_STUB_LATENCY_MS and WHATSAPP_STUB_FAILURE_RATE simulate network
+    latency and transient failures for load testing the dispatcher.
+    """
+
+    name = 'stub'
+
+    def __init__(self):
+        super().__init__()
+        self.latency = getattr(settings, 'WHATSAPP_STUB_LATENCY_MS', 0) / 1000.0
+        self.failure_rate = getattr(settings, 'WHATSAPP_STUB_FAILURE_RATE', 0.0)
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def _send(self, to, body, media_url):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransientSendError('Simulated provider failure')
+        sid = f"SMstub{uuid.uuid4().hex[:24]}"
+        with self._lock:
+            self.sent.append({'sid': sid, 'to': to, 'body': body, 'media_url': media_url})
+        return sid
+
+
+WHATSAPP_PROVIDERS = {
+    'twilio': TwilioWhatsAppProvider,
+    'stub': StubWhatsAppProvider,
+}
+
+
+# ============ Media storage ============
+
+class MediaStorage:
+    """Interface for storage that serves uploaded media at a public URL"""
+
+    name = None
+
+    def upload(self, name, data, content_type='image/png'):
+        """
+        Upload data under name (replacing any existing object).
+
+        Returns:
+            str: Public URL of the object, or None if storage is unavailable
+        """
+        raise NotImplementedError
+
+
+class SupabaseMediaStorage(MediaStorage):
+    """Supabase Storage bucket; the client is created once and reused"""
+
+    name = 'supabase'
+
+    def __init__(self):
+        self.url = os.getenv('SUPABASE_URL')
+        self.key = os.getenv('SUPABASE_ANON_KEY')
+        self.bucket_name = os.getenv('SUPABASE_BUCKET', 'qr_codes')
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _bucket(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self.url, self.key)
+        return self._client.storage.from_(self.bucket_name)
+
+    def upload(self, name, data, content_type='image/png'):
+        if not self.url or not self.key:
+            logger.error("Supabase credentials not configured")
+            return None
+        try:
+            bucket = self._bucket()
+        except ImportError:
+            logger.error("Supabase client not installed. Install with: pip install supabase")
+            return None
+
+        bucket.upload(name, BytesIO(data), {"contentType": content_type, "upsert": "true"})
+        return bucket.get_public_url(name)
+
+
+class LocalMediaStorage(MediaStorage):
+    """Django default storage; URLs are made absolute with PUBLIC_BASE_URL"""
+
+    name = 'local'
+    prefix = 'whatsapp_cards'
+
+    def upload(self, name, data, content_type='image/png'):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        path = f"{self.prefix}/{name}"
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        path = default_storage.save(path, ContentFile(data))
+        return f"{getattr(settings, 'PUBLIC_BASE_URL', '').rstrip('/')}{default_storage.url(path)}"
+
+
+MEDIA_STORAGES = {
+    'supabase': SupabaseMediaStorage,
+    'local': LocalMediaStorage,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _shared_instance(registry, name):
+    with _instances_lock:
+        key = (id(registry), name)
+        if key not in _instances:
+            _instances[key] = registry[name]()
+        return _instances[key]
+
+
+def get_whatsapp_provider(name=None):
+    """The process-wide provider instance for settings.WHATSAPP_PROVIDER (or name)"""
+    return _shared_instance(WHATSAPP_PROVIDERS, name or getattr(settings, 'WHATSAPP_PROVIDER', 'twilio'))
+
+
+def get_media_storage(name=None):
+    """The process-wide media storage for settings.WHATSAPP_MEDIA_STORAGE (or name)"""
+    return _shared_instance(MEDIA_STORAGES, name or getattr(settings, 'WHATSAPP_MEDIA_STORAGE', 'supabase'))
+
+
+# ============ Sending ============
+
+def card_upload_state(members, storage):
+    """
+    Content hash of each member's card and the URL of its last upload, if
+    that upload still matches the card.
+
+    Returns:
+        dict: member pk -> (content_hash, public_url or None)
+    """
+    from .models import CardUpload
+    from .qr_card_generator import card_content_hash, card_fields
+
+    uploads = {
+        upload.member_id: upload
+        for upload in CardUpload.objects.filter(member__in=[member.pk for member in members], storage=storage.name)
+    }
+    state = {}
+    for member in members:
+        content_hash = card_content_hash(card_fields(member))
+        upload = uploads.get(member.pk)
+        state[member.pk] = (content_hash, upload.public_url if upload and upload.content_hash == content_hash else None)
+    return state
+
+
+def record_card_uploads(uploads, storage):
+    """
+    Remember uploaded cards so they are reused on the next send.
+
+    Args:
+        uploads: Iterable of (member, content_hash, public_url)
+    """
+    from .models import CardUpload
+
+    rows = [
+        CardUpload(member=member, storage=storage.name, content_hash=content_hash, public_url=public_url)
+        for member, content_hash, public_url in uploads
+    ]
+    if rows:
+        CardUpload.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['member'],
+            update_fields=['storage', 'content_hash', 'public_url', 'uploaded_at'],
+        )
+
+
+def send_member_card(member, card_png, provider, storage, phone_number=None, media_url=None, content_hash=None):
+    """
+    Upload a member's card and send it over WhatsApp (with retries).
+
+    If media_url is given the card was already uploaded and is only sent.
+    Uploads are named after content_hash, so a changed card never reuses a
+    URL the provider (or a CDN) may have cached.
+
+    Doesn't touch the database, so it can run on worker threads.
+
+    Returns:
+        dict: {'success', 'message_sid', 'error', 'phone_number', 'media_url', 'uploaded'}
+    """
+    from .whatsapp_service import WhatsAppService
+
+    whatsapp_to = WhatsAppService._format_phone_number(phone_number or member.phone)
+
+    uploaded = False
+    if media_url is None and card_png is not None:
+        name = f"qr_{member.member_id}_{content_hash[:16]}.png" if content_hash else f"qr_{member.member_id}.png"
+        try:
+            media_url = with_retries(lambda: storage.upload(name, card_png))
+            uploaded = media_url is not None
+        except Exception as e:
+            # Fall back to a text-only message
+            logger.error(f"Failed to upload card for {member.member_id}: {str(e)}")
+
+    message_body = WhatsAppService._create_message_body(member)
+    message_sid = with_retries(lambda: provider.send(whatsapp_to, message_body, media_url))
+
+    logger.info(f"WhatsApp message sent to {whatsapp_to}, SID: {message_sid}")
+    return {
+        'success': True,
+        'message_sid': message_sid,
+        'error': None,
+        'phone_number': whatsapp_to,
+        'media_url': media_url,
+        'uploaded': uploaded,
+    }
+
+
+def dispatch_whatsapp_cards(members, on_result, provider=None, storage=None, workers=None, phone_numbers=None):
+    """
+    Send membership cards to many members concurrently.
+
+    Members whose card is unchanged since its last upload are sent the
+    stored URL without rendering or uploading anything. The remaining cards
+    are rendered ahead on the card worker pool (card_batch_service) and
+    uploaded as part of their send. Sends run on a bounded thread pool;
+    on_result(member, result) is called on the calling thread for every
+    member, in completion order.
+
+    Args:
+        members: Member queryset
+        on_result: Callback receiving (member, result dict)
+        provider, storage: Default to the configured shared instances
+        workers: Send concurrency (default: settings.WHATSAPP_DISPATCH_WORKERS)
+        phone_numbers: Optional dict mapping member pk to a phone number override
+    """
+    from .card_batch_service import iter_cards
+
+    provider = provider or get_whatsapp_provider()
+    storage = storage or get_media_storage()
+    workers = workers or getattr(settings, 'WHATSAPP_DISPATCH_WORKERS', 8)
+    phone_numbers = phone_numbers or {}
+
+    members = members.order_by('member_id')
+    by_member_id = {member.member_id: member for member in members}
+    upload_state = card_upload_state(list(by_member_id.values()), storage)
+    new_uploads = []
+
+    def collect(futures):
+        for future in futures:
+            member = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {
+                    'success': False,
+                    'error': f"Failed to send WhatsApp message: {str(e)}",
+                    'message_sid': None
+                }
+            if result.get('uploaded'):
+                new_uploads.append((member, upload_state[member.pk][0], result['media_url']))
+            on_result(member, result)
+
+    def submit(pool, member, card_png, media_url):
+        phone = phone_numbers.get(member.pk) or member.phone
+        content_hash = upload_state[member.pk][0]
+        future = pool.submit(send_member_card, member, card_png, provider, storage, phone, media_url, content_hash)
+        in_flight[future] = member
+        # Keep at most two sends per worker queued, so cards aren't all held in memory
+        if len(in_flight) >= workers * 2:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            collect(done)
+
+    in_flight = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            changed = []
+            for member in by_member_id.values():
+                media_url = upload_state[member.pk][1]
+                if not (phone_numbers.get(member.pk) or member.phone):
+                    on_result(member, {
+                        'success': False,
+                        'error': f'Member {member.full_name} does not have a phone number',
+                        'message_sid': None
+                    })
+                elif media_url:
+                    submit(pool, member, None, media_url)
+                else:
+                    changed.append(member.pk)
+
+            if changed:
+                for member_id, card_png in iter_cards(members.filter(pk__in=changed)):
+                    submit(pool, by_member_id[member_id], card_png, None)
+
+            collect(list(in_flight))
+    finally:
+        record_card_uploads(new_uploads, storage)
+
+
+def run_whatsapp_campaign(job, workers=None):
+    """
+    Send the membership card over WhatsApp to every member of a MessageJob.
+
+    Raises:
+        RuntimeError: If the WhatsApp provider isn't configured
+    """
+    from .campaign_service import JobProgress
+
+    provider = get_whatsapp_provider()
+    if not provider.is_configured():
+        raise RuntimeError('WhatsApp service not configured. Set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN.')
+
+    progress = JobProgress(job)
+
+    def on_result(member, result):
+        if result['success']:
+            progress.success(member)
+        else:
+            progress.failure(member, result['error'])
+
+    dispatch_whatsapp_cards(
+        job.remaining_members(),
+        on_result,
+        provider=provider,
+        workers=workers,
+    )
+    progress.save()
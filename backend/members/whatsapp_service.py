@@ -2,41 +2,31 @@
 WhatsApp Service for sending QR codes to members
 
 This module provides functionality to send member QR codes via WhatsApp
-using the Twilio WhatsApp API or similar service.
+using the Twilio WhatsApp API or similar service. Providers, media storage,
+rate limiting and concurrent bulk sends live in whatsapp_dispatcher.
 """
 
 import logging
-import os
 from django.conf import settings
-from io import BytesIO
-import base64
 
 logger = logging.getLogger(__name__)
 
 
 class WhatsAppService:
-    """WhatsApp integration service using Twilio"""
+    """
+    WhatsApp integration service
+    
+    Sends through the configured provider (Twilio by default) and media
+    storage; both are shared per process (see members.whatsapp_dispatcher).
+    """
     
     def __init__(self):
-        """Initialize WhatsApp service with Twilio credentials"""
-        self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        whatsapp_from = os.getenv('TWILIO_WHATSAPP_FROM', 'whatsapp:+1234567890')
-        
-        # Ensure whatsapp: prefix is present
-        if whatsapp_from and not whatsapp_from.startswith('whatsapp:'):
-            whatsapp_from = f'whatsapp:{whatsapp_from}'
-        self.whatsapp_from = whatsapp_from
-        
-        self.enabled = self.account_sid and self.auth_token
+        """Use the shared WhatsApp provider and media storage"""
+        from .whatsapp_dispatcher import get_media_storage, get_whatsapp_provider
         
-        if self.enabled:
-            try:
-                from twilio.rest import Client
-                self.client = Client(self.account_sid, self.auth_token)
-            except ImportError:
-                logger.warning("Twilio client not installed. WhatsApp service disabled.")
-                self.enabled = False
+        self.provider = get_whatsapp_provider()
+        self.storage = get_media_storage()
+        self.enabled = self.provider.is_configured()
     
     def is_enabled(self):
         """Check if WhatsApp service is properly configured"""
@@ -77,44 +67,17 @@ class WhatsAppService:
             }
         
         try:
-            # Format phone number for WhatsApp
-            whatsapp_to = self._format_phone_number(phone_number)
-            
-            # Generate QR code card
             from .qr_card_generator import generate_qr_code_card
-            card_data = generate_qr_code_card(member, format='png')
-            
-            # Upload QR code to Cloudinary and get URL
-            media_url = self._upload_qr_to_cloudinary(member, card_data)
-            
-            # Create message body
-            message_body = self._create_message_body(member)
-            
-            # Send message via Twilio with media
-            if media_url:
-                # media_url from Supabase is already public and absolute
-                message = self.client.messages.create(
-                    from_=self.whatsapp_from,
-                    to=whatsapp_to,
-                    body=message_body,
-                    media_url=[media_url],
-                )
-            else:
-                # Fallback: send without media if upload fails
-                message = self.client.messages.create(
-                    from_=self.whatsapp_from,
-                    to=whatsapp_to,
-                    body=message_body,
-                )
+            from .whatsapp_dispatcher import card_upload_state, record_card_uploads, send_member_card
             
-            logger.info(f"WhatsApp message sent to {whatsapp_to}, SID: {message.sid}")
-            
-            return {
-                'success': True,
-                'message_sid': message.sid,
-                'error': None,
-                'phone_number': whatsapp_to
-            }
+            # Reuse the last upload unless the member's card details changed
+            content_hash, media_url = card_upload_state([member], self.storage)[member.pk]
+            card_data = None if media_url else generate_qr_code_card(member, format='png')
+            result = send_member_card(member, card_data, self.provider, self.storage, phone_number,
+                                      media_url=media_url, content_hash=content_hash)
+            if result['uploaded']:
+                record_card_uploads([(member, content_hash, result['media_url'])], self.storage)
+            return result
             
         except Exception as e:
             error_msg = f"Failed to send WhatsApp message: {str(e)}"
@@ -129,9 +92,12 @@ class WhatsAppService:
         """
         Send QR codes to multiple members via WhatsApp
         
+        Sends run concurrently (see whatsapp_dispatcher.dispatch_whatsapp_cards);
+        for large sends prefer a background MessageJob.
+        
         Args:
-            members: List of Member instances
-            phone_numbers: Optional dict mapping member_id to phone_number
+            members: Member queryset (or list of Member instances)
+            phone_numbers: Optional dict mapping member pk to phone_number
         
         Returns:
             dict: {
@@ -140,85 +106,33 @@ class WhatsAppService:
                 'results': list of result dicts
             }
         """
+        from .models import Member
+        from .whatsapp_dispatcher import dispatch_whatsapp_cards
+        
+        if isinstance(members, (list, tuple)):
+            members = Member.objects.filter(pk__in=[member.pk for member in members])
+        
         results = []
-        success_count = 0
-        failure_count = 0
         
-        for member in members:
-            phone = None
-            if phone_numbers and member.id in phone_numbers:
-                phone = phone_numbers[member.id]
-            
-            result = self.send_qr_code(member, phone)
+        def on_result(member, result):
             results.append({
                 'member_id': member.member_id,
                 'member_name': member.full_name,
                 **result
             })
-            
-            if result['success']:
-                success_count += 1
-            else:
-                failure_count += 1
         
+        if self.enabled:
+            dispatch_whatsapp_cards(members, on_result, provider=self.provider, storage=self.storage,
+                                    phone_numbers=phone_numbers)
+        
+        success_count = sum(1 for result in results if result['success'])
         return {
             'success_count': success_count,
-            'failure_count': failure_count,
-            'total': len(members),
+            'failure_count': len(results) - success_count,
+            'total': len(results),
             'results': results
         }
     
-    @staticmethod
-    def _upload_qr_to_cloudinary(member, card_data):
-        """
-        Upload QR code to Supabase Storage and return public URL
-        
-        Args:
-            member: Member instance
-            card_data: Binary PNG image data
-        
-        Returns:
-            str: Public URL to the image, or None if upload fails
-        """
-        try:
-            from supabase import create_client
-            from io import BytesIO
-            
-            supabase_url = os.getenv('SUPABASE_URL')
-            supabase_key = os.getenv('SUPABASE_ANON_KEY')
-            bucket_name = os.getenv('SUPABASE_BUCKET', 'qr_codes')
-            
-            if not supabase_url or not supabase_key:
-                logger.error("Supabase credentials not configured")
-                return None
-            
-            # Initialize Supabase client
-            supabase = create_client(supabase_url, supabase_key)
-            
-            # Prepare file
-            filename = f"qr_{member.member_id}.png"
-            file_obj = BytesIO(card_data)
-            
-            # Upload to Supabase Storage
-            response = supabase.storage.from_(bucket_name).upload(
-                filename,
-                file_obj,
-                {"contentType": "image/png", "upsert": "true"}
-            )
-            
-            # Get public URL
-            public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
-            
-            logger.info(f"QR code uploaded to Supabase: {public_url}")
-            return public_url
-            
-        except ImportError:
-            logger.error("Supabase client not installed. Install with: pip install supabase")
-            return None
-        except Exception as e:
-            logger.error(f"Failed to upload QR code to Supabase: {str(e)}")
-            return None
-    
     @staticmethod
     def _format_phone_number(phone_number):
         """
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_service_generated_until'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['updated_at'], name='services_updated_idx'),
+        ),
+    ]
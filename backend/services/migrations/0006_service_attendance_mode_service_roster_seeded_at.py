@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_service_services_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='attendance_mode',
+            field=models.CharField(choices=[('standard', 'Mark absences when the session closes'), ('preseeded', 'Pre-seed absences when the session opens')], default='standard', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='roster_seeded_at',
+            field=models.DateTimeField(blank=True, help_text='When absent rows were pre-seeded', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_service_attendance_mode_service_roster_seeded_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='service',
+            name='attendance_mode',
+            field=models.CharField(choices=[('standard', 'Mark absences when the session closes'), ('preseeded', 'Pre-seed absences when the session opens'), ('implicit', 'Store presences only; derive absences from the roster')], default='standard', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_alter_service_attendance_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='roster_class',
+            field=models.CharField(blank=True, choices=[('airport', 'Airport'), ('abesim', 'Abesim'), ('old_abesim', 'Old Abesim'), ('asufufu_adomako', 'Asufufu / Adomako'), ('baakoniaba', 'Baakoniaba'), ('berlin_top_class_1', 'Berlin Top class 1'), ('berlin_top_class_2', 'Berlin Top class 2'), ('penkwase_class_1', 'Penkwase class 1'), ('penkwase_class_2', 'Penkwase class 2'), ('mayfair', 'Mayfair'), ('odumase', 'Odumase'), ('new_dormaa_kotokrom', 'New Dormaa / Kotokrom'), ('dumasua', 'Dumasua'), ('fiapre_class_1', 'Fiapre Class 1'), ('fiapre_class_2', 'Fiapre Class 2'), ('magazine', 'Magazine'), ('town_centre', 'Town Centre'), ('newtown_estate', 'Newtown/Estate'), ('distance', 'Distance')], max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='roster_committee',
+            field=models.CharField(blank=True, choices=[('finance', 'Finance'), ('audit', 'Audit'), ('project', 'Project'), ('life_builders', 'Life Builders'), ('health', 'Health'), ('welfare', 'Welfare'), ('harvest', 'Harvest')], max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='roster_department',
+            field=models.CharField(blank=True, choices=[('technical', 'Technical'), ('media', 'Media'), ('echoes_of_grace', 'Echoes of Grace'), ('celestial_harmony_choir', 'Celestial Harmony Choir'), ('heavenly_vibes', 'Heavenly Vibes'), ('prayer_evangelism', 'Prayer and Evangelism'), ('visitor_care', 'Visitor Care'), ('protocol_ushering', 'Protocol & Ushering')], max_length=100, null=True),
+        ),
+    ]
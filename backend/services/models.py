@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from members.models import Member
 
 
 class Service(models.Model):
@@ -10,6 +13,15 @@ class Service(models.Model):
         ('monthly', 'Monthly'),
     ]
     
+    ATTENDANCE_MODE_STANDARD = 'standard'
+    ATTENDANCE_MODE_PRESEEDED = 'preseeded'
+    ATTENDANCE_MODE_IMPLICIT = 'implicit'
+    ATTENDANCE_MODE_CHOICES = [
+        (ATTENDANCE_MODE_STANDARD, 'Mark absences when the session closes'),
+        (ATTENDANCE_MODE_PRESEEDED, 'Pre-seed absences when the session opens'),
+        (ATTENDANCE_MODE_IMPLICIT, 'Store presences only; derive absences from the roster'),
+    ]
+    
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     date = models.DateField(null=True, blank=True)  # Nullable for recurring services
@@ -37,12 +49,61 @@ class Service(models.Model):
     # Enables on-demand session generation without batch-creating all upfront
     generated_until = models.DateField(null=True, blank=True, help_text="Last date instances were generated until")
     
+    # How absences are recorded (copied from the recurring parent to its sessions).
+    # Pre-seeded sessions get an absent row per expected member when they open;
+    # check-in flips it to present and closing only finalizes the remaining rows.
+    # Implicit sessions store no absent rows at all: closing records who was
+    # expected (attendance.SessionRoster) and absences are derived from it.
+    attendance_mode = models.CharField(
+        max_length=20,
+        choices=ATTENDANCE_MODE_CHOICES,
+        default=ATTENDANCE_MODE_STANDARD
+    )
+    roster_seeded_at = models.DateTimeField(null=True, blank=True, help_text="When absent rows were pre-seeded")
+    
+    # Expected roster: the non-visitor members matching every scope set here
+    # (none set means everyone). A session takes each scope it leaves empty
+    # from its recurring parent. Only expected members are marked absent and
+    # have their absences counted.
+    roster_department = models.CharField(max_length=100, choices=Member.DEPARTMENT_CHOICES, blank=True, null=True)
+    roster_class = models.CharField(max_length=100, choices=Member.CLASS_CHOICES, blank=True, null=True)
+    roster_committee = models.CharField(max_length=100, choices=Member.COMMITTEE_CHOICES, blank=True, null=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            # Delta sync reads services changed since a cursor
+            models.Index(fields=['updated_at'], name='services_updated_idx'),
+        ]
+    
+    # Service roster scope field -> Member field it matches
+    ROSTER_SCOPE_FIELDS = {
+        'roster_department': 'department',
+        'roster_class': 'class_name',
+        'roster_committee': 'committee',
+    }
     
     def __str__(self):
         return f"{self.name} - {self.date} at {self.start_time}"
+    
+    def get_roster_scope(self):
+        """Member field lookups selecting this session's expected members (empty for everyone)"""
+        scope = {}
+        for field, member_field in self.ROSTER_SCOPE_FIELDS.items():
+            value = getattr(self, field)
+            if not value and self.parent_service_id:
+                value = getattr(self.parent_service, field)
+            if value:
+                scope[member_field] = value
+        return scope
+
+
 
+@receiver(post_delete, sender=Service)
+def record_service_tombstone(sender, instance, **kwargs):
+    """Log the deletion so sync clients drop their copy of the service"""
+    from members.models import SyncTombstone
+    SyncTombstone.objects.create(kind=SyncTombstone.KIND_SERVICE, object_id=instance.pk)
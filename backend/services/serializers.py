@@ -16,14 +16,19 @@ class ServiceSerializer(serializers.ModelSerializer):
             'is_recurring',
             'recurrence_pattern',
             'parent_service',
+            'attendance_mode',
+            'roster_seeded_at',
+            'roster_department',
+            'roster_class',
+            'roster_committee',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'roster_seeded_at', 'created_at', 'updated_at']
 
 
 class ServiceDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Service
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'roster_seeded_at', 'created_at', 'updated_at']
@@ -6,7 +6,7 @@ when service end times pass.
 """
 from celery import shared_task
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Exists, OuterRef, Q
 from datetime import datetime
 import logging
 
@@ -31,28 +31,29 @@ def auto_mark_absent_for_ended_services(self):
     try:
         from services.models import Service
         from attendance.models import Attendance
-        from members.models import Member
         from members.utils import update_absenteeism_alerts
+        from services.utils import close_preseeded_session, finalize_roster_rows, get_expected_members
+        from attendance.absences import close_implicit_session
         
         now = timezone.now().time()
         today = timezone.now().date()
         
-        # Find services that have ended but not fully marked
+        # Find services that have ended and whose attendance hasn't been
+        # taken yet, which each mode records differently:
+        # - pre-seeded: not seeded yet, or roster rows not finalized
+        # - implicit: no SessionRoster stored
+        # - standard: no absences marked (manually or automatically)
+        roster_rows = Attendance.objects.filter(service=OuterRef('pk'), marked_by=Attendance.MARKED_BY_ROSTER)
+        marked_rows = Attendance.objects.filter(service=OuterRef('pk'), marked_by__in=['manual', 'auto'])
         ended_services = Service.objects.filter(
             date=today,
             end_time__isnull=False,
             end_time__lt=now,  # End time has passed
-        ).exclude(
-            # Exclude services that have already been fully processed
-            # (all members have attendance records)
-            id__in=Attendance.objects.filter(
-                service__date=today,
-                service__end_time__isnull=False,
-            ).values('service_id').annotate(
-                count=Count('id')
-            ).filter(
-                count=Count('service__attendances')
-            ).values_list('service_id', flat=True)
+        ).filter(
+            Q(attendance_mode=Service.ATTENDANCE_MODE_PRESEEDED)
+            & (Q(roster_seeded_at__isnull=True) | Exists(roster_rows))
+            | Q(attendance_mode=Service.ATTENDANCE_MODE_IMPLICIT, session_roster__isnull=True)
+            | Q(attendance_mode=Service.ATTENDANCE_MODE_STANDARD) & ~Exists(marked_rows)
         )
         
         summary = {
@@ -64,8 +65,29 @@ def auto_mark_absent_for_ended_services(self):
         
         for service in ended_services:
             try:
-                # Get all non-visitor members
-                members = Member.objects.filter(is_visitor=False)
+                if service.attendance_mode == Service.ATTENDANCE_MODE_PRESEEDED:
+                    # Absent rows already exist; finalize the ones nobody checked in on
+                    marked = close_preseeded_session(service, marked_by='auto')
+                    summary['total_members_marked'] += marked
+                    summary['alerts_updated'] += marked
+                    summary['services_processed'] += 1
+                    continue
+                
+                if service.attendance_mode == Service.ATTENDANCE_MODE_IMPLICIT:
+                    # Store who was expected; absences are derived, not written
+                    marked = close_implicit_session(service, marked_by='auto')
+                    summary['total_members_marked'] += marked
+                    summary['alerts_updated'] += marked
+                    summary['services_processed'] += 1
+                    continue
+                
+                # Seeded before the session was switched to standard mode
+                finalized = finalize_roster_rows(service, marked_by='auto')
+                summary['total_members_marked'] += finalized
+                summary['alerts_updated'] += finalized
+                
+                # Get the non-visitor members expected at this service
+                members = get_expected_members(service)
                 
                 for member in members:
                     # Check if member already has attendance record
@@ -107,6 +129,42 @@ def auto_mark_absent_for_ended_services(self):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def seed_started_session_rosters(self):
+    """
+    Periodic task that pre-seeds the roster of pre-seeded sessions that have
+    started today: one absent row per expected member, inserted in a single
+    statement, so check-ins are updates and closing the session is cheap.
+    
+    Returns:
+        dict: Sessions seeded and rows created
+    """
+    try:
+        from services.models import Service
+        from services.utils import seed_session_roster
+        
+        now = timezone.now()
+        started = Service.objects.filter(
+            attendance_mode=Service.ATTENDANCE_MODE_PRESEEDED,
+            date=now.date(),
+            start_time__lte=now.time(),
+            roster_seeded_at__isnull=True,
+        )
+        
+        summary = {'sessions_seeded': 0, 'rows_created': 0}
+        for service in started:
+            summary['rows_created'] += seed_session_roster(service)
+            summary['sessions_seeded'] += 1
+        
+        if summary['sessions_seeded']:
+            logger.info(f"Seeded session rosters: {summary}")
+        return summary
+        
+    except Exception as exc:
+        logger.error(f"Error in seed_started_session_rosters: {str(exc)}", exc_info=True)
+        raise self.retry(exc=exc, countdown=60)
+
+
 @shared_task(bind=True)
 def recalculate_all_alerts(self):
     """
@@ -1,3 +1,141 @@
+import datetime
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from attendance.absences import taken_session_ids
+from attendance.models import Attendance, SessionRoster
+from members.models import Member
+from members.utils import calculate_absenteeism_metric
+
+from .models import Service
+from .tasks import auto_mark_absent_for_ended_services
+from .utils import close_preseeded_session, create_service_instance, seed_session_roster
+
+
+class PreseededRosterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.here = Member.objects.create(full_name="Roster Here")
+        cls.away = Member.objects.create(full_name="Roster Away")
+        Member.objects.create(full_name="Roster Visitor", is_visitor=True)
+        cls.service = Service.objects.create(name="Roster Service", date=datetime.date(2026, 10, 18),
+                                             start_time=datetime.time(9, 0), end_time=datetime.time(11, 0),
+                                             attendance_mode=Service.ATTENDANCE_MODE_PRESEEDED)
+
+    def test_seed_checkin_and_close(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(seed_session_roster(self.service), 2)
+        self.assertEqual(seed_session_roster(self.service), 0)
+        self.assertEqual(calculate_absenteeism_metric(self.away)['total_services'], 0)
+
+        response = APIClient().post('/api/attendance/checkin/',
+                                    {'member_id': self.here.member_id, 'service_id': self.service.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        row = Attendance.objects.get(member=self.here, service=self.service)
+        self.assertEqual((row.status, row.marked_by), ('present', 'check_in'))
+        self.assertEqual(response.data['attendance']['id'], row.id)
+        self.assertEqual(response.data['attendance']['created_at'], row.created_at)
+
+        self.assertEqual(close_preseeded_session(self.service, marked_by='auto'), 1)
+        row = Attendance.objects.get(member=self.away, service=self.service)
+        self.assertEqual((row.status, row.marked_by, row.is_auto_marked), ('absent', 'auto', True))
+        self.assertEqual(calculate_absenteeism_metric(self.away)['absent_count'], 1)
+
+    def test_close_after_switching_to_standard_finalizes_roster_rows(self):
+        seed_session_roster(self.service)
+        self.service.attendance_mode = Service.ATTENDANCE_MODE_STANDARD
+        self.service.save()
+
+        response = APIClient().post('/api/attendance/mark_absent/', {'service_id': self.service.id}, format='json')
+        self.assertEqual(response.data['message'], 'Marked 2 members as absent')
+        self.assertEqual(Attendance.objects.get(member=self.away, service=self.service).marked_by, 'manual')
+        self.assertEqual(taken_session_ids([self.service.id]), {self.service.id})
+
+    def test_open_roster_rows_dont_count_towards_ten_absences(self):
+        for day in range(1, 10):
+            earlier = Service.objects.create(name="Earlier Service", date=datetime.date(2026, 10, day),
+                                             start_time=datetime.time(9, 0))
+            Attendance.objects.create(member=self.away, service=earlier, status='absent', marked_by='manual')
+        seed_session_roster(self.service)
+
+        client = APIClient()
+        self.assertEqual(client.get('/api/members/with_ten_absences/').data['count'], 0)
+        close_preseeded_session(self.service)
+        self.assertEqual([m['id'] for m in client.get('/api/members/with_ten_absences/').data['members']],
+                         [self.away.pk])
+
+
+class RosterScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.singer = Member.objects.create(full_name="Choir Singer", department='celestial_harmony_choir')
+        cls.other = Member.objects.create(full_name="Not In Choir", department='media')
+        cls.rehearsal = Service.objects.create(name="Choir Rehearsal", is_recurring=True, recurrence_pattern='weekly',
+                                               start_time=datetime.time(17, 0), end_time=datetime.time(19, 0),
+                                               roster_department='celestial_harmony_choir')
+
+    def test_mark_absent_and_metric_follow_parent_roster(self):
+        session = create_service_instance(self.rehearsal, datetime.date(2026, 10, 15))
+        self.assertEqual(session.get_roster_scope(), {'department': 'celestial_harmony_choir'})
+
+        response = APIClient().post('/api/attendance/mark_absent/', {'service_id': session.id}, format='json')
+        self.assertEqual(response.data['message'], 'Marked 1 members as absent')
+        self.assertEqual(list(Attendance.objects.filter(service=session).values_list('member_id', flat=True)),
+                         [self.singer.pk])
+
+        # An absence recorded before the roster was scoped doesn't count against outsiders
+        Attendance.objects.create(member=self.other, service=session, status='absent', marked_by='manual')
+        self.assertEqual(calculate_absenteeism_metric(self.other)['total_services'], 0)
+        self.assertEqual(calculate_absenteeism_metric(self.singer)['absent_count'], 1)
+
+
+class AutoMarkAbsentTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.here = Member.objects.create(full_name="Task Here")
+        cls.away = Member.objects.create(full_name="Task Away")
+
+    def run_task(self):
+        # An hour after the sessions below ended
+        after_end = datetime.datetime(2026, 10, 18, 12, 0, tzinfo=datetime.timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=after_end):
+            return auto_mark_absent_for_ended_services()
+
+    def create_session(self, attendance_mode):
+        return Service.objects.create(name="Task Service", date=datetime.date(2026, 10, 18),
+                                      start_time=datetime.time(9, 0), end_time=datetime.time(11, 0),
+                                      attendance_mode=attendance_mode)
+
+    def test_closes_seeded_preseeded_session_once(self):
+        service = self.create_session(Service.ATTENDANCE_MODE_PRESEEDED)
+        seed_session_roster(service)
+        Attendance.objects.filter(member=self.here, service=service).update(status='present', marked_by='check_in')
+
+        summary = self.run_task()
+        self.assertEqual((summary['services_processed'], summary['total_members_marked']), (1, 1))
+        row = Attendance.objects.get(member=self.away, service=service)
+        self.assertEqual((row.status, row.marked_by), ('absent', 'auto'))
+        self.assertEqual(calculate_absenteeism_metric(self.away)['absent_count'], 1)
+
+        self.assertEqual(self.run_task()['services_processed'], 0)
+
+    def test_closes_implicit_session_after_check_ins(self):
+        service = self.create_session(Service.ATTENDANCE_MODE_IMPLICIT)
+        Attendance.objects.create(member=self.here, service=service, status='present', marked_by='check_in')
+
+        summary = self.run_task()
+        self.assertEqual((summary['services_processed'], summary['total_members_marked']), (1, 1))
+        self.assertTrue(SessionRoster.objects.filter(service=service).exists())
+        self.assertEqual(calculate_absenteeism_metric(self.away)['absent_count'], 1)
+
+        self.assertEqual(self.run_task()['services_processed'], 0)
+
+    def test_marks_standard_session_after_check_ins(self):
+        service = self.create_session(Service.ATTENDANCE_MODE_STANDARD)
+        Attendance.objects.create(member=self.here, service=service, status='present', marked_by='check_in')
 
-# Create your tests here.
+        self.assertEqual(self.run_task()['total_members_marked'], 1)
+        self.assertEqual(Attendance.objects.get(member=self.away, service=service).marked_by, 'auto')
+        self.assertEqual(self.run_task()['services_processed'], 0)
@@ -9,7 +9,9 @@ Lazy-Loading Pattern:
 - Parent service changes apply to future (not-yet-created) sessions
 """
 from datetime import datetime, timedelta, date
+from django.db import connection, transaction
 from django.db.models import Q
+from django.utils import timezone
 from .models import Service
 from attendance.models import Attendance
 from members.models import Member
@@ -111,6 +113,7 @@ def generate_sessions_until(parent_service, until_date):
                 location=parent_service.location,
                 description=parent_service.description,
                 parent_service=parent_service,
+                attendance_mode=parent_service.attendance_mode,
             )
             generated += 1
         
@@ -228,6 +231,7 @@ def create_service_instance(parent_service, instance_date, location=None, start_
         location=instance_location,
         description=parent_service.description,
         parent_service=parent_service,
+        attendance_mode=parent_service.attendance_mode,
     )
     
     # Ensure tracking field reflects this new date
@@ -240,7 +244,7 @@ def create_service_instance(parent_service, instance_date, location=None, start_
 
 def auto_mark_absent(service):
     """
-    Automatically mark all non-visitor members as absent who haven't checked in.
+    Automatically mark the members expected at the service (its roster) as absent who haven't checked in.
     Called when a service/session ends. Also updates member absence tracking and creates alerts.
     
     Only works for actual services/sessions (with dates), not parent recurring services (templates).
@@ -259,12 +263,20 @@ def auto_mark_absent(service):
     if not service.end_time:
         return 0
     
+    if service.attendance_mode == Service.ATTENDANCE_MODE_PRESEEDED:
+        return close_preseeded_session(service, marked_by='manual')
+    if service.attendance_mode == Service.ATTENDANCE_MODE_IMPLICIT:
+        from attendance.absences import close_implicit_session
+        return close_implicit_session(service, marked_by='manual')
+    
     from members.utils import update_absenteeism_alerts
     
-    # Get all non-visitor members
-    members = Member.objects.filter(is_visitor=False)
+    # Seeded before the session was switched to this mode
+    count = finalize_roster_rows(service, marked_by='manual')
+    
+    # Get the non-visitor members expected at this service
+    members = get_expected_members(service)
     
-    count = 0
     for member in members:
         # Check if member already has attendance record for this service
         existing = Attendance.objects.filter(
@@ -288,6 +300,130 @@ def auto_mark_absent(service):
     return count
 
 
+def get_expected_members(service):
+    """
+    Members expected at a service: the non-visitor members in its roster scope
+    (department, class, committee; see Service.get_roster_scope).
+    
+    Args:
+        service: Service object
+    
+    Returns:
+        Member queryset
+    """
+    return Member.objects.filter(is_visitor=False, **service.get_roster_scope())
+
+
+def seed_session_roster(service):
+    """
+    Pre-seeded attendance mode: insert an absent row for every expected member
+    who has no record for the session yet, in a single INSERT ... SELECT.
+    Check-ins then flip these rows to present, and closing the session only
+    has to finalize the rows that are left.
+    
+    Args:
+        service: Service object (must have a date)
+    
+    Returns:
+        Number of attendance records created
+    """
+    if not service.date:
+        return 0
+    
+    now = timezone.now()
+    opts = Attendance._meta
+    quote = connection.ops.quote_name
+    values = {
+        'service': service.pk,
+        'status': 'absent',
+        'marked_by': Attendance.MARKED_BY_ROSTER,
+        'is_auto_marked': False,
+        'check_in_time': None,
+        'notes': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+    fields = [opts.get_field(name) for name in values]
+    params = [field.get_db_prep_save(values[field.name], connection) for field in fields]
+    
+    members = (
+        get_expected_members(service)
+        .exclude(attendances__service=service)
+        .order_by()
+        .values('id')
+    )
+    members_sql, members_params = members.query.sql_with_params()
+    
+    columns = ', '.join(quote(field.column) for field in [opts.get_field('member')] + fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    conflict = ', '.join(quote(opts.get_field(name).column) for name in ('member', 'service'))
+    with connection.cursor() as cursor:
+        # "WHERE 1 = 1" keeps SQLite from reading ON CONFLICT as a join constraint
+        cursor.execute(
+            f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+            f"SELECT expected.id, {placeholders} FROM ({members_sql}) expected WHERE 1 = 1 "
+            f"ON CONFLICT ({conflict}) DO NOTHING",
+            params + list(members_params),
+        )
+        count = max(cursor.rowcount, 0)
+    
+    service.roster_seeded_at = now
+    Service.objects.filter(pk=service.pk).update(roster_seeded_at=now, updated_at=now)
+    return count
+
+
+def finalize_roster_rows(service, marked_by='manual'):
+    """
+    Turn the roster rows nobody checked in on into final absences with one
+    UPDATE, and refresh those members' metrics in the background. Every close
+    path runs this for a seeded session (roster_seeded_at set), whatever its
+    attendance mode is now, so no roster rows are left open.
+    
+    Args:
+        service: Service object
+        marked_by: 'manual' (closed by staff) or 'auto' (closed when the service ended)
+    
+    Returns:
+        Number of members marked absent
+    """
+    if service.roster_seeded_at is None:
+        return 0
+    
+    from attendance.tasks import schedule_members_absenteeism_update
+    
+    roster = Attendance.objects.filter(service=service, marked_by=Attendance.MARKED_BY_ROSTER)
+    member_ids = list(roster.values_list('member_id', flat=True))
+    count = roster.update(
+        marked_by=marked_by,
+        is_auto_marked=(marked_by == 'auto'),
+        updated_at=timezone.now(),
+    )
+    if member_ids:
+        transaction.on_commit(lambda: schedule_members_absenteeism_update(member_ids))
+    return count
+
+
+def close_preseeded_session(service, marked_by='manual'):
+    """
+    Close a pre-seeded session: roster rows nobody checked in on become final
+    absences with one UPDATE, and the members' metrics are refreshed in the
+    background.
+    
+    Args:
+        service: Service object in pre-seeded mode
+        marked_by: 'manual' (closed by staff) or 'auto' (closed when the service ended)
+    
+    Returns:
+        Number of members marked absent
+    """
+    if not service.date:
+        return 0
+    
+    # Members registered after the session opened
+    seed_session_roster(service)
+    return finalize_roster_rows(service, marked_by=marked_by)
+
+
 def get_service_instances(parent_service, num_months=3):
     """
     DEPRECATED: Use get_sessions_for_range() instead.
@@ -4,7 +4,10 @@ from rest_framework.response import Response
 from datetime import date, timedelta
 from .models import Service
 from .serializers import ServiceSerializer, ServiceDetailSerializer
-from .utils import auto_mark_absent, generate_sessions_until, get_sessions_for_range, create_service_instance
+from .utils import (
+    auto_mark_absent, generate_sessions_until, get_sessions_for_range, create_service_instance,
+    seed_session_roster,
+)
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -77,7 +80,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def close(self, request, pk=None):
         """
-        Mark all non-visitor members as absent who haven't checked in.
+        Mark the members expected at the service (its roster) as absent who haven't checked in.
         Only works for actual services/sessions, not parent recurring services.
         """
         service = self.get_object()
@@ -102,6 +105,34 @@ class ServiceViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
+    @action(detail=True, methods=['post'])
+    def open(self, request, pk=None):
+        """
+        Pre-seed the roster of a pre-seeded session now, instead of waiting for
+        its start time: one absent row per expected member, flipped to present
+        as they check in.
+        """
+        service = self.get_object()
+        
+        if service.date is None:
+            return Response(
+                {'error': f'"{service.name}" is a recurring service template. Please select a specific session/date to open.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if service.attendance_mode != Service.ATTENDANCE_MODE_PRESEEDED:
+            return Response(
+                {'error': 'Only pre-seeded sessions have a roster to open.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        count = seed_session_roster(service)
+        
+        return Response(
+            {'message': f'Seeded {count} members as absent until they check in.'},
+            status=status.HTTP_200_OK
+        )
+    
     @action(detail=True, methods=['post'])
     def generate_instances(self, request, pk=None):
         """
@@ -47,23 +47,19 @@ def test_member_creation():
         print("✗ Member ID was not generated")
         return False
     
-    print("\n3. Checking QR code base64 data...")
-    if member.qr_code_data:
-        print(f"✓ QR code data generated ({len(member.qr_code_data)} characters)")
+    print("\n3. Checking QR code PNG data...")
+    from members.qr_code_generator import generate_qr_codes, get_qr_code_png
+    generate_qr_codes(member_ids=[member.pk])
+    member.refresh_from_db()
+    qr_png_data = get_qr_code_png(member)
+    if qr_png_data:
+        print(f"✓ QR code generated ({len(qr_png_data)} bytes, hash {member.qr_code_hash})")
         
-        # Verify it's valid base64
-        try:
-            decoded = base64.b64decode(member.qr_code_data)
-            print(f"✓ Base64 data is valid")
-            
-            # Check if it's a valid PNG
-            if decoded.startswith(b"\x89PNG"):
-                print(f"✓ PNG signature is valid")
-            else:
-                print(f"✗ PNG signature is invalid")
-                return False
-        except Exception as e:
-            print(f"✗ Failed to decode base64: {e}")
+        # Check if it's a valid PNG
+        if qr_png_data.startswith(b"\x89PNG"):
+            print(f"✓ PNG signature is valid")
+        else:
+            print(f"✗ PNG signature is invalid")
             return False
     else:
         print("✗ QR code data was not generated")
@@ -78,7 +74,7 @@ def test_member_creation():
     
     print("\n5. Verifying member is saved in database...")
     reloaded = Member.objects.get(pk=member.pk)
-    if reloaded.qr_code_data == member.qr_code_data:
+    if reloaded.qr_code_hash == member.qr_code_hash:
         print(f"✓ Member and QR data persisted in database")
     else:
         print("✗ QR data was not persisted")
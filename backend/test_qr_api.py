@@ -37,7 +37,7 @@ try:
         print(f"  ✓ Member retrieved")
         data = response.json()
         print(f"    - member_id: {data.get('member_id')}")
-        print(f"    - qr_code_data present: {bool(data.get('qr_code_data'))}")
+        print(f"    - qr_code_hash present: {bool(data.get('qr_code_hash'))}")
     
     # Test getting QR code
     response = client.get(f'/api/members/{member.id}/qr_code/')
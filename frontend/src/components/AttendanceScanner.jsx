@@ -1,6 +1,7 @@
 import React, { useRef, useState, useEffect, useCallback } from 'react';
 import jsQR from 'jsqr';
 import { attendanceApi } from '../services/api';
+import { loadScannerBundle } from '../services/scannerBundle';
 import '../styles/components.css';
 
 const INACTIVITY_TIMEOUT_MS = 30 * 1000; // 30 seconds
@@ -8,6 +9,7 @@ const SCAN_INTERVAL_MS = 100; // Check for QR codes up to 10 times per second
 const MAX_SCAN_WIDTH = 640; // Downscale frames before decoding for faster scans
 const DUPLICATE_SCAN_WINDOW_MS = 1500;
 const ALERT_AUTO_DISMISS_MS = 2800;
+const BUNDLE_REFRESH_MS = 60 * 1000; // Pick up newly registered members
 
 const AttendanceScanner = ({ service, onCheckinSuccess }) => {
   const videoRef = useRef(null);
@@ -20,6 +22,7 @@ const AttendanceScanner = ({ service, onCheckinSuccess }) => {
   const inactivityTimeoutRef = useRef(null);
   const alertTimeoutRef = useRef(null);
   const lastScannedRef = useRef(null);
+  const scannerBundleRef = useRef(null);
 
   const [scannedValue, setScannedValue] = useState('');
   const [message, setMessage] = useState('');
@@ -199,6 +202,17 @@ const AttendanceScanner = ({ service, onCheckinSuccess }) => {
     console.log('Camera fully stopped');
   }
 
+  // Offline, codes the bundle knows can't succeed are rejected without a request.
+  // Online, the server decides: the bundle may predate members registered since.
+  function rejectUnknownMember(memberID) {
+    const bundle = scannerBundleRef.current;
+    if (!navigator.onLine && bundle && !bundle.filter.mightContain(memberID)) {
+      showScanAlert(`${memberID} is not a registered member`, 'error');
+      return true;
+    }
+    return false;
+  }
+
   async function handleQRCodeDetected(memberID) {
     console.log('QR code detected, processing:', memberID);
 
@@ -218,6 +232,10 @@ const AttendanceScanner = ({ service, onCheckinSuccess }) => {
       return;
     }
 
+    if (rejectUnknownMember(memberID)) {
+      return;
+    }
+
     try {
       console.log(`Checking in member: ${memberID} for service: ${service.id}`);
       const result = await attendanceApi.checkInMember(memberID, service.id);
@@ -255,6 +273,25 @@ const AttendanceScanner = ({ service, onCheckinSuccess }) => {
     };
   }, []);
 
+  // Keep the offline validation bundle current: on each session change and
+  // every BUNDLE_REFRESH_MS after (304 when unchanged)
+  useEffect(() => {
+    let cancelled = false;
+    const refresh = () => {
+      loadScannerBundle().then((bundle) => {
+        if (!cancelled && bundle) {
+          scannerBundleRef.current = bundle;
+        }
+      });
+    };
+    refresh();
+    const interval = setInterval(refresh, BUNDLE_REFRESH_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [service?.id]);
+
   const handleManualScan = async () => {
     if (!scannedValue.trim()) {
       showScanAlert('Please enter a member ID', 'error');
@@ -271,6 +308,10 @@ const AttendanceScanner = ({ service, onCheckinSuccess }) => {
       return;
     }
 
+    if (rejectUnknownMember(scannedValue.trim())) {
+      return;
+    }
+
     setManualCheckinLoading(true);
     try {
       const result = await attendanceApi.checkInMember(scannedValue, service.id);
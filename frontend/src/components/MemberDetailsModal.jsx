@@ -28,7 +28,7 @@ const MemberDetailsModal = ({
       setLoadingHistory(true);
       
       // Fetch member's attendance records
-      const attendanceUrl = `/attendance/?member=${member.id}&limit=100`;
+      const attendanceUrl = `/attendance/?member=${member.id}&page_size=100`;
       console.log('Fetching attendance from:', attendanceUrl, 'for member ID:', member.id);
       const attendanceResponse = await apiClient.get(attendanceUrl);
       let attendanceList = attendanceResponse.data.results || attendanceResponse.data || [];
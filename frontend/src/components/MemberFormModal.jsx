@@ -2,7 +2,7 @@ import React from 'react';
 import { AiOutlineLoading3Quarters } from 'react-icons/ai';
 import '../styles/components.css';
 
-const DEPARTMENT_CHOICES = [
+export const DEPARTMENT_CHOICES = [
   { value: 'technical', label: 'Technical' },
   { value: 'media', label: 'Media' },
   { value: 'echoes_of_grace', label: 'Echoes of Grace' },
@@ -13,7 +13,7 @@ const DEPARTMENT_CHOICES = [
   { value: 'protocol_ushering', label: 'Protocol & Ushering' },
 ];
 
-const CLASS_CHOICES = [
+export const CLASS_CHOICES = [
   { value: 'airport', label: 'Airport' },
   { value: 'abesim', label: 'Abesim' },
   { value: 'old_abesim', label: 'Old Abesim' },
@@ -35,7 +35,7 @@ const CLASS_CHOICES = [
   { value: 'distance', label: 'Distance' },
 ];
 
-const COMMITTEE_CHOICES = [
+export const COMMITTEE_CHOICES = [
   { value: 'finance', label: 'Finance' },
   { value: 'audit', label: 'Audit' },
   { value: 'project', label: 'Project' },
@@ -3,21 +3,27 @@ import QRCodeModal from './QRCodeModal';
 import MemberDetailsModal from './MemberDetailsModal';
 import '../styles/components.css';
 
-const MembersTable = ({ members, onEdit, onDelete }) => {
+// loadMember: optional async (member) => full member, for lists built from
+// lightweight search results; modals and onEdit get the full record
+const MembersTable = ({ members, onEdit, onDelete, loadMember }) => {
   const [showQRModal, setShowQRModal] = useState(false);
   const [showDetailsModal, setShowDetailsModal] = useState(false);
   const [selectedMember, setSelectedMember] = useState(null);
 
-  const handleQRClick = (member) => {
-    setSelectedMember(member);
+  const resolveMember = async (member) => (loadMember ? loadMember(member) : member);
+
+  const handleQRClick = async (member) => {
+    setSelectedMember(await resolveMember(member));
     setShowQRModal(true);
   };
 
-  const handleViewDetails = (member) => {
-    setSelectedMember(member);
+  const handleViewDetails = async (member) => {
+    setSelectedMember(await resolveMember(member));
     setShowDetailsModal(true);
   };
 
+  const handleEdit = async (member) => onEdit(await resolveMember(member));
+
   const getMemberTypeLabel = (member) => (member.is_visitor ? 'Visitor' : 'Member');
   const getSexLabel = (member) => {
     if (!member.sex) return 'Sex not set';
@@ -49,7 +55,7 @@ const MembersTable = ({ members, onEdit, onDelete }) => {
             <p className="managed-member-contact">{getPrimaryContact(member)}</p>
 
             <div className="managed-member-actions">
-              {member.qr_code_image && (
+              {(member.qr_code_image || loadMember) && (
                 <button className="btn btn-secondary" onClick={() => handleQRClick(member)}>
                   QR Code
                 </button>
@@ -57,7 +63,7 @@ const MembersTable = ({ members, onEdit, onDelete }) => {
               <button className="btn btn-secondary" onClick={() => handleViewDetails(member)}>
                 Details
               </button>
-              <button className="btn btn-secondary" onClick={() => onEdit(member)}>
+              <button className="btn btn-secondary" onClick={() => handleEdit(member)}>
                 Edit
               </button>
               <button className="btn btn-danger" onClick={() => onDelete(member.id)}>
@@ -98,7 +104,7 @@ const MembersTable = ({ members, onEdit, onDelete }) => {
                 </td>
                 <td className="actions-col" data-label="Actions">
                   <div className="action-buttons">
-                    {member.qr_code_image && (
+                    {(member.qr_code_image || loadMember) && (
                       <button
                         className="btn-icon qr-icon"
                         onClick={() => handleQRClick(member)}
@@ -116,7 +122,7 @@ const MembersTable = ({ members, onEdit, onDelete }) => {
                     </button>
                     <button
                       className="btn-icon edit-icon"
-                      onClick={() => onEdit(member)}
+                      onClick={() => handleEdit(member)}
                       title="Edit Member"
                     >
                       ✏️
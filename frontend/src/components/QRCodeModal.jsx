@@ -116,6 +116,8 @@ const QRCodeModal = ({ isOpen, member, onClose }) => {
       const qrSize = 500;
       const qrX = (cardWidth - qrSize) / 2;
       const qrY = yPos + 40;
+      // QR images are one pixel per module; scale without smoothing
+      ctx.imageSmoothingEnabled = false;
       ctx.drawImage(img, qrX, qrY, qrSize, qrSize);
 
       // Convert to blob and download
@@ -159,7 +161,8 @@ const QRCodeModal = ({ isOpen, member, onClose }) => {
               color: #333;
             }
             img {
-              max-width: 400px;
+              width: 400px;
+              image-rendering: pixelated;
               border: 2px solid #ddd;
               padding: 10px;
             }
@@ -1,5 +1,6 @@
 import React from 'react';
 import { AiOutlineLoading3Quarters } from 'react-icons/ai';
+import { CLASS_CHOICES, COMMITTEE_CHOICES, DEPARTMENT_CHOICES } from './MemberFormModal';
 import '../styles/components.css';
 
 const ServiceFormModal = ({
@@ -136,6 +137,75 @@ const ServiceFormModal = ({
               />
             </div>
 
+            <div className="form-group full-width">
+              <label>Absences</label>
+              <select
+                value={formData.attendance_mode || 'standard'}
+                onChange={(e) =>
+                  onFormChange({ ...formData, attendance_mode: e.target.value })
+                }
+                className="input-field"
+              >
+                <option value="standard">Mark absences when the session closes</option>
+                <option value="preseeded">Pre-seed absences when the session opens</option>
+                <option value="implicit">Store check-ins only; derive absences</option>
+              </select>
+            </div>
+
+            <div className="form-group half-width">
+              <label>Expected Department</label>
+              <select
+                value={formData.roster_department || ''}
+                onChange={(e) =>
+                  onFormChange({ ...formData, roster_department: e.target.value || null })
+                }
+                className="input-field"
+              >
+                <option value="">Everyone</option>
+                {DEPARTMENT_CHOICES.map((dept) => (
+                  <option key={dept.value} value={dept.value}>
+                    {dept.label}
+                  </option>
+                ))}
+              </select>
+            </div>
+
+            <div className="form-group half-width">
+              <label>Expected Class</label>
+              <select
+                value={formData.roster_class || ''}
+                onChange={(e) =>
+                  onFormChange({ ...formData, roster_class: e.target.value || null })
+                }
+                className="input-field"
+              >
+                <option value="">Everyone</option>
+                {CLASS_CHOICES.map((cls) => (
+                  <option key={cls.value} value={cls.value}>
+                    {cls.label}
+                  </option>
+                ))}
+              </select>
+            </div>
+
+            <div className="form-group half-width">
+              <label>Expected Committee</label>
+              <select
+                value={formData.roster_committee || ''}
+                onChange={(e) =>
+                  onFormChange({ ...formData, roster_committee: e.target.value || null })
+                }
+                className="input-field"
+              >
+                <option value="">Everyone</option>
+                {COMMITTEE_CHOICES.map((com) => (
+                  <option key={com.value} value={com.value}>
+                    {com.label}
+                  </option>
+                ))}
+              </select>
+            </div>
+
             <div className="form-group full-width">
               <label>Description</label>
               <textarea
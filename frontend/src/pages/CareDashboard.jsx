@@ -9,6 +9,8 @@ const CareDashboard = () => {
   const [members, setMembers] = useState([]);
   const [metricsMap, setMetricsMap] = useState({});  // member.id -> metric data
   const [alertsMap, setAlertsMap] = useState({});    // member.id -> alert data
+  const [counts, setCounts] = useState({ total: 0, critical: 0, at_risk: 0, early_warning: 0, active: 0 });
+  const [followUps, setFollowUps] = useState([]);
   
   // UI state
   const [loading, setLoading] = useState(true);
@@ -20,112 +22,37 @@ const CareDashboard = () => {
   const [selectedMember, setSelectedMember] = useState(null);
   const [showMemberModal, setShowMemberModal] = useState(false);
 
-  // Fetch all members with their metrics and alerts
-  useEffect(() => {
-    // First, ensure all metrics are recalculated (creates metrics for members that don't have them)
-      const initializeAndFetch = async () => {
-        try {
-          console.log('Initializing absenteeism metrics for all members...');
-          await apiClient.post('/members/absenteeism-metrics/recalculate_all/');
-        } catch (err) {
-          console.warn('Metrics recalculation skipped (might not be needed)', err);
-        } finally {
-          // Fetch data regardless of recalc result; we await to ensure metricsMap is populated
-          await fetchAllData();
-        }
-      };
+  // Number of highest-absenteeism members listed on the dashboard
+  const DASHBOARD_LIMIT = 200;
 
-      initializeAndFetch();
-    
-    // Do NOT auto-refresh - user requested to stop this
-    // Users can manually refresh by using browser refresh or a refresh button
-    // Auto-refresh can cause janky UI and excessive API calls
-    
-    // Cleanup any intervals on unmount (just in case)
-    return () => {};
+  // One aggregated request per load (counts, top at-risk members, follow-ups)
+  useEffect(() => {
+    fetchAllData();
   }, []);
 
   const fetchAllData = async () => {
     try {
       setLoading(true);
       
-      // Fetch all members (handle pagination)
-      const membersResponse = await apiClient.get('/members/');
-      let membersList = membersResponse.data.results || membersResponse.data;
-      
-      // Handle pagination - fetch remaining pages
-      if (membersResponse.data.results && membersResponse.data.next) {
-        let nextUrl = membersResponse.data.next;
-        while (nextUrl) {
-          const url = new URL(nextUrl);
-          const pathAndQuery = url.pathname.substring(4) + url.search; // Remove '/api' from pathname
-          const nextResponse = await apiClient.get(pathAndQuery);
-          membersList = [...membersList, ...(nextResponse.data.results || [])];
-          nextUrl = nextResponse.data.next || null;
-        }
-      }
-      
-      const allMembers = membersList.filter(m => !m.is_visitor);
-      
-      // Fetch metrics (optional - use empty map if fails)
-      // IMPORTANT: Paginate through ALL metrics, regardless of count
-      let metricsMap = {};
-      try {
-        const metricsResponse = await apiClient.get('/members/absenteeism-metrics/');
-        let metricsList = metricsResponse.data.results || metricsResponse.data || [];
-        
-        // Handle pagination - fetch ALL pages until no more results
-        if (metricsResponse.data.results && metricsResponse.data.next) {
-          let nextUrl = metricsResponse.data.next;
-          while (nextUrl) {
-            const url = new URL(nextUrl);
-            const pathAndQuery = url.pathname.substring(4) + url.search;
-            const nextResponse = await apiClient.get(pathAndQuery);
-            metricsList = [...metricsList, ...(nextResponse.data.results || [])];
-            nextUrl = nextResponse.data.next || null;
-          }
-        }
-        
-        metricsList.forEach(metric => {
-          metricsMap[metric.member] = metric;
-        });
-        console.log(`Loaded metrics for ${Object.keys(metricsMap).length} members`);
-      } catch (err) {
-        console.warn('Metrics unavailable, using empty map', err);
-      }
+      const response = await apiClient.get('/members/care_dashboard/', {
+        params: { limit: DASHBOARD_LIMIT },
+      });
+      const dashboard = response.data;
       
-      // Fetch alerts (optional - use empty map if fails)
-      // IMPORTANT: Paginate through ALL alerts, regardless of count
-      let alertsMap = {};
-      try {
-        const alertsResponse = await apiClient.get('/members/absenteeism-alerts/unresolved/');
-        let alertsList = alertsResponse.data.results || alertsResponse.data || [];
-        
-        // Handle pagination - fetch ALL pages until no more results
-        if (alertsResponse.data.results && alertsResponse.data.next) {
-          let nextUrl = alertsResponse.data.next;
-          while (nextUrl) {
-            const url = new URL(nextUrl);
-            const pathAndQuery = url.pathname.substring(4) + url.search;
-            const nextResponse = await apiClient.get(pathAndQuery);
-            alertsList = [...alertsList, ...(nextResponse.data.results || [])];
-            nextUrl = nextResponse.data.next || null;
-          }
+      const metricsMap = {};
+      const alertsMap = {};
+      dashboard.at_risk_members.forEach(member => {
+        metricsMap[member.id] = member.metric;
+        if (member.alert) {
+          alertsMap[member.id] = member.alert;
         }
-        
-        alertsList.forEach(alert => {
-          if (!alertsMap[alert.member]) {
-            alertsMap[alert.member] = alert;
-          }
-        });
-        console.log(`Loaded ${Object.keys(alertsMap).length} unresolved alerts`);
-      } catch (err) {
-        console.warn('Alerts unavailable, using empty map', err);
-      }
+      });
       
-      setMembers(allMembers);
+      setMembers(dashboard.at_risk_members);
       setMetricsMap(metricsMap);
       setAlertsMap(alertsMap);
+      setCounts(dashboard.counts);
+      setFollowUps(dashboard.follow_ups);
       
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
@@ -135,6 +62,16 @@ const CareDashboard = () => {
     }
   };
 
+  // Rebuild metrics from attendance (creates missing ones), then reload
+  const handleRefresh = async () => {
+    try {
+      await apiClient.post('/members/absenteeism-metrics/recalculate_all/');
+    } catch (err) {
+      console.warn('Metrics recalculation skipped (might not be needed)', err);
+    }
+    await fetchAllData();
+  };
+
   // Get metric for a member
   const getMetric = (memberId) => {
     return metricsMap[memberId] || null;
@@ -278,25 +215,8 @@ const CareDashboard = () => {
   }
 
   const filteredMembers = getFilteredAndSortedMembers();
-  const stats = {
-    total: members.length,
-    critical: members.filter(m => {
-      const metric = getMetric(m.id);
-      return metric && metric.absenteeism_ratio >= 0.60;
-    }).length,
-    at_risk: members.filter(m => {
-      const metric = getMetric(m.id);
-      return metric && metric.absenteeism_ratio >= 0.40 && metric.absenteeism_ratio < 0.60;
-    }).length,
-    early_warning: members.filter(m => {
-      const metric = getMetric(m.id);
-      return metric && metric.absenteeism_ratio >= 0.25 && metric.absenteeism_ratio < 0.40;
-    }).length,
-    active: members.filter(m => {
-      const metric = getMetric(m.id);
-      return !metric || metric.absenteeism_ratio < 0.25;
-    }).length,
-  };
+  // Counts cover every member, not only the listed ones
+  const stats = counts;
 
   return (
     <div className="care-dashboard-new">
@@ -304,7 +224,7 @@ const CareDashboard = () => {
       <div style={{ marginBottom: '2rem' }}>
         <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', width: '100%' }}>
           <button
-            onClick={fetchAllData}
+            onClick={handleRefresh}
             disabled={loading}
             className="btn btn-sm btn-info"
             title="Refresh dashboard data"
@@ -384,7 +304,7 @@ const CareDashboard = () => {
 
         <button 
           className="refresh-button"
-          onClick={fetchAllData}
+          onClick={handleRefresh}
           title="Refresh all data"
         >
           🔄 Refresh
@@ -489,6 +409,43 @@ const CareDashboard = () => {
         )}
       </div>
 
+      {/* Pending Follow-ups */}
+      {followUps.length > 0 && (
+        <div className="members-table-container">
+          <h3>Pending Follow-ups ({followUps.length})</h3>
+          <table className="members-table">
+            <thead>
+              <tr>
+                <th>Member</th>
+                <th>Follow-up Date</th>
+                <th>Method</th>
+                <th>Contacted By</th>
+                <th>Actions</th>
+              </tr>
+            </thead>
+            <tbody>
+              {followUps.map(followUp => (
+                <tr key={followUp.id} className="member-row">
+                  <td className="member-name"><strong>{followUp.member_name}</strong></td>
+                  <td>{new Date(followUp.follow_up_date).toLocaleDateString()}</td>
+                  <td>{followUp.contact_method}</td>
+                  <td>{followUp.contacted_by || '—'}</td>
+                  <td className="actions-cell">
+                    <button
+                      className="btn-view"
+                      onClick={() => handleViewMember(followUp.member)}
+                      title="View details"
+                    >
+                      👁️ View
+                    </button>
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+
       {/* Member Details Modal */}
       <MemberDetailsModal
         isOpen={showMemberModal}
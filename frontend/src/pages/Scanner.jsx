@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { serviceApi, memberApi } from '../services/api';
 import { AttendanceScanner, LoadingSpinner, MembersTable, MemberFormModal } from '../components';
 import '../styles/pages.css';
@@ -28,8 +28,9 @@ const Scanner = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [expandedService, setExpandedService] = useState(null);
   const [members, setMembers] = useState([]);
-  const [membersLoading, setMembersLoading] = useState(true);
+  const [membersLoading, setMembersLoading] = useState(false);
   const [memberSearch, setMemberSearch] = useState('');
+  const latestMemberSearch = useRef('');
   const [showFormModal, setShowFormModal] = useState(false);
   const [editingId, setEditingId] = useState(null);
   const [formError, setFormError] = useState(null);
@@ -53,22 +54,39 @@ const Scanner = () => {
 
   useEffect(() => {
     fetchServices();
-    fetchMembers();
   }, []);
 
-  const fetchMembers = async () => {
+  // Server-side typeahead instead of downloading every member up front
+  useEffect(() => {
+    const timer = setTimeout(() => fetchMembers(memberSearch), 200);
+    return () => clearTimeout(timer);
+  }, [memberSearch]);
+
+  const fetchMembers = async (search = memberSearch) => {
+    const query = search.trim();
+    latestMemberSearch.current = query;
+    if (!query) {
+      setMembers([]);
+      return;
+    }
     setMembersLoading(true);
     try {
-      const data = await memberApi.getMembers();
-      const membersList = data.results || data;
-      setMembers(membersList);
+      const results = await memberApi.searchMembers(query, { limit: 25 });
+      // Ignore responses for queries the user has already typed past
+      if (latestMemberSearch.current === query) {
+        setMembers(results);
+      }
     } catch (error) {
-      console.error('Error fetching members:', error);
+      console.error('Error searching members:', error);
     } finally {
-      setMembersLoading(false);
+      if (latestMemberSearch.current === query) {
+        setMembersLoading(false);
+      }
     }
   };
 
+  const loadFullMember = (member) => memberApi.getMemberById(member.id);
+
   const fetchServices = async () => {
     setLoading(true);
     try {
@@ -232,17 +250,6 @@ const Scanner = () => {
     }
   };
 
-  const filteredMembers = members.filter((member) => {
-    if (!memberSearch.trim()) return true;
-    const query = memberSearch.toLowerCase().trim();
-    return (
-      (member.full_name && member.full_name.toLowerCase().includes(query)) ||
-      (member.email && member.email.toLowerCase().includes(query)) ||
-      (member.phone && member.phone.toLowerCase().includes(query)) ||
-      (member.member_id && member.member_id.toLowerCase().includes(query))
-    );
-  });
-
   const selectedServiceTime = selectedService
     ? [formatServiceTime(selectedService.start_time), formatServiceTime(selectedService.end_time)]
         .filter(Boolean)
@@ -462,7 +469,7 @@ const Scanner = () => {
             <div className="search-box">
               <input
                 type="text"
-                placeholder="🔍 Search by name, email, phone or member ID..."
+                placeholder="🔍 Search by name, phone or member ID..."
                 value={memberSearch}
                 onChange={(e) => setMemberSearch(e.target.value)}
                 className="search-input"
@@ -471,19 +478,20 @@ const Scanner = () => {
           </div>
 
           {membersLoading ? (
-            <LoadingSpinner message="Loading members..." />
+            <LoadingSpinner message="Searching members..." />
           ) : (
             <>
-              {filteredMembers.length === 0 && memberSearch && (
+              {members.length === 0 && memberSearch.trim() && (
                 <div className="no-results">
                   <p>No members match your search criteria.</p>
                 </div>
               )}
               <div className="members-table-wrapper">
                 <MembersTable
-                  members={filteredMembers}
+                  members={members}
                   onEdit={handleEdit}
                   onDelete={handleDelete}
+                  loadMember={loadFullMember}
                 />
               </div>
             </>
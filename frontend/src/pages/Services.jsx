@@ -29,6 +29,10 @@ const Services = () => {
     description: '',
     is_recurring: false,
     recurrence_pattern: '',
+    attendance_mode: 'standard',
+    roster_department: null,
+    roster_class: null,
+    roster_committee: null,
   });
   const { services, setServices, isLoading, setIsLoading } = useServiceStore();
 
@@ -109,6 +113,10 @@ const Services = () => {
       description: service.description || '',
       is_recurring: service.is_recurring || false,
       recurrence_pattern: service.recurrence_pattern || '',
+      attendance_mode: service.attendance_mode || 'standard',
+      roster_department: service.roster_department || null,
+      roster_class: service.roster_class || null,
+      roster_committee: service.roster_committee || null,
     });
     setEditingId(service.id);
     setFormError(null);
@@ -245,6 +253,10 @@ const Services = () => {
       description: '',
       is_recurring: false,
       recurrence_pattern: '',
+      attendance_mode: 'standard',
+      roster_department: null,
+      roster_class: null,
+      roster_committee: null,
     });
     setEditingId(null);
     setFormError(null);
@@ -291,6 +303,10 @@ const Services = () => {
               description: '',
               is_recurring: false,
               recurrence_pattern: '',
+              attendance_mode: 'standard',
+              roster_department: null,
+              roster_class: null,
+              roster_committee: null,
             });
             setShowFormModal(true);
           }}
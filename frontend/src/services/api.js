@@ -3,7 +3,8 @@ import apiClient from './apiClient';
 // Member API calls
 export const memberApi = {
   getMembers: async () => {
-    const response = await apiClient.get('/members/');
+    // Large pages keep the number of round trips down (the server caps page_size)
+    const response = await apiClient.get('/members/', { params: { page_size: 500 } });
     const data = response.data;
     
     // Handle paginated responses - fetch all pages if needed
@@ -32,6 +33,21 @@ export const memberApi = {
     return response.data;
   },
 
+  searchMembers: async (query, { limit = 10, includeVisitors = true } = {}) => {
+    const response = await apiClient.get('/members/autocomplete/', {
+      params: { q: query, limit, visitors: includeVisitors },
+    });
+    return response.data.results;
+  },
+
+  // Details (alerts, metric, contacts, attendance history) of several members at once
+  getMembersBatch: async (ids) => {
+    const response = await apiClient.get('/members/batch/', {
+      params: { ids: ids.join(',') },
+    });
+    return response.data;
+  },
+
   getMemberByMemberId: async (memberId) => {
     const response = await apiClient.get(`/members/by_member_id/`, {
       params: { member_id: memberId },
@@ -62,7 +78,7 @@ export const memberApi = {
 // Service API calls
 export const serviceApi = {
   getServices: async () => {
-    const response = await apiClient.get('/services/');
+    const response = await apiClient.get('/services/', { params: { page_size: 500 } });
     const data = response.data;
     
     // Handle paginated responses - fetch all pages if needed
@@ -183,3 +199,14 @@ export const attendanceApi = {
     return response.data;
   },
 };
+
+// Delta sync: members and services changed since the last cursor
+export const syncApi = {
+  getChanges: async (since = null) => {
+    const response = await apiClient.get('/sync/', {
+      params: since ? { since } : {},
+    });
+    // { cursor, full, members, services, deleted: { members, services } }
+    return response.data;
+  },
+};
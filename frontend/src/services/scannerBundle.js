@@ -0,0 +1,74 @@
+import apiClient from './apiClient';
+
+// Offline QR validation bundle (backend: attendance/scanner_bundle.py)
+// The Bloom filter hashing below must match the backend exactly.
+
+const STORAGE_KEY = 'scannerBundle';
+const FNV_PRIME = 0x01000193;
+const FNV_OFFSET = 0x811c9dc5;
+const FNV_OFFSET_2 = 0x5bd1e995;
+
+const encoder = new TextEncoder();
+
+const fnv1a = (bytes, offset) => {
+  let value = offset;
+  for (const byte of bytes) {
+    value = Math.imul(value ^ byte, FNV_PRIME) >>> 0;
+  }
+  return value;
+};
+
+const decodeBase64 = (data) => Uint8Array.from(atob(data), (char) => char.charCodeAt(0));
+
+export const createBloomFilter = ({ bits, hashes, data }) => {
+  const bytes = decodeBase64(data);
+
+  return {
+    // false: certainly not a registered (non-visitor) member; true: probably is
+    mightContain: (value) => {
+      const encoded = encoder.encode(value);
+      const h1 = fnv1a(encoded, FNV_OFFSET);
+      const h2 = (fnv1a(encoded, FNV_OFFSET_2) | 1) >>> 0;
+      for (let i = 0; i < hashes; i += 1) {
+        const index = (h1 + i * h2) % bits;
+        if (!(bytes[index >> 3] & (1 << (index & 7)))) {
+          return false;
+        }
+      }
+      return true;
+    },
+  };
+};
+
+const readStored = () => {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY));
+  } catch {
+    return null;
+  }
+};
+
+// Latest bundle: revalidated with its ETag, or the stored copy when offline
+export const loadScannerBundle = async () => {
+  const stored = readStored();
+
+  try {
+    const response = await apiClient.get('/attendance/scanner_bundle/', {
+      headers: stored?.etag ? { 'If-None-Match': stored.etag } : {},
+      validateStatus: (status) => status === 200 || status === 304,
+    });
+
+    if (response.status === 200) {
+      const next = { etag: response.headers.etag, bundle: response.data };
+      localStorage.setItem(STORAGE_KEY, JSON.stringify(next));
+      return { ...response.data, filter: createBloomFilter(response.data.members) };
+    }
+  } catch (error) {
+    console.warn('Scanner bundle unavailable, using the stored copy:', error.message);
+  }
+
+  if (!stored?.bundle) {
+    return null;
+  }
+  return { ...stored.bundle, filter: createBloomFilter(stored.bundle.members) };
+};